@@ -1,12 +1,12 @@
 from typing import List, Any
 
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi import Request, Depends
+from fastapi import Request, Depends, Query
 from sqlalchemy import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.auth.service import UserService
-from app.auth.utils import decode_token
+from app.auth.utils import STREAM_TOKEN_SCOPE, decode_token
 from app.db.main import get_session
 from app.db.models import User
 from app.errors import InvalidToken, AccessTokenRequired, RefreshTokenRequired, UserNotFound, InsufficientPermission
@@ -44,7 +44,7 @@ class TokenBearer(HTTPBearer):
 
 class AccessTokenBearer(TokenBearer):
 	def verify_token_data(self, token_data: dict) -> None:
-		if token_data and token_data["refresh"]:
+		if token_data and (token_data["refresh"] or token_data.get("scope")):
 			raise AccessTokenRequired()
 
 
@@ -62,6 +62,20 @@ async def get_current_user(
 	return user
 
 
+async def get_stream_user(
+		token: str = Query(description="Token from POST /task/stream-token"),
+		session: AsyncSession = Depends(get_session)
+) -> User:
+	"""User of a scoped stream token passed in the query string (EventSource sends no headers)."""
+	token_data = decode_token(token)
+	if not token_data or token_data.get("scope") != STREAM_TOKEN_SCOPE:
+		raise InvalidToken()
+	user = await user_service.get_user_by_username(token_data["user"]["username"], session)
+	if not user:
+		raise UserNotFound()
+	return user
+
+
 class RoleChecker:
 	def __init__(self, allowed_roles: List[str]) -> None:
 		self.allowed_roles = allowed_roles
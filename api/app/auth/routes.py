@@ -3,7 +3,7 @@ from typing import List
 from uuid import uuid4
 
 from fastapi import APIRouter, status, Depends, HTTPException, Body
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -12,6 +12,7 @@ from app.auth.schemas import UserCreateModel, UserLoginModel, UserModel, UserPar
 from app.auth.service import UserService
 from app.auth.utils import verify_password, create_access_token, generate_passwd_hash
 from app.db.main import get_session
+from app.db.redis import response_cache
 from app.errors import UserAlreadyExists, InvalidCredentials, InvalidToken, UserNotFound, InsufficientPermission
 
 auth_router = APIRouter()
@@ -52,7 +53,7 @@ async def login_user(
 	user = await user_service.get_user_by_username(username, session)
 
 	if user is not None:
-		password_valid = verify_password(password, user.password_hash)
+		password_valid = await verify_password(password, user.password_hash)
 
 		if password_valid:
 			access_token = create_access_token(
@@ -109,8 +110,8 @@ async def get_current_user(
 async def get_all_users(
 		session: AsyncSession = Depends(get_session),
 ):
-	users = await user_service.get_all_users(session)
-	return users
+	body = await user_service.get_all_users_json(session)
+	return Response(content=body, media_type="application/json")
 
 
 @auth_router.get("/users/{user_id}", status_code=status.HTTP_200_OK, response_model=UserModel)
@@ -140,6 +141,7 @@ async def remove_user(
 ):
 	await session.delete(user_to_delete)
 	await session.commit()
+	await response_cache.invalidate("users", "tasks")
 
 
 
@@ -150,7 +152,7 @@ async def change_password(
 		user: UserModel = Depends(get_current_user),
 		session: AsyncSession = Depends(get_session)
 ):
-	if not verify_password(current_password, user.password_hash):
+	if not await verify_password(current_password, user.password_hash):
 		raise HTTPException(
 			status_code=status.HTTP_401_UNAUTHORIZED,
 			detail="Mot de passe actuel incorrect"
@@ -163,7 +165,7 @@ async def change_password(
 		)
 
 	# Mettre à jour le mot de passe
-	user.password_hash = generate_passwd_hash(new_password)
+	user.password_hash = await generate_passwd_hash(new_password)
 	session.add(user)
 	await session.commit()
 
@@ -176,7 +178,7 @@ async def update_password(
 		user = Depends(get_user_or_404),
 		session: AsyncSession = Depends(get_session)
 ):
-	password_hash = generate_passwd_hash(update_data.password)
+	password_hash = await generate_passwd_hash(update_data.password)
 	user.password_hash = password_hash
 	await session.commit()
 	await session.refresh(user)
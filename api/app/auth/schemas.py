@@ -3,7 +3,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 
 from app.utils.status import UserRole
 
@@ -35,6 +35,13 @@ class UserModel(BaseModel):
     updated_at: datetime
 
 
+user_list_adapter = TypeAdapter(list[UserModel])
+
+
+def encode_users(users) -> bytes:
+    return user_list_adapter.dump_json(user_list_adapter.validate_python(users, from_attributes=True))
+
+
 class UserLoginModel(BaseModel):
     username: str = Field(max_length=25)
     password: str = Field(min_length=6)
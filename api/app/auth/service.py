@@ -2,9 +2,10 @@ from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
-from app.auth.schemas import UserCreateModel, UserPartialUpdate
+from app.auth.schemas import UserCreateModel, UserPartialUpdate, encode_users
 from app.auth.utils import generate_passwd_hash
 from app.db.models import User
+from app.db.redis import response_cache
 
 
 class UserService:
@@ -16,6 +17,13 @@ class UserService:
 		users = result.scalars().all()
 		return users
 
+	@classmethod
+	async def get_all_users_json(cls, session: AsyncSession) -> bytes:
+		async def compute():
+			return encode_users(await cls.get_all_users(session))
+
+		return await response_cache.get_or_compute("users", {"list": "all"}, compute)
+
 	async def get_user_by_username(self, username: str, session: AsyncSession):
 		statement = select(User).where(User.username == username)
 		result = await session.execute(statement)
@@ -30,9 +38,10 @@ class UserService:
 	async def create_user(self, user_data: UserCreateModel, session: AsyncSession):
 		user_data_dict = user_data.model_dump()
 		new_user = User(**user_data_dict)
-		new_user.password_hash = generate_passwd_hash(user_data_dict["password"])
+		new_user.password_hash = await generate_passwd_hash(user_data_dict["password"])
 		session.add(new_user)
 		await session.commit()
+		await response_cache.invalidate("users")
 		return new_user
 
 
@@ -42,6 +51,8 @@ class UserService:
 		for k, v in user_data_dict.items():
 			setattr(user, k, v)
 		await session.commit()
+		# Les listes de tâches embarquent l'utilisateur
+		await response_cache.invalidate("users", "tasks")
 		await session.refresh(user)
 		return user
 
@@ -49,6 +60,7 @@ class UserService:
 	async def delete_all_users(self, session: AsyncSession):
 		await session.execute(delete(User))
 		await session.commit()
+		await response_cache.invalidate("users", "tasks")
 
 
 
@@ -1,23 +1,60 @@
+import asyncio
 import logging
+import threading
 import uuid
-from datetime import timedelta, datetime
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta, datetime, timezone
+from typing import Any, Callable
 
 import jwt
 from passlib.context import CryptContext
+from prometheus_client import Gauge, Histogram
 
 from app.settings import Config
 
 passwd_context = CryptContext(schemes=["bcrypt"])
 ACCESS_TOKEN_EXPIRY = 3600
+# Jeton du flux SSE : passé dans l'URL, il ne sert qu'à ouvrir la connexion
+STREAM_TOKEN_SCOPE = "task_stream"
+STREAM_TOKEN_EXPIRY = timedelta(seconds=60)
 
-def generate_passwd_hash(password: str) -> str:
-	pwd_hash = passwd_context.hash(password)
+# bcrypt est volontairement lent : hors de la boucle d'événements, dans un pool borné
+bcrypt_executor = ThreadPoolExecutor(max_workers=Config.bcrypt_threads, thread_name_prefix="bcrypt")
+BCRYPT_QUEUE = Gauge(
+	"bcrypt_queue_depth", "Password hash operations waiting for a bcrypt thread", multiprocess_mode="livesum"
+)
+BCRYPT_DURATION = Histogram(
+	"bcrypt_duration_seconds", "Time spent hashing or verifying a password", ["operation"]
+)
+
+
+async def _run_bcrypt(operation: str, func: Callable, *args) -> Any:
+	# Sort de la file une seule fois : au démarrage du job, ou à l'annulation s'il n'a pas démarré
+	dequeued = threading.Lock()
+
+	def leave_queue():
+		if dequeued.acquire(blocking=False):
+			BCRYPT_QUEUE.dec()
+
+	def job():
+		leave_queue()
+		with BCRYPT_DURATION.labels(operation).time():
+			return func(*args)
+
+	BCRYPT_QUEUE.inc()
+	try:
+		return await asyncio.get_running_loop().run_in_executor(bcrypt_executor, job)
+	finally:
+		leave_queue()
+
+
+async def generate_passwd_hash(password: str) -> str:
+	pwd_hash = await _run_bcrypt("hash", passwd_context.hash, password)
 
 	return pwd_hash
 
-def verify_password(password: str, pwd_hash: str) -> bool:
-	return passwd_context.verify(password, pwd_hash)
+async def verify_password(password: str, pwd_hash: str) -> bool:
+	return await _run_bcrypt("verify", passwd_context.verify, password, pwd_hash)
 
 
 def create_access_token(
@@ -34,6 +71,18 @@ def create_access_token(
 	)
 	return token
 
+def create_stream_token(user_data: dict) -> str:
+	"""Short-lived token for `EventSource`, which cannot send an Authorization header."""
+	payload = {
+		"user": user_data,
+		"jti": str(uuid.uuid4()),
+		"refresh": False,
+		"scope": STREAM_TOKEN_SCOPE,
+		"exp": datetime.now(timezone.utc) + STREAM_TOKEN_EXPIRY,
+	}
+	return jwt.encode(payload=payload, key=Config.secret_key, algorithm=Config.algorithm)
+
+
 def decode_token(token: str) -> Any | None:
 	try:
 		token_data = jwt.decode(
@@ -1,3 +1,4 @@
-from app.settings import Settings
+from app.settings import Config
 
-settings = Settings(_env_file=".env")
\ No newline at end of file
+# Une seule instance, chargée une fois : `settings` et `Config` désignent le même objet
+settings = Config
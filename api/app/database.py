@@ -1,10 +1,7 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 
-from app.config import settings
-
-engine = create_async_engine(settings.active_database_url())
-async_session_maker = async_sessionmaker(bind=engine, expire_on_commit=False)
+# Moteur unique : celui de app.db.main, dont le cycle de vie est géré par le lifespan
+from app.db.main import engine, Async_session_maker as async_session_maker
 
 Base = declarative_base()
 
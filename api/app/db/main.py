@@ -1,10 +1,40 @@
+import asyncio
+
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 from app.config import settings
+from app.metrics import InstrumentedQueuePool, instrument_engine
+from app.profiling import instrument_profiler
 
-engine = create_async_engine(settings.active_database_url())
+engine = create_async_engine(
+	settings.active_database_url(),
+	pool_size=settings.db_pool_size,
+	max_overflow=settings.db_max_overflow,
+	pool_recycle=1800,
+	poolclass=InstrumentedQueuePool,
+)
+instrument_engine(engine.sync_engine)
+if settings.sql_profiling:
+	instrument_profiler(engine.sync_engine)
 Async_session_maker = async_sessionmaker(bind=engine, expire_on_commit=False)
 
 async def get_session():
 	async with Async_session_maker() as session:
-		yield session
\ No newline at end of file
+		yield session
+
+
+async def warm_up_pool(connections: int) -> None:
+	"""Open `connections` pooled connections up front so the first requests find them ready."""
+	opened = await asyncio.gather(
+		*(engine.connect() for _ in range(min(connections, settings.db_pool_size))), return_exceptions=True
+	)
+	conns = [conn for conn in opened if not isinstance(conn, BaseException)]
+	try:
+		await asyncio.gather(*(conn.execute(text("SELECT 1")) for conn in conns))
+	finally:
+		# Rendues au pool, pas fermées : pool_size les conserve ouvertes
+		await asyncio.gather(*(conn.close() for conn in conns))
+	for error in opened:
+		if isinstance(error, BaseException):
+			raise error
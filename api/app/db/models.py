@@ -1,10 +1,10 @@
 import uuid
-from datetime import datetime
+from datetime import datetime, date
 from enum import Enum
 from typing import Optional, List
 
 import sqlalchemy.dialects.postgresql as pg
-from sqlalchemy import CheckConstraint
+from sqlalchemy import CheckConstraint, Index, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlmodel import SQLModel, Field, Column, Relationship
 
@@ -28,32 +28,53 @@ class User(SQLModel, table=True):
 
 
 class Task(SQLModel, table=True):
+    # Partitioned by RANGE (completed_at) in migration c47a91d3e5f2: one partition per
+    # completion month, pending tasks in the default partition (see app.tasks.partitions).
+    # A partitioned table cannot have a primary key without the nullable partition key, so
+    # `id` is only the ORM identity; its uniqueness across partitions is enforced by the
+    # `task_ids` registry (trigger tasks_register_id, migration e3a8c5f20d94).
     __tablename__ = "tasks"
     __table_args__ = (
+        UniqueConstraint("id", "completed_at", name="tasks_id_completed_at_key", postgresql_nulls_not_distinct=True),
         CheckConstraint(
             "array_length(photos, 1) BETWEEN 2 AND 5",
             name='photos_length_check'
         ),
+        # Index partiels : les lignes supprimées logiquement n'y figurent pas
+        Index("ix_tasks_completed_at_live", "completed_at", postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_tasks_created_at_live", "created_at", postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_tasks_cell_live", "cell", postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_tasks_claimed_by", "claimed_by", postgresql_where=text("claimed_by IS NOT NULL")),
     )
+    __mapper_args__ = {"primary_key": ["id"]}
 
-    id: int = Field(sa_column=Column(pg.INTEGER, primary_key=True, autoincrement=True))
+    id: int = Field(sa_column=Column(
+        pg.INTEGER, nullable=False, server_default=text("nextval('tasks_id_seq')")
+    ))
     dispatcher_name: str
     address: str
-    planner_date: str = Field(sa_column=Column(pg.VARCHAR, nullable=True))
+    planned_date: Optional[date] = Field(default=None, sa_column=Column(pg.DATE, nullable=True, index=True))
     work_type: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
     voltage: float = Field(sa_column=Column(pg.FLOAT, nullable=False))
     job: Optional[str] = Field(sa_column=Column(pg.VARCHAR, nullable=True))
     latitude: float | None = Field(sa_column=Column(pg.FLOAT, nullable=True))
     longitude: float | None = Field(sa_column=Column(pg.FLOAT, nullable=True))
+    # Code Morton de (latitude, longitude), calculé par le trigger tasks_set_cell (cf. app.utils.geo)
+    cell: Optional[int] = Field(default=None, sa_column=Column(pg.BIGINT, nullable=True))
     photos: Optional[List[str]] = Field(
         sa_column=Column(pg.ARRAY(pg.VARCHAR),
                          nullable=True,
                          ))
     comments: Optional[str] = Field(sa_column=Column(pg.TEXT, nullable=True))
 
-    completion_date: str = Field(sa_column=Column(pg.VARCHAR, nullable=True))
+    completed_at: Optional[datetime] = Field(default=None, sa_column=Column(pg.TIMESTAMP, nullable=True))
     is_completed: bool = Field(sa_column=Column(pg.BOOLEAN, default=False))
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now, nullable=False))
+    version: int = Field(default=1, sa_column=Column(pg.INTEGER, nullable=False, default=1, server_default="1"))
+    deleted_at: Optional[datetime] = Field(default=None, sa_column=Column(pg.TIMESTAMP, nullable=True))
+    # Réservation temporaire d'une tâche en attente par un worker (POST /task/claim)
+    claimed_by: Optional[uuid.UUID] = Field(default=None, sa_column=Column(pg.UUID, nullable=True))
+    claim_expires_at: Optional[datetime] = Field(default=None, sa_column=Column(pg.TIMESTAMP, nullable=True))
 
     worker_id: Optional[uuid.UUID] = Field(default=None, foreign_key="users.uid", nullable=True, index=True )
     worker: Optional["User"] = Relationship(back_populates="tasks")
@@ -63,6 +84,106 @@ class Task(SQLModel, table=True):
         return f"<Task {self.uid}>"
 
 
+class TaskId(SQLModel, table=True):
+    # Registre des id de tasks, tenu par le trigger tasks_register_id (cf. Task)
+    __tablename__ = "task_ids"
+    id: int = Field(sa_column=Column(pg.INTEGER, primary_key=True, autoincrement=False))
+
+
+class TaskPurge(SQLModel, table=True):
+    __tablename__ = "task_purges"
+    id: int = Field(sa_column=Column(pg.INTEGER, primary_key=True, autoincrement=True))
+    cleared_up_to_id: Optional[int] = Field(default=None, sa_column=Column(pg.INTEGER, nullable=True))
+    requested_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now, nullable=False))
+    purged_up_to_id: Optional[int] = Field(default=None, sa_column=Column(pg.INTEGER, nullable=True))
+    deleted_count: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, default=0, server_default="0"))
+    finished_at: Optional[datetime] = Field(default=None, sa_column=Column(pg.TIMESTAMP, nullable=True))
+
+    def __repr__(self):
+        return f"<Task purge {self.id}>"
+
+
+class TaskEvent(SQLModel, table=True):
+    # Rempli par trigger sur tasks et task_purges, sert à la reprise des flux SSE.
+    # Colonnes xid8 txid et snapshot_xmin (migration 6c3e9a1d4b72) non mappées : remplies
+    # par défaut et lues en SQL par app.tasks.events
+    __tablename__ = "task_events"
+    id: int = Field(sa_column=Column(pg.BIGINT, primary_key=True, autoincrement=True))
+    task_id: Optional[int] = Field(default=None, sa_column=Column(pg.INTEGER, nullable=True))
+    kind: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
+    created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, nullable=False, server_default=text("now()")))
+
+    def __repr__(self):
+        return f"<Task event {self.id} {self.kind}>"
+
+
+class IdempotencyKey(SQLModel, table=True):
+    # Réponse mémorisée d'une création / complétion rejouée par un client mobile
+    __tablename__ = "idempotency_keys"
+    user_id: uuid.UUID = Field(sa_column=Column(pg.UUID, primary_key=True))
+    key: str = Field(sa_column=Column(pg.VARCHAR(255), primary_key=True))
+    request_hash: str = Field(sa_column=Column(pg.CHAR(64), nullable=False))
+    status_code: Optional[int] = Field(default=None, sa_column=Column(pg.SMALLINT, nullable=True))
+    response: Optional[bytes] = Field(default=None, sa_column=Column(pg.BYTEA, nullable=True))
+    expires_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, nullable=False, index=True))
+
+    def __repr__(self):
+        return f"<Idempotency key {self.key}>"
+
+
+class TaskClusterTile(SQLModel, table=True):
+    # Agrégats de carte précalculés par niveau de grille (préfixe du code Morton de tasks.cell)
+    __tablename__ = "task_cluster_tiles"
+    level: int = Field(sa_column=Column(pg.SMALLINT, primary_key=True))
+    key: int = Field(sa_column=Column(pg.BIGINT, primary_key=True))
+    completed: bool = Field(sa_column=Column(pg.BOOLEAN, primary_key=True))
+    work_type: str = Field(sa_column=Column(pg.VARCHAR, primary_key=True))
+    count: int = Field(sa_column=Column(pg.INTEGER, nullable=False))
+    lat_sum: float = Field(sa_column=Column(pg.FLOAT, nullable=False))
+    lon_sum: float = Field(sa_column=Column(pg.FLOAT, nullable=False))
+
+    def __repr__(self):
+        return f"<Cluster tile {self.level}/{self.key}>"
+
+
+class TaskClusterDelta(SQLModel, table=True):
+    # Écrit par trigger sur tasks, replié dans task_cluster_tiles (cf. app.tasks.clusters)
+    __tablename__ = "task_cluster_deltas"
+    id: int = Field(sa_column=Column(pg.BIGINT, primary_key=True, autoincrement=True))
+    task_id: int = Field(sa_column=Column(pg.INTEGER, nullable=False))
+    cell: int = Field(sa_column=Column(pg.BIGINT, nullable=False))
+    completed: bool = Field(sa_column=Column(pg.BOOLEAN, nullable=False))
+    work_type: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
+    count: int = Field(sa_column=Column(pg.SMALLINT, nullable=False))
+    lat_sum: float = Field(sa_column=Column(pg.FLOAT, nullable=False))
+    lon_sum: float = Field(sa_column=Column(pg.FLOAT, nullable=False))
+
+
+class TaskClusterState(SQLModel, table=True):
+    # Une seule ligne : filigrane d'effacement pris en compte par la dernière reconstruction
+    __tablename__ = "task_cluster_state"
+    id: int = Field(default=1, sa_column=Column(pg.SMALLINT, primary_key=True))
+    cleared_up_to_id: int = Field(sa_column=Column(pg.INTEGER, nullable=False))
+    built_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, nullable=False))
+
+
+class GazetteerEntry(SQLModel, table=True):
+    # Référentiel d'adresses local pour le géocodage hors ligne (index trigramme sur normalized)
+    __tablename__ = "gazetteer"
+    __table_args__ = (
+        Index("ix_gazetteer_normalized_trgm", "normalized", postgresql_using="gist",
+              postgresql_ops={"normalized": "gist_trgm_ops"}),
+    )
+    id: int = Field(sa_column=Column(pg.INTEGER, primary_key=True, autoincrement=True))
+    address: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
+    normalized: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
+    latitude: float = Field(sa_column=Column(pg.FLOAT, nullable=False))
+    longitude: float = Field(sa_column=Column(pg.FLOAT, nullable=False))
+
+    def __repr__(self):
+        return f"<Gazetteer entry {self.address}>"
+
+
 class WorkType(SQLModel, table=True):
     __tablename__ = 'work_types'
     uid: uuid.UUID = Field(sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4))
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_MIN_DELAY = 0.5
+RECONNECT_MAX_DELAY = 30.0
+
+
+def asyncpg_dsn() -> str:
+	return settings.active_database_url().replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+async def notify(session: AsyncSession, channel: str, payload: str) -> None:
+	"""Queue a NOTIFY on `channel`; Postgres delivers it when the transaction commits."""
+	await session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+
+
+class PgListener:
+	"""One dedicated asyncpg connection per worker, dispatching LISTEN channels to handlers.
+
+	When the connection drops it is reopened in the background with exponential backoff.
+	Notifications sent in between are lost, so the `on_reconnect` handlers run once the
+	channels are listened to again, to resynchronise whatever they feed.
+	"""
+
+	def __init__(self):
+		self._connection: asyncpg.Connection | None = None
+		self._handlers: Dict[str, List[Callable[[str], None]]] = defaultdict(list)
+		self._reconnect_handlers: List[Callable[[], None]] = []
+		self._reconnect: Optional[asyncio.Task] = None
+		self._stopping = False
+
+	def subscribe(self, channel: str, handler: Callable[[str], None]) -> None:
+		self._handlers[channel].append(handler)
+
+	def on_reconnect(self, handler: Callable[[], None]) -> None:
+		self._reconnect_handlers.append(handler)
+
+	async def start(self) -> None:
+		self._stopping = False
+		try:
+			await self._connect()
+		except Exception:
+			logger.exception("Database listener failed to connect, retrying in the background")
+			self._schedule_reconnect()
+
+	async def stop(self) -> None:
+		self._stopping = True
+		if self._reconnect is not None:
+			self._reconnect.cancel()
+			self._reconnect = None
+		if self._connection is not None:
+			await self._connection.close()
+			self._connection = None
+
+	async def _connect(self) -> None:
+		connection = await asyncpg.connect(asyncpg_dsn())
+		try:
+			for channel in self._handlers:
+				await connection.add_listener(channel, self._dispatch)
+		except Exception:
+			await connection.close()
+			raise
+		connection.add_termination_listener(self._on_termination)
+		self._connection = connection
+
+	def _on_termination(self, connection: asyncpg.Connection) -> None:
+		if self._stopping or connection is not self._connection:
+			return
+		logger.warning("Database listener connection lost, reconnecting")
+		self._connection = None
+		self._schedule_reconnect()
+
+	def _schedule_reconnect(self) -> None:
+		if self._reconnect is None or self._reconnect.done():
+			self._reconnect = asyncio.create_task(self._reconnect_loop())
+
+	async def _reconnect_loop(self) -> None:
+		delay = RECONNECT_MIN_DELAY
+		while True:
+			await asyncio.sleep(delay)
+			try:
+				await self._connect()
+				break
+			except Exception as exc:
+				delay = min(delay * 2, RECONNECT_MAX_DELAY)
+				logger.warning("Database listener reconnect failed (%s), next try in %.1fs", exc, delay)
+		logger.info("Database listener reconnected")
+		for handler in self._reconnect_handlers:
+			try:
+				handler()
+			except Exception:
+				logger.exception("Reconnect handler failed")
+
+	def _dispatch(self, connection, pid, channel: str, payload: str) -> None:
+		for handler in self._handlers[channel]:
+			try:
+				handler(payload)
+			except Exception:
+				logger.exception("Handler for channel %s failed", channel)
+
+
+pg_listener = PgListener()
@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+import struct
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "tec-bloc:cache"
+LOCK_TTL_MS = 10_000
+LOCK_WAIT_STEP = 0.05
+EARLY_RECOMPUTE_BETA = 1.0
+
+# Enveloppe stockée : expiration logique (epoch) et durée du dernier calcul, puis le corps JSON
+_ENVELOPE = struct.Struct("!dd")
+
+
+class ResponseCache:
+	"""Shared cache of encoded response bodies, keyed by namespace version and parameters.
+
+	Writers call `invalidate(namespace)`, which bumps the namespace version so that every
+	existing key becomes unreachable. Concurrent misses are collapsed behind a Redis lock,
+	and hot keys are recomputed slightly before they expire (probabilistic early expiration).
+	Without Redis, or when Redis fails or does not answer within `timeout` seconds, bodies
+	are computed on every call.
+	"""
+
+	def __init__(self, url: Optional[str], ttl: int, timeout: float = 0.3):
+		self.ttl = ttl
+		self._client: Optional[Redis] = (
+			Redis.from_url(url, socket_connect_timeout=timeout, socket_timeout=timeout) if url else None
+		)
+
+	@property
+	def enabled(self) -> bool:
+		return self._client is not None
+
+	@property
+	def client(self) -> Optional[Redis]:
+		"""The underlying connection pool, shared with other Redis users of the worker."""
+		return self._client
+
+	async def warm_up(self) -> None:
+		"""Open the first connection of the pool before traffic arrives."""
+		if self._client is None:
+			return
+		try:
+			await self._client.ping()
+		except RedisError as e:
+			logger.warning("Response cache unavailable: %s", e)
+
+	async def close(self) -> None:
+		if self._client is not None:
+			await self._client.aclose()
+
+	def _key(self, namespace: str, version: int, params: Dict[str, Any]) -> str:
+		digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+		return f"{KEY_PREFIX}:{namespace}:v{version}:{digest}"
+
+	async def get_or_compute(
+			self, namespace: str, params: Dict[str, Any], compute: Callable[[], Awaitable[bytes]],
+			ttl: Optional[int] = None
+	) -> bytes:
+		if self._client is None:
+			return await compute()
+		try:
+			version = int(await self._client.get(f"{KEY_PREFIX}:{namespace}:version") or 0)
+			key = self._key(namespace, version, params)
+			cached = await self._client.get(key)
+		except RedisError as e:
+			logger.warning("Response cache unavailable: %s", e)
+			return await compute()
+
+		if cached is not None:
+			expires_at, delta = _ENVELOPE.unpack_from(cached)
+			# XFetch : plus l'expiration approche, plus un recalcul anticipé devient probable
+			early = time.time() - delta * EARLY_RECOMPUTE_BETA * math.log(random.random() or 1e-12)
+			if early < expires_at:
+				return cached[_ENVELOPE.size:]
+
+		return await self._recompute(key, compute, stale=cached, ttl=ttl or self.ttl)
+
+	async def _recompute(
+			self, key: str, compute: Callable[[], Awaitable[bytes]], stale: Optional[bytes], ttl: int
+	) -> bytes:
+		lock_key = f"{key}:lock"
+		try:
+			acquired = await self._client.set(lock_key, b"1", nx=True, px=LOCK_TTL_MS)
+		except RedisError:
+			return await compute()
+
+		if not acquired:
+			# Un autre worker calcule déjà : on sert la valeur encore valide ou on l'attend
+			if stale is not None:
+				return stale[_ENVELOPE.size:]
+			deadline = time.monotonic() + LOCK_TTL_MS / 1000
+			while time.monotonic() < deadline:
+				await asyncio.sleep(LOCK_WAIT_STEP)
+				try:
+					cached = await self._client.get(key)
+				except RedisError:
+					break
+				if cached is not None:
+					return cached[_ENVELOPE.size:]
+			return await compute()
+
+		try:
+			started = time.monotonic()
+			body = await compute()
+			delta = time.monotonic() - started
+			envelope = _ENVELOPE.pack(time.time() + ttl, delta) + body
+			await self._client.set(key, envelope, ex=ttl)
+			return body
+		except RedisError as e:
+			logger.warning("Response cache write failed: %s", e)
+			return body
+		finally:
+			try:
+				await self._client.delete(lock_key)
+			except RedisError:
+				pass
+
+	async def invalidate(self, *namespaces: str) -> None:
+		if self._client is None:
+			return
+		try:
+			async with self._client.pipeline(transaction=False) as pipe:
+				for namespace in namespaces:
+					pipe.incr(f"{KEY_PREFIX}:{namespace}:version")
+				await pipe.execute()
+		except RedisError as e:
+			logger.warning("Response cache invalidation failed: %s", e)
+
+
+response_cache = ResponseCache(settings.redis_url, settings.response_cache_ttl, settings.redis_timeout)
@@ -1,9 +1,12 @@
+import logging
 from typing import Callable, Any
 from fastapi.requests import Request
 from fastapi.responses import JSONResponse
 from fastapi import FastAPI, status
 from sqlalchemy.exc import SQLAlchemyError
 
+logger = logging.getLogger(__name__)
+
 
 class TaskException(Exception):
     """This is the base class for all task-related errors."""
@@ -18,11 +21,25 @@ class UserAlreadyExists(TaskException): pass
 class InvalidCredentials(TaskException): pass
 class InsufficientPermission(TaskException): pass
 class TaskNotFound(TaskException): pass
+class TaskVersionConflict(TaskException): pass
+class TaskClaimed(TaskException): pass
+class NoTaskNearby(TaskException): pass
+class IdempotencyKeyMismatch(TaskException): pass
+class InvalidSyncPayload(TaskException): pass
+class InvalidPlannerDate(TaskException): pass
 class UserNotFound(TaskException): pass
 class WorkTypeNotFound(TaskException): pass
 class VoltageNotFound(TaskException): pass
 
 
+class ServiceOverloaded(TaskException):
+    """Raised by admission control; the client should retry after `retry_after` seconds."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 def create_exception_handler(
     status_code: int, initial_detail: Any
 ) -> Callable[[Request, Exception], JSONResponse]:
@@ -41,6 +58,12 @@ def register_all_errors(app: FastAPI):
         UserAlreadyExists: (403, "User already exists", "user_exists"),
         UserNotFound: (404, "User not found", "user_not_found"),
         TaskNotFound: (404, "Task not found", "task_not_found"),
+        TaskVersionConflict: (409, "Task was modified concurrently", "task_version_conflict"),
+        TaskClaimed: (409, "Task is claimed by another worker", "task_claimed"),
+        NoTaskNearby: (404, "No pending task within the search radius", "no_task_nearby"),
+        IdempotencyKeyMismatch: (422, "Idempotency key reused with a different request", "idempotency_key_mismatch"),
+        InvalidSyncPayload: (400, "Sync payload could not be decoded", "invalid_sync_payload"),
+        InvalidPlannerDate: (422, "Planner date could not be parsed", "invalid_planner_date"),
         WorkTypeNotFound: (404, "Work type not found", "work_type_not_found"),
         VoltageNotFound: (404, "Voltage type not found", "voltage_type_not_found"),
         InvalidCredentials: (400, "Invalid username or password", "invalid_credentials"),
@@ -60,12 +83,21 @@ def register_all_errors(app: FastAPI):
             ),
         )
 
+    @app.exception_handler(ServiceOverloaded)
+    async def service_overloaded(request, exc: ServiceOverloaded):
+        return JSONResponse(
+            content={"message": str(exc), "error_code": "service_overloaded"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
     @app.exception_handler(SQLAlchemyError)
     async def database_error(request, exc):
+        # Le texte SQL et ses paramètres restent dans les logs, pas dans la réponse
+        logger.error("Database error on %s %s", request.method, request.url.path, exc_info=exc)
         return JSONResponse(
             content={
                 "message": "Database error occurred",
-                "details": str(exc),
                 "error_code": "database_error",
             },
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,79 @@
+import logging
+from contextlib import AsyncExitStack, asynccontextmanager
+
+from fastapi import FastAPI
+
+from app.config import settings
+from app.db.main import Async_session_maker, engine, warm_up_pool
+from app.db.notify import pg_listener
+from app.db.redis import response_cache
+from app.metrics import mark_worker_dead
+from app.tasks.events import task_event_broker
+from app.tasks.partitions import PartitionMaintainer
+from app.tasks.routes import task_cluster_service
+from app.utils.http_client import http_pool
+from app.utils.idempotency import idempotency_keys
+from app.utils.loop_monitor import LoopMonitor
+from app.voltage.routes import voltage_service
+from app.workType.routes import work_type_service
+
+logger = logging.getLogger(__name__)
+
+
+async def warm_reference_caches() -> None:
+	async with Async_session_maker() as session:
+		await voltage_service.get_all_voltages_cached(session)
+		await work_type_service.get_all_work_type_cached(session)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+	"""Own the shared resources of a worker.
+
+	Resources are opened in dependency order and, through the exit stack, closed in
+	the reverse order: background workers first, the database engine last. Warm-up
+	steps are best effort: a worker that fails them still serves, only colder.
+	"""
+	async with AsyncExitStack() as stack:
+		stack.callback(mark_worker_dead)
+		stack.push_async_callback(engine.dispose)
+		try:
+			await warm_up_pool(settings.db_pool_warm)
+		except Exception:
+			logger.exception("Database pool warm-up failed")
+
+		stack.push_async_callback(response_cache.close)
+		await response_cache.warm_up()
+
+		await http_pool.start()
+		stack.push_async_callback(http_pool.close)
+
+		try:
+			await warm_reference_caches()
+		except Exception:
+			logger.exception("Reference data cache warm-up failed")
+
+		# Invalidation des caches et événements des tâches envoyés par les autres workers
+		await pg_listener.start()
+		stack.push_async_callback(pg_listener.stop)
+
+		task_event_broker.start()
+		stack.push_async_callback(task_event_broker.stop)
+
+		partition_maintainer = PartitionMaintainer(settings.task_partition_months_ahead)
+		partition_maintainer.start()
+		stack.push_async_callback(partition_maintainer.stop)
+
+		idempotency_keys.start()
+		stack.push_async_callback(idempotency_keys.stop)
+
+		# Reconstruction des tuiles de clusters éventuellement lancée par une lecture
+		stack.push_async_callback(task_cluster_service.stop)
+
+		if settings.loop_monitor:
+			threshold = settings.loop_block_threshold_ms / 1000
+			monitor = LoopMonitor(interval=threshold / 2, threshold=threshold)
+			monitor.start()
+			stack.callback(monitor.stop)
+
+		yield
@@ -0,0 +1,149 @@
+import os
+import shutil
+import time
+from pathlib import Path
+
+from prometheus_client import CollectorRegistry, Gauge, Histogram, make_asgi_app, multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# Répertoire partagé par les workers ; sa présence active le mode multiprocess
+MULTIPROC_ENV = "PROMETHEUS_MULTIPROC_DIR"
+UNMATCHED_ROUTE = "unmatched"
+
+HTTP_DURATION = Histogram(
+	"http_request_duration_seconds", "HTTP request latency by route template",
+	["method", "route", "status"],
+)
+HTTP_IN_PROGRESS = Gauge(
+	"http_requests_in_progress", "HTTP requests being served by route template",
+	["method", "route"], multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+	"db_pool_checkout_wait_seconds", "Time spent waiting for a pooled database connection",
+	buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+DB_POOL_CHECKED_OUT = Gauge(
+	"db_pool_checked_out", "Database connections currently checked out of the pool",
+	multiprocess_mode="livesum",
+)
+DB_POOL_OPEN = Gauge(
+	"db_pool_connections", "Database connections opened by the pool",
+	multiprocess_mode="livesum",
+)
+DB_QUERY_DURATION = Histogram(
+	"db_query_duration_seconds", "Database statement execution time by statement kind",
+	["operation"],
+	buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+
+def prepare_multiprocess_dir(path: str) -> None:
+	"""Reset the shared metrics directory; called by the supervisor before spawning workers."""
+	shutil.rmtree(path, ignore_errors=True)
+	Path(path).mkdir(parents=True)
+	os.environ[MULTIPROC_ENV] = path
+
+
+def mark_worker_dead() -> None:
+	if os.environ.get(MULTIPROC_ENV):
+		multiprocess.mark_process_dead(os.getpid())
+
+
+def metrics_app() -> ASGIApp:
+	"""ASGI app serving /metrics, aggregated over every worker in multiprocess mode."""
+	if not os.environ.get(MULTIPROC_ENV):
+		return make_asgi_app()
+	registry = CollectorRegistry()
+	multiprocess.MultiProcessCollector(registry)
+	return make_asgi_app(registry=registry)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+	"""Queue pool that records how long callers wait for a connection."""
+
+	def _do_get(self):
+		started = time.perf_counter()
+		try:
+			return super()._do_get()
+		finally:
+			DB_POOL_WAIT.observe(time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine) -> None:
+	"""Track pool usage and per-statement timings of a (sync) engine."""
+
+	@event.listens_for(engine.pool, "connect")
+	def on_connect(dbapi_connection, record):
+		DB_POOL_OPEN.inc()
+
+	@event.listens_for(engine.pool, "close")
+	def on_close(dbapi_connection, record):
+		DB_POOL_OPEN.dec()
+
+	@event.listens_for(engine.pool, "checkout")
+	def on_checkout(dbapi_connection, record, proxy):
+		DB_POOL_CHECKED_OUT.inc()
+
+	@event.listens_for(engine.pool, "checkin")
+	def on_checkin(dbapi_connection, record):
+		DB_POOL_CHECKED_OUT.dec()
+
+	@event.listens_for(engine, "before_cursor_execute")
+	def before_execute(conn, cursor, statement, parameters, context, executemany):
+		conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+	@event.listens_for(engine, "after_cursor_execute")
+	def after_execute(conn, cursor, statement, parameters, context, executemany):
+		elapsed = time.perf_counter() - conn.info["query_started"].pop()
+		# Le premier mot-clé seulement : la cardinalité des labels reste bornée
+		operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+		DB_QUERY_DURATION.labels(operation).observe(elapsed)
+
+	@event.listens_for(engine, "handle_error")
+	def on_error(context):
+		started = context.connection.info.get("query_started") if context.connection is not None else None
+		if started:
+			started.pop()
+
+
+class MetricsMiddleware:
+	"""Per-route latency histogram and in-flight gauge, labelled by route template."""
+
+	def __init__(self, app: ASGIApp):
+		self.app = app
+
+	def _route(self, scope: Scope) -> str:
+		# Le routage n'a pas encore eu lieu : on cherche la route comme le ferait le routeur
+		for route in scope["app"].router.routes:
+			match, _ = route.matches(scope)
+			if match == Match.FULL:
+				return getattr(route, "path", UNMATCHED_ROUTE)
+		return UNMATCHED_ROUTE
+
+	async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+		if scope["type"] != "http":
+			await self.app(scope, receive, send)
+			return
+
+		method = scope["method"]
+		route = self._route(scope)
+		status_code = 500
+
+		async def send_wrapper(message):
+			nonlocal status_code
+			if message["type"] == "http.response.start":
+				status_code = message["status"]
+			await send(message)
+
+		in_progress = HTTP_IN_PROGRESS.labels(method, route)
+		in_progress.inc()
+		started = time.perf_counter()
+		try:
+			await self.app(scope, receive, send_wrapper)
+		finally:
+			HTTP_DURATION.labels(method, route, str(status_code)).observe(time.perf_counter() - started)
+			in_progress.dec()
@@ -0,0 +1,140 @@
+import hashlib
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Listes de paramètres ($1, $2, ...) et littéraux repliés : une empreinte par forme de requête
+_PARAM_LIST = re.compile(r"\$\d+(?:\s*,\s*\$\d+)*")
+_NUMBER = re.compile(r"\b\d+\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_SPACES = re.compile(r"\s+")
+
+current_profile: ContextVar[Optional["QueryProfile"]] = ContextVar("current_profile", default=None)
+
+
+def fingerprint(statement: str) -> str:
+	normalized = _SPACES.sub(" ", statement).strip()
+	normalized = _PARAM_LIST.sub("?", _STRING.sub("?", normalized))
+	return _NUMBER.sub("N", normalized)
+
+
+def fingerprint_id(normalized: str) -> str:
+	return hashlib.sha1(normalized.encode()).hexdigest()[:10]
+
+
+@dataclass
+class QueryProfile:
+	"""Statements executed while serving one request."""
+	count: int = 0
+	db_time: float = 0.0
+	statements: Counter = field(default_factory=Counter)
+	durations: Dict[str, float] = field(default_factory=dict)
+
+	def record(self, statement: str, elapsed: float) -> None:
+		key = fingerprint(statement)
+		self.count += 1
+		self.db_time += elapsed
+		self.statements[key] += 1
+		self.durations[key] = self.durations.get(key, 0.0) + elapsed
+
+	def repeated(self, threshold: int) -> List[str]:
+		"""Statements run at least `threshold` times: likely a query issued inside a loop (N+1)."""
+		return [key for key, count in self.statements.items() if count >= threshold]
+
+
+def instrument_profiler(engine: Engine) -> None:
+	"""Attribute every statement of `engine` to the request being profiled, if any."""
+
+	@event.listens_for(engine, "before_cursor_execute")
+	def before_execute(conn, cursor, statement, parameters, context, executemany):
+		if current_profile.get() is not None:
+			conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+	@event.listens_for(engine, "after_cursor_execute")
+	def after_execute(conn, cursor, statement, parameters, context, executemany):
+		profile = current_profile.get()
+		if profile is not None and conn.info.get("profile_started"):
+			profile.record(statement, time.perf_counter() - conn.info["profile_started"].pop())
+
+	@event.listens_for(engine, "handle_error")
+	def on_error(context):
+		started = context.connection.info.get("profile_started") if context.connection is not None else None
+		if started:
+			started.pop()
+
+
+class SQLProfilingMiddleware:
+	"""Opt-in per-request SQL profile.
+
+	In debug mode the query count, DB time and suspected N+1 fingerprints are returned as
+	X-DB-* response headers. Requests slower than `slow_request_ms`, or with a statement
+	repeated `n_plus_one_threshold` times, are logged with their statement fingerprints.
+	"""
+
+	def __init__(self, app: ASGIApp, headers: bool, slow_request_ms: int, n_plus_one_threshold: int):
+		self.app = app
+		self.headers = headers
+		self.slow_request = slow_request_ms / 1000
+		self.n_plus_one_threshold = n_plus_one_threshold
+
+	async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+		if scope["type"] != "http":
+			await self.app(scope, receive, send)
+			return
+
+		profile = QueryProfile()
+		token = current_profile.set(profile)
+		started = time.perf_counter()
+		event_stream = False
+
+		async def send_wrapper(message):
+			nonlocal event_stream
+			if message["type"] == "http.response.start":
+				event_stream = any(
+					name == b"content-type" and value.startswith(b"text/event-stream")
+					for name, value in message.get("headers", [])
+				)
+			if message["type"] == "http.response.start" and self.headers:
+				repeated = profile.repeated(self.n_plus_one_threshold)
+				headers = list(message.get("headers", []))
+				headers += [
+					(b"x-db-query-count", str(profile.count).encode()),
+					(b"x-db-time-ms", f"{profile.db_time * 1000:.1f}".encode()),
+				]
+				if repeated:
+					headers.append((b"x-db-n-plus-one", ",".join(fingerprint_id(key) for key in repeated).encode()))
+				message = {**message, "headers": headers}
+			await send(message)
+
+		try:
+			await self.app(scope, receive, send_wrapper)
+		finally:
+			current_profile.reset(token)
+			# Un flux SSE dure par construction : pas de journal de requête lente
+			if not event_stream:
+				self._report(scope, profile, time.perf_counter() - started)
+
+	def _report(self, scope: Scope, profile: QueryProfile, elapsed: float) -> None:
+		repeated = profile.repeated(self.n_plus_one_threshold)
+		if elapsed < self.slow_request and not repeated:
+			return
+		top = sorted(profile.statements, key=lambda key: -profile.durations[key])[:5]
+		logger.warning(
+			"%s %s took %.0f ms: %d queries, %.0f ms in database%s\n%s",
+			scope["method"], scope["path"], elapsed * 1000, profile.count, profile.db_time * 1000,
+			f", suspected N+1: {', '.join(fingerprint_id(key) for key in repeated)}" if repeated else "",
+			"\n".join(
+				f"  [{fingerprint_id(key)}] x{profile.statements[key]} {profile.durations[key] * 1000:.1f} ms  {key[:300]}"
+				for key in dict.fromkeys(repeated + top)
+			),
+		)
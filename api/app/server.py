@@ -0,0 +1,60 @@
+import math
+import os
+from typing import Optional
+
+import uvicorn
+
+from app.config import settings
+from app.metrics import prepare_multiprocess_dir
+
+# Quota CPU du cgroup v2 (limite `cpus:` de docker compose), absent hors conteneur
+CGROUP_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+
+
+def available_cpus() -> int:
+	"""CPUs this process may actually use: affinity mask, capped by the cgroup quota."""
+	try:
+		cpus = len(os.sched_getaffinity(0))
+	except AttributeError:
+		cpus = os.cpu_count() or 1
+	try:
+		with open(CGROUP_CPU_MAX) as f:
+			quota, period = f.read().split()
+		if quota != "max":
+			cpus = min(cpus, math.ceil(int(quota) / int(period)))
+	except (OSError, ValueError):
+		pass
+	return max(1, cpus)
+
+
+def worker_count(requested: Optional[int] = None) -> int:
+	# Un worker par cœur : le travail CPU (bcrypt, openpyxl, Pillow, sérialisation)
+	# bloque la boucle d'événements, les E/S restent concurrentes dans chaque worker
+	return max(1, requested or settings.web_concurrency or available_cpus())
+
+
+def serve(host: str, port: int, workers: Optional[int] = None) -> None:
+	"""Run the production server: one supervisor and N uvloop/httptools workers.
+
+	Each worker imports `main:app` and runs its own lifespan (cache warm-up, LISTEN
+	connection, event broker). Sending SIGHUP to the supervisor restarts the workers
+	one after the other; SIGTTIN / SIGTTOU add or remove a worker.
+	"""
+	workers = worker_count(workers)
+	if workers > 1:
+		# Les workers (lancés par spawn) héritent de la variable et écrivent leurs métriques sur disque
+		prepare_multiprocess_dir(settings.metrics_dir)
+	uvicorn.run(
+		"main:app",
+		host=host,
+		port=port,
+		workers=workers,
+		loop="uvloop",
+		http="httptools",
+		lifespan="on",
+		proxy_headers=True,
+		forwarded_allow_ips=settings.forwarded_allow_ips,
+		timeout_graceful_shutdown=settings.graceful_timeout,
+		# nginx journalise déjà chaque requête
+		access_log=False,
+	)
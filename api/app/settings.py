@@ -16,11 +16,43 @@ class Settings(BaseSettings):
 	app_debug: str
 	secret_key: str
 	algorithm: str
+	task_archive_after_months: int = 12
+	task_partition_months_ahead: int = 3
+	redis_url: str | None = None
+	response_cache_ttl: int = 30
+	# Un Redis injoignable sans refus de connexion ne doit pas bloquer les requêtes
+	redis_timeout: float = 0.3
+	db_pool_size: int = 10
+	db_max_overflow: int = 10
+	db_pool_warm: int = 2
+	http_timeout: float = 10.0
+	http_max_connections: int = 20
+	bcrypt_threads: int = 2
+	web_concurrency: int | None = None
+	metrics_dir: str = "/tmp/tec-bloc-metrics"
+	sql_profiling: bool = False
+	slow_request_ms: int = 500
+	n_plus_one_threshold: int = 5
+	idempotency_ttl_hours: int = 24
+	claim_lease_minutes: int = 240
+	geocode_min_similarity: float = 0.45
+	admission_capacity: int = 32
+	admission_reserved: int = 8
+	export_concurrency: int = 2
+	import_concurrency: int = 2
+	loop_monitor: bool = True
+	loop_block_threshold_ms: int = 100
+	graceful_timeout: int = 30
+	# Seul le proxy peut fixer X-Forwarded-For : c'est aussi la clé d'admission des appels anonymes
+	forwarded_allow_ips: str = "127.0.0.1"
 	model_config = SettingsConfigDict(env_file=".env", extra='ignore')
 
 	def active_database_url(self):
 		return self.db_url if self.env == 'docker' else self.database_url
 
+	def is_debug(self) -> bool:
+		return self.app_debug.lower() in ("1", "true", "yes")
+
 Config = Settings()
 
 
@@ -0,0 +1,146 @@
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy import column, func, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.main import Async_session_maker
+from app.db.models import Task
+from app.db.redis import response_cache
+from app.tasks.batch import geotag_photo_sets
+from app.tasks.events import suppress_task_events
+from app.tasks.purge import live_tasks
+from app.utils.coordinates import Coordinates
+from app.utils.http_client import http_pool
+from app.utils.photo_metadata import PhotoFetchError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT = Path(".geotag-backfill.json")
+
+
+@dataclass
+class BackfillProgress:
+	last_id: int = 0
+	scanned: int = 0
+	geotagged: int = 0
+	# Tâches dont une photo n'a pas pu être téléchargée, reprises au passage suivant
+	failed_ids: List[int] = field(default_factory=list)
+
+
+class GeotagBackfill:
+	"""Fill the coordinates of tasks that have photos but none, from the photos' EXIF.
+
+	Tasks are read in id order, `batch_size` at a time; their photos are resolved with at
+	most `concurrency` downloads in flight and the batch is written with one UPDATE, without
+	publishing task events. The last processed id is saved to `checkpoint` after each commit,
+	so an interrupted run resumes where it stopped. Tasks whose photos could not be downloaded
+	are kept in the checkpoint and retried once the scan is done, on this run and the next
+	ones. Only rows still without coordinates are written.
+	"""
+
+	def __init__(self, checkpoint: Path, batch_size: int, concurrency: int):
+		self.checkpoint = checkpoint
+		self.batch_size = batch_size
+		self.concurrency = concurrency
+
+	def load_checkpoint(self) -> BackfillProgress:
+		if not self.checkpoint.exists():
+			return BackfillProgress()
+		return BackfillProgress(**json.loads(self.checkpoint.read_text()))
+
+	def save_checkpoint(self, progress: BackfillProgress) -> None:
+		# Écriture atomique : un arrêt brutal laisse l'ancien point de reprise intact
+		temporary = self.checkpoint.with_suffix(".tmp")
+		temporary.write_text(json.dumps(asdict(progress)))
+		os.replace(temporary, self.checkpoint)
+
+	def pending_tasks(self):
+		return select(Task.id, Task.photos).where(
+			Task.latitude.is_(None), func.cardinality(Task.photos) > 0, live_tasks()
+		)
+
+	async def run(
+			self, restart: bool = False,
+			report: Optional[Callable[[BackfillProgress, float], None]] = None
+	) -> BackfillProgress:
+		progress = BackfillProgress() if restart else self.load_checkpoint()
+		resumed_at = progress.scanned
+		started = time.monotonic()
+		try:
+			async with Async_session_maker() as session:
+				while True:
+					rows = (await session.execute(
+						self.pending_tasks()
+						.where(Task.id > progress.last_id)
+						.order_by(Task.id)
+						.limit(self.batch_size)
+					)).all()
+					# Pas de transaction ouverte pendant les téléchargements
+					await session.commit()
+					if not rows:
+						break
+
+					failed = await self._geotag(rows, progress, session)
+					progress.failed_ids.extend(failed)
+					progress.last_id = rows[-1].id
+					progress.scanned += len(rows)
+					self.save_checkpoint(progress)
+					rate = (progress.scanned - resumed_at) / max(time.monotonic() - started, 1e-9)
+					logger.info("Geotag backfill: up to id %s, %s/%s geotagged, %s failed, %.1f tasks/s",
+								progress.last_id, progress.geotagged, progress.scanned, len(progress.failed_ids), rate)
+					if report:
+						report(progress, rate)
+
+				await self._retry_failed(progress, session)
+		finally:
+			await http_pool.close()
+		if progress.geotagged:
+			await response_cache.invalidate("tasks")
+		return progress
+
+	async def _retry_failed(self, progress: BackfillProgress, session: AsyncSession) -> None:
+		"""Resolve the tasks of earlier failed downloads again; those failing again stay recorded."""
+		retry = list(progress.failed_ids)
+		for offset in range(0, len(retry), self.batch_size):
+			chunk = retry[offset:offset + self.batch_size]
+			rows = (await session.execute(
+				self.pending_tasks().where(Task.id.in_(chunk)).order_by(Task.id)
+			)).all()
+			await session.commit()
+			# Une tâche géolocalisée ou effacée entre-temps sort aussi de la liste
+			done = set(chunk) - set(await self._geotag(rows, progress, session))
+			progress.failed_ids = [task_id for task_id in progress.failed_ids if task_id not in done]
+			self.save_checkpoint(progress)
+		if retry:
+			logger.info("Geotag backfill: retried %s failed tasks, %s still failing",
+						len(retry), len(progress.failed_ids))
+
+	async def _geotag(self, rows, progress: BackfillProgress, session: AsyncSession) -> List[int]:
+		"""Write the coordinates found for `rows`; returns the ids whose photos could not be downloaded."""
+		coordinates = await geotag_photo_sets([row.photos for row in rows], self.concurrency, strict=True)
+		found = [
+			(row.id, coordinate.latitude, coordinate.longitude)
+			for row, coordinate in zip(rows, coordinates) if isinstance(coordinate, Coordinates)
+		]
+		if found:
+			await suppress_task_events(session)
+			data = values(
+				column("id", pg.INTEGER), column("latitude", pg.FLOAT), column("longitude", pg.FLOAT),
+				name="v"
+			).data(found)
+			result = await session.execute(
+				update(Task)
+				.where(Task.id == data.c.id, Task.latitude.is_(None))
+				.values(latitude=data.c.latitude, longitude=data.c.longitude)
+				.execution_options(synchronize_session=False)
+			)
+			progress.geotagged += result.rowcount
+		await session.commit()
+		return [row.id for row, coordinate in zip(rows, coordinates) if isinstance(coordinate, PhotoFetchError)]
@@ -0,0 +1,346 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence
+
+import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy import column, func, insert, or_, select, text, update, values
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Task, User
+from app.db.redis import response_cache
+from app.tasks.claims import claim_available
+from app.tasks.purge import live_tasks
+from app.tasks.schemas import (
+	BatchCompleteOperation, BatchCreateOperation, BatchDeleteOperation, BatchUpdateOperation,
+	TaskAdminUpdate, TaskBatchOperation, TaskBatchResult, TaskSyncItem, TaskSyncResult
+)
+from app.utils.coordinates import Coordinates
+from app.utils.idempotency import IDEMPOTENCY_LOCK_TIMEOUT, idempotency_keys, request_fingerprint
+from app.utils.photo_metadata import PhotoFetchError, photo_metadata
+from app.utils.status import UserRole
+
+GEOTAG_CONCURRENCY = 8
+# Une complétion hors ligne ne peut pas être antidatée au-delà (partitions mensuelles)
+SYNC_MAX_BACKDATE = timedelta(days=30)
+ADMIN_FIELDS = list(TaskAdminUpdate.model_fields)
+
+
+async def geotag_photo_sets(
+		photo_sets: Sequence[Optional[List[str]]], concurrency: int = GEOTAG_CONCURRENCY, strict: bool = False
+) -> List[Optional[Coordinates] | PhotoFetchError]:
+	"""Resolve the coordinates of several photo lists, at most `concurrency` at a time.
+
+	With `strict`, a list whose photos could not be downloaded gives its PhotoFetchError
+	instead of None, so that callers can retry it later.
+	"""
+	semaphore = asyncio.Semaphore(concurrency)
+
+	async def resolve(photos):
+		if not photos:
+			return None
+		async with semaphore:
+			try:
+				return await photo_metadata.get_coordinate_from_urls(photos, strict)
+			except PhotoFetchError as error:
+				return error
+
+	return await asyncio.gather(*(resolve(photos) for photos in photo_sets))
+
+class TaskBatchService:
+	"""Apply a list of task operations in one transaction, one set-based statement per kind.
+
+	Operations are grouped and applied in the order create, complete, update, delete.
+	An operation that cannot be applied is reported as failed without aborting the others:
+	a phase whose set-based statement fails is applied again one operation at a time.
+	"""
+
+	async def apply(
+			self, operations: List[TaskBatchOperation], worker: User, session: AsyncSession
+	) -> List[TaskBatchResult]:
+		results: List[Optional[TaskBatchResult]] = [None] * len(operations)
+		groups = {BatchCreateOperation: [], BatchCompleteOperation: [], BatchUpdateOperation: [], BatchDeleteOperation: []}
+		seen = set()
+
+		for index, operation in enumerate(operations):
+			task_id = getattr(operation, "task_id", None)
+			if operation.op in ("update", "delete") and worker.role != UserRole.ADMIN:
+				results[index] = self._failed(index, operation, "insufficient_permissions")
+			elif isinstance(operation, BatchCreateOperation) and len(operation.task.photos or []) == 1:
+				results[index] = self._failed(index, operation, "invalid_photos")
+			elif task_id is not None and (operation.op, task_id) in seen:
+				results[index] = self._failed(index, operation, "duplicate_task_id")
+			else:
+				seen.add((operation.op, task_id))
+				groups[type(operation)].append(index)
+
+		# Géolocalisation de toutes les photos en parallèle, avant la première écriture :
+		# aucun verrou de ligne n'est tenu pendant les téléchargements
+		geotagged = groups[BatchCreateOperation] + groups[BatchCompleteOperation]
+		photo_sets = [
+			operations[i].task.photos if operations[i].op == "create" else operations[i].photos
+			for i in geotagged
+		]
+		coordinates = dict(zip(geotagged, await geotag_photo_sets(photo_sets)))
+
+		phases = (
+			(groups[BatchCreateOperation], self._create),
+			(groups[BatchCompleteOperation], self._complete),
+			(groups[BatchUpdateOperation], self._update),
+			(groups[BatchDeleteOperation], self._delete),
+		)
+		for indexes, apply_phase in phases:
+			if not indexes:
+				continue
+			try:
+				# Un point de sauvegarde par phase : un échec n'annule pas les autres phases
+				async with session.begin_nested():
+					applied = await apply_phase([operations[i] for i in indexes], indexes, coordinates, worker, session)
+			except SQLAlchemyError:
+				# Une ligne fautive fait échouer toute l'instruction : reprise opération par opération
+				applied = await self._apply_one_by_one(apply_phase, operations, indexes, coordinates, worker, session)
+			for index in indexes:
+				results[index] = applied.get(index) or self._failed(index, operations[index], "database_error")
+
+		await session.commit()
+		await response_cache.invalidate("tasks")
+		return results
+
+	@staticmethod
+	async def _apply_one_by_one(apply_phase, operations, indexes, coordinates, worker, session):
+		"""Apply the operations of a failed phase each under its own savepoint."""
+		applied = {}
+		for index in indexes:
+			try:
+				async with session.begin_nested():
+					applied.update(await apply_phase([operations[index]], [index], coordinates, worker, session))
+			except SQLAlchemyError:
+				pass
+		return applied
+
+	async def sync(self, items: List[TaskSyncItem], worker: User, session: AsyncSession) -> List[TaskSyncResult]:
+		"""Apply completions recorded offline, each at most once per idempotency key.
+
+		Items already synced by an earlier attempt are replayed without geotagging them again;
+		the others are claimed, completed and remembered in a single transaction.
+		"""
+		results: List[Optional[TaskSyncResult]] = [None] * len(items)
+		hashes = [request_fingerprint("SYNC", f"/api/task/{item.task_id}", item) for item in items]
+		stored = await idempotency_keys.stored_many(session, worker.uid, {item.key for item in items})
+
+		pending, seen_keys, seen_tasks = [], set(), set()
+		for index, item in enumerate(items):
+			if item.key in seen_keys:
+				results[index] = self._sync_failed(item, "duplicate_key")
+			elif item.key in stored:
+				results[index] = self._replayed(item, hashes[index], stored[item.key])
+			elif item.task_id in seen_tasks:
+				results[index] = self._sync_failed(item, "duplicate_task_id")
+			else:
+				seen_tasks.add(item.task_id)
+				pending.append(index)
+			seen_keys.add(item.key)
+
+		if pending:
+			coordinates = dict(zip(pending, await geotag_photo_sets([items[i].photos for i in pending])))
+			now = datetime.now()
+			for index in pending:
+				# L'heure du téléphone n'est pas fiable : bornée entre now - 30 jours et now
+				items[index].completed_at = min(max(items[index].completed_at, now - SYNC_MAX_BACKDATE), now)
+			try:
+				await self._sync_pending(items, hashes, pending, coordinates, results, worker, session)
+			except SQLAlchemyError:
+				await session.rollback()
+				for index in pending:
+					results[index] = self._sync_failed(items[index], "database_error")
+		return results
+
+	async def _sync_pending(self, items, hashes, pending, coordinates, results, worker, session):
+		await session.execute(text(f"SET LOCAL lock_timeout = '{IDEMPOTENCY_LOCK_TIMEOUT}'"))
+		claimed = await idempotency_keys.claim_many(
+			session, worker.uid, {items[i].key: hashes[i] for i in pending}
+		)
+		lost = [i for i in pending if items[i].key not in claimed]
+		if lost:
+			# Un envoi concurrent du même lot a traité ces éléments pendant l'attente du verrou
+			stored = await idempotency_keys.stored_many(session, worker.uid, [items[i].key for i in lost])
+			for index in lost:
+				key = items[index].key
+				results[index] = (
+					self._replayed(items[index], hashes[index], stored[key]) if key in stored
+					else self._sync_failed(items[index], "sync_in_progress")
+				)
+
+		indexes = [i for i in pending if items[i].key in claimed]
+		if not indexes:
+			return
+		applied = await self._complete([items[i] for i in indexes], indexes, coordinates, worker, session)
+		for index in indexes:
+			result = applied[index]
+			results[index] = TaskSyncResult(
+				key=items[index].key, ok=result.ok, task_id=result.task_id,
+				version=result.version, error_code=result.error_code
+			)
+		await idempotency_keys.store_many(
+			session, worker.uid,
+			{items[i].key: results[i].model_dump_json(exclude_none=True).encode() for i in indexes},
+			status_code=200
+		)
+		await session.commit()
+		await response_cache.invalidate("tasks")
+
+	@staticmethod
+	def _sync_failed(item: TaskSyncItem, error_code: str) -> TaskSyncResult:
+		return TaskSyncResult(key=item.key, ok=False, task_id=item.task_id, error_code=error_code)
+
+	@classmethod
+	def _replayed(cls, item: TaskSyncItem, request_hash: str, stored) -> TaskSyncResult:
+		stored_hash, response = stored
+		if stored_hash != request_hash:
+			return cls._sync_failed(item, "idempotency_key_mismatch")
+		result = TaskSyncResult.model_validate_json(response)
+		result.replayed = True
+		return result
+
+	@staticmethod
+	def _failed(index: int, operation, error_code: str) -> TaskBatchResult:
+		return TaskBatchResult(
+			index=index, op=operation.op, ok=False,
+			task_id=getattr(operation, "task_id", None), error_code=error_code
+		)
+
+	async def _create(self, operations, indexes, coordinates, worker, session):
+		now = datetime.now()
+		rows = []
+		for operation, index in zip(operations, indexes):
+			row = operation.task.model_dump()
+			found = coordinates.get(index)
+			row.update(
+				worker_id=worker.uid, completed_at=now, is_completed=True,
+				latitude=found.latitude if found else None,
+				longitude=found.longitude if found else None
+			)
+			rows.append(row)
+
+		# INSERT multi-lignes ; l'ordre du RETURNING suit celui des paramètres
+		stmt = insert(Task).returning(Task.id, Task.version, sort_by_parameter_order=True)
+		result = await session.execute(stmt, rows)
+		return {
+			index: TaskBatchResult(index=index, op="create", ok=True, task_id=task_id, version=version)
+			for index, (task_id, version) in zip(indexes, result.all())
+		}
+
+	async def _complete(self, operations, indexes, coordinates, worker, session):
+		now = datetime.now()
+		data = values(
+			column("id", pg.INTEGER),
+			column("expected_version", pg.INTEGER),
+			column("photos", pg.ARRAY(pg.VARCHAR)),
+			column("comments", pg.TEXT),
+			column("latitude", pg.FLOAT),
+			column("longitude", pg.FLOAT),
+			column("completed_at", pg.TIMESTAMP),
+			name="v"
+		).data([
+			(
+				operation.task_id, operation.version, operation.photos, operation.comments,
+				coordinates[index].latitude if coordinates.get(index) else None,
+				coordinates[index].longitude if coordinates.get(index) else None,
+				getattr(operation, "completed_at", None),
+			)
+			for operation, index in zip(operations, indexes)
+		])
+		stmt = (
+			update(Task)
+			.where(
+				Task.id == data.c.id,
+				or_(data.c.expected_version.is_(None), Task.version == data.c.expected_version),
+				live_tasks(),
+				claim_available(worker.uid, now)
+			)
+			.values(
+				photos=func.coalesce(data.c.photos, Task.photos),
+				comments=func.coalesce(data.c.comments, Task.comments),
+				latitude=func.coalesce(data.c.latitude, Task.latitude),
+				longitude=func.coalesce(data.c.longitude, Task.longitude),
+				worker_id=worker.uid,
+				completed_at=func.coalesce(data.c.completed_at, now),
+				is_completed=True,
+				version=Task.version + 1
+			)
+			.returning(Task.id, Task.version)
+			.execution_options(synchronize_session=False)
+		)
+		return await self._by_task_id(operations, indexes, stmt, session, worker)
+
+	async def _update(self, operations, indexes, coordinates, worker, session):
+		data = values(
+			column("id", pg.INTEGER),
+			column("expected_version", pg.INTEGER),
+			*(column(name, Task.__table__.c[name].type) for name in ADMIN_FIELDS),
+			name="v"
+		).data([
+			(
+				operation.task_id, operation.version,
+				*(getattr(operation.changes, name) for name in ADMIN_FIELDS),
+			)
+			for operation in operations
+		])
+		stmt = (
+			update(Task)
+			.where(
+				Task.id == data.c.id,
+				or_(data.c.expected_version.is_(None), Task.version == data.c.expected_version),
+				live_tasks()
+			)
+			.values(
+				**{name: func.coalesce(data.c[name], getattr(Task, name)) for name in ADMIN_FIELDS},
+				version=Task.version + 1
+			)
+			.returning(Task.id, Task.version)
+			.execution_options(synchronize_session=False)
+		)
+		return await self._by_task_id(operations, indexes, stmt, session)
+
+	async def _delete(self, operations, indexes, coordinates, worker, session):
+		stmt = (
+			update(Task)
+			.where(Task.id.in_([operation.task_id for operation in operations]), live_tasks())
+			.values(deleted_at=datetime.now())
+			.returning(Task.id, Task.version)
+			.execution_options(synchronize_session=False)
+		)
+		return await self._by_task_id(operations, indexes, stmt, session)
+
+	async def _by_task_id(self, operations, indexes, stmt, session, claimant: Optional[User] = None):
+		"""Per-operation results of `stmt`; with `claimant`, tasks claimed by others are reported as such."""
+		applied = {task_id: version for task_id, version in (await session.execute(stmt)).all()}
+
+		missing = [operation.task_id for operation in operations if operation.task_id not in applied]
+		existing, claimed = set(), set()
+		if missing:
+			result = await session.execute(
+				select(Task.id, Task.claimed_by, Task.claim_expires_at).where(Task.id.in_(missing), live_tasks())
+			)
+			now = datetime.now()
+			for task_id, claimed_by, claim_expires_at in result:
+				existing.add(task_id)
+				if claimant is not None and claimed_by not in (None, claimant.uid) and claim_expires_at >= now:
+					claimed.add(task_id)
+
+		results = {}
+		for operation, index in zip(operations, indexes):
+			if operation.task_id in applied:
+				results[index] = TaskBatchResult(
+					index=index, op=operation.op, ok=True,
+					task_id=operation.task_id, version=applied[operation.task_id]
+				)
+			else:
+				if operation.task_id in claimed:
+					error_code = "task_claimed"
+				elif operation.task_id in existing:
+					error_code = "task_version_conflict"
+				else:
+					error_code = "task_not_found"
+				results[index] = self._failed(index, operation, error_code)
+		return results
@@ -0,0 +1,93 @@
+import math
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.models import Task, User
+from app.db.redis import response_cache
+from app.errors import NoTaskNearby
+from app.tasks.purge import live_tasks
+from app.tasks.schemas import TaskRead
+from app.tasks.spatial import approx_distance, in_boxes
+from app.utils.geo import EARTH_RADIUS_M, boxes_around
+
+# Rayons de recherche successifs (mètres) ; au-delà du dernier, rien n'est réservé
+CLAIM_SEARCH_RADII_M = (2_000, 10_000, 50_000, 250_000)
+CLAIM_MAX_TASKS = 20
+
+
+def claim_available(worker_uid: uuid.UUID, now: datetime):
+	"""Tasks `worker_uid` may complete: unclaimed, with an expired lease, or claimed by them."""
+	return or_(Task.claim_expires_at.is_(None), Task.claim_expires_at < now, Task.claimed_by == worker_uid)
+
+
+class TaskClaimService:
+	"""Lease pending tasks to workers, nearest first.
+
+	Candidates are read through the `cell` index one search radius at a time, up to the last
+	of `CLAIM_SEARCH_RADII_M`, and locked with FOR UPDATE SKIP LOCKED, so concurrent workers
+	never claim the same task and never wait for each other. A claim lasts
+	`claim_lease_minutes`; an expired claim is free again.
+	"""
+
+	async def claim_nearest(
+			self, latitude: float, longitude: float, count: int, worker: User, session: AsyncSession
+	) -> List[TaskRead]:
+		now = datetime.now()
+		# Distance équirectangulaire en degrés² : suffisante pour ordonner des points proches
+		distance = approx_distance(latitude, longitude)
+
+		claimed: List[int] = []
+		for radius in CLAIM_SEARCH_RADII_M:
+			stmt = (
+				select(Task.id)
+				.where(
+					Task.completed_at.is_(None), live_tasks(),
+					Task.latitude.is_not(None), Task.longitude.is_not(None),
+					or_(Task.claim_expires_at.is_(None), Task.claim_expires_at < now),
+				)
+				.order_by(distance)
+				.limit(count - len(claimed))
+				.with_for_update(skip_locked=True)
+			)
+			if claimed:
+				stmt = stmt.where(Task.id.not_in(claimed))
+			stmt = stmt.where(
+				in_boxes(boxes_around(latitude, longitude, radius)),
+				distance <= math.degrees(radius / EARTH_RADIUS_M) ** 2,
+			)
+			claimed += (await session.execute(stmt)).scalars().all()
+			if len(claimed) >= count:
+				break
+
+		if not claimed:
+			await session.rollback()
+			raise NoTaskNearby(f"No pending task within {CLAIM_SEARCH_RADII_M[-1] // 1000} km")
+
+		stmt = (
+			update(Task)
+			.where(Task.id.in_(claimed), Task.completed_at.is_(None))
+			.values(claimed_by=worker.uid, claim_expires_at=now + timedelta(minutes=settings.claim_lease_minutes))
+			.returning(*Task.__table__.c)
+			.execution_options(synchronize_session=False)
+		)
+		rows = {row["id"]: row for row in (await session.execute(stmt)).mappings()}
+		await session.commit()
+		await response_cache.invalidate("tasks")
+		# Ordre de proximité conservé
+		return [TaskRead.model_validate({**rows[task_id]}, from_attributes=True) for task_id in claimed]
+
+	async def get_claimed(self, worker: User, session: AsyncSession) -> List[Task]:
+		stmt = (
+			select(Task)
+			.where(
+				Task.claimed_by == worker.uid, Task.claim_expires_at >= datetime.now(),
+				Task.completed_at.is_(None), live_tasks()
+			)
+			.order_by(Task.claim_expires_at)
+		)
+		return (await session.execute(stmt)).scalars().all()
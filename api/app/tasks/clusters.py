@@ -0,0 +1,168 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.main import engine
+from app.db.models import Task, TaskClusterState, TaskClusterTile
+from app.tasks.purge import cleared_watermark, live_tasks
+from app.tasks.schemas import TaskCluster
+from app.tasks.spatial import by_status, in_boxes
+from app.utils.geo import CELL_BITS, cell_ranges, split_antimeridian
+
+logger = logging.getLogger(__name__)
+
+# Niveaux de grille servis par les tuiles précalculées (niveau 10 : ~0,35° de longitude)
+TILE_MAX_LEVEL = 10
+CLUSTER_LOCK_KEY = 0x636c7573  # un seul repli des deltas à la fois
+
+FOLD_DELTAS = text("""
+	WITH moved AS (
+		DELETE FROM task_cluster_deltas
+		RETURNING task_id, cell, completed, work_type, count, lat_sum, lon_sum
+	)
+	INSERT INTO task_cluster_tiles (level, key, completed, work_type, count, lat_sum, lon_sum)
+	SELECT level, cell >> (2 * (:cell_bits - level)), completed, work_type, sum(count), sum(lat_sum), sum(lon_sum)
+	FROM moved, generate_series(0, :max_level) AS level
+	WHERE task_id > :watermark
+	GROUP BY 1, 2, 3, 4
+	ON CONFLICT (level, key, completed, work_type) DO UPDATE SET
+		count = task_cluster_tiles.count + excluded.count,
+		lat_sum = task_cluster_tiles.lat_sum + excluded.lat_sum,
+		lon_sum = task_cluster_tiles.lon_sum + excluded.lon_sum
+""")
+
+BUILD_TILES = text("""
+	INSERT INTO task_cluster_tiles (level, key, completed, work_type, count, lat_sum, lon_sum)
+	SELECT level, cell >> (2 * (:cell_bits - level)), completed_at IS NOT NULL, work_type,
+		count(*), sum(latitude), sum(longitude)
+	FROM tasks, generate_series(0, :max_level) AS level
+	WHERE cell IS NOT NULL AND deleted_at IS NULL AND id > :watermark
+	GROUP BY 1, 2, 3, 4
+""")
+
+
+def zoom_level(zoom: int) -> int:
+	"""Grid level for a web map zoom: about four clusters across a 256 px tile."""
+	return min(zoom + 2, CELL_BITS)
+
+
+class TaskClusterService:
+	"""Map clusters: tasks counted per grid cell, with centroid and work type breakdown.
+
+	Coarse levels are read from `task_cluster_tiles`. Writes to `tasks` only append deltas
+	(trigger), which are folded into the tiles on the request's connection before each read.
+	A clear or an archive makes the tiles stale: they are rebuilt in the background while
+	reads aggregate over the box, as finer levels always do.
+	"""
+
+	def __init__(self):
+		self._rebuilding: Optional[asyncio.Task] = None
+
+	async def refresh_tiles(self, session: AsyncSession) -> bool:
+		"""Fold the pending deltas into the tiles; False when the tiles cannot be read as current."""
+		try:
+			if not (await session.execute(select(func.pg_try_advisory_xact_lock(CLUSTER_LOCK_KEY)))).scalar_one():
+				# Repli ou reconstruction en cours ailleurs : les tuiles seraient en retard
+				return False
+			watermark = (await session.execute(select(cleared_watermark()))).scalar_one()
+			built_for = (await session.execute(select(TaskClusterState.cleared_up_to_id))).scalar_one_or_none()
+			if built_for != watermark:
+				self.schedule_rebuild()
+				return False
+			params = {"cell_bits": CELL_BITS, "max_level": TILE_MAX_LEVEL, "watermark": watermark}
+			await session.execute(FOLD_DELTAS, params)
+		finally:
+			# Libère le verrou consultatif avant la lecture des tuiles
+			await session.commit()
+		return True
+
+	def schedule_rebuild(self) -> None:
+		if self._rebuilding is None or self._rebuilding.done():
+			self._rebuilding = asyncio.create_task(self._rebuild_in_background())
+
+	async def stop(self) -> None:
+		if self._rebuilding is not None:
+			self._rebuilding.cancel()
+			self._rebuilding = None
+
+	async def _rebuild_in_background(self) -> None:
+		try:
+			await self.rebuild()
+		except Exception:
+			logger.exception("Cluster tiles rebuild failed")
+
+	async def rebuild(self) -> None:
+		async with engine.connect() as conn:
+			# Un seul instantané : un delta validé après lui n'est ni supprimé ni compté deux fois
+			await conn.execution_options(isolation_level="REPEATABLE READ")
+			async with conn.begin():
+				if not (await conn.execute(select(func.pg_try_advisory_xact_lock(CLUSTER_LOCK_KEY)))).scalar_one():
+					return
+				started = datetime.now()
+				watermark = (await conn.execute(select(cleared_watermark()))).scalar_one()
+				await conn.execute(text("DELETE FROM task_cluster_deltas"))
+				await conn.execute(text("DELETE FROM task_cluster_tiles"))
+				await conn.execute(BUILD_TILES, {"cell_bits": CELL_BITS, "max_level": TILE_MAX_LEVEL, "watermark": watermark})
+				await conn.execute(text("""
+					INSERT INTO task_cluster_state (id, cleared_up_to_id, built_at) VALUES (1, :watermark, now())
+					ON CONFLICT (id) DO UPDATE SET cleared_up_to_id = excluded.cleared_up_to_id, built_at = excluded.built_at
+				"""), {"watermark": watermark})
+		logger.info("Cluster tiles rebuilt in %.1fs", (datetime.now() - started).total_seconds())
+
+	async def clusters(
+			self, south: float, west: float, north: float, east: float, zoom: int,
+			completed: Optional[bool], session: AsyncSession
+	) -> List[TaskCluster]:
+		level = zoom_level(zoom)
+		shift = 2 * (CELL_BITS - level)
+		boxes = split_antimeridian(south, west, north, east)
+
+		if level <= TILE_MAX_LEVEL and await self.refresh_tiles(session):
+			keys = [
+				TaskClusterTile.key.between(low >> shift, high >> shift)
+				for box in boxes for low, high in cell_ranges(*box)
+			]
+			stmt = (
+				select(
+					TaskClusterTile.key, TaskClusterTile.work_type, TaskClusterTile.count,
+					TaskClusterTile.lat_sum, TaskClusterTile.lon_sum
+				)
+				.where(TaskClusterTile.level == level, TaskClusterTile.count > 0, or_(*keys))
+			)
+			if completed is not None:
+				stmt = stmt.where(TaskClusterTile.completed == completed)
+		else:
+			stmt = by_status(
+				select(
+					Task.cell.op(">>")(shift).label("key"), Task.work_type, func.count().label("count"),
+					func.sum(Task.latitude).label("lat_sum"), func.sum(Task.longitude).label("lon_sum")
+				)
+				.where(in_boxes(boxes), live_tasks())
+				.group_by(text("1"), Task.work_type),
+				completed
+			)
+
+		return self._merge((await session.execute(stmt)).all())
+
+	@staticmethod
+	def _merge(rows: List[Tuple[int, str, int, float, float]]) -> List[TaskCluster]:
+		cells = defaultdict(lambda: [0, 0.0, 0.0, defaultdict(int)])
+		for key, work_type, count, lat_sum, lon_sum in rows:
+			cell = cells[key]
+			cell[0] += count
+			cell[1] += lat_sum
+			cell[2] += lon_sum
+			cell[3][work_type] += count
+		return [
+			TaskCluster(
+				key=key, count=count, latitude=lat_sum / count, longitude=lon_sum / count,
+				work_types=dict(work_types)
+			)
+			for key, (count, lat_sum, lon_sum, work_types) in cells.items()
+			if count > 0
+		]
@@ -1,20 +1,52 @@
 import uuid
+import zlib
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from sqlmodel import select
 
 from app.db.main import get_session
 from app.db.models import Task
+from app.errors import InvalidSyncPayload
+from app.tasks.purge import live_tasks
+from app.tasks.schemas import TASK_SYNC_MAX_BODY, TaskSyncRequest
 
 
 async def get_task_or_404(
 		task_id: int,
 		session: AsyncSession = Depends(get_session)
 ):
-	stmt = select(Task).where(Task.id == task_id)
+	stmt = select(Task).where(Task.id == task_id, live_tasks())
 	result = await session.execute(stmt)
 	task = result.scalar_one_or_none()
 	if not task:
 		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task does not found")
-	return task
\ No newline at end of file
+	return task
+
+
+async def get_sync_payload(request: Request) -> TaskSyncRequest:
+	"""Sync batch from the request body, plain or gzip-compressed (`Content-Encoding: gzip`)."""
+	body = await request.body()
+	encoding = request.headers.get("content-encoding", "identity").strip().lower()
+	if encoding == "gzip":
+		decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+		try:
+			# Décompression bornée : une archive piégée ne peut pas épuiser la mémoire
+			body = decompressor.decompress(body, TASK_SYNC_MAX_BODY)
+		except zlib.error:
+			raise InvalidSyncPayload("Request body is not valid gzip")
+		if decompressor.unconsumed_tail:
+			raise InvalidSyncPayload(f"Decompressed body exceeds {TASK_SYNC_MAX_BODY} bytes")
+		if not decompressor.eof:
+			raise InvalidSyncPayload("Truncated gzip body")
+	elif encoding != "identity":
+		raise InvalidSyncPayload(f"Unsupported Content-Encoding: {encoding}")
+	elif len(body) > TASK_SYNC_MAX_BODY:
+		raise InvalidSyncPayload(f"Body exceeds {TASK_SYNC_MAX_BODY} bytes")
+
+	try:
+		return TaskSyncRequest.model_validate_json(body)
+	except ValidationError as e:
+		raise RequestValidationError(e.errors(include_url=False))
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import literal_column, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.db.main import Async_session_maker
+from app.db.models import Task, TaskEvent
+from app.db.notify import pg_listener
+from app.tasks.schemas import TaskRead
+
+logger = logging.getLogger(__name__)
+
+# Canal alimenté par les triggers de la migration 1b9d5f0e7c3a
+EVENTS_CHANNEL = "task_events"
+REPLAY_LIMIT = 1000
+HEARTBEAT_SECONDS = 15
+SUBSCRIBER_QUEUE_SIZE = 256
+# Lu par le trigger tasks_notify (migration 7d2f4b8e1a63)
+SUPPRESS_EVENTS_SETTING = "app.suppress_task_events"
+
+
+async def suppress_task_events(session: AsyncSession) -> None:
+	"""Write the current transaction's task changes without publishing per-row events.
+
+	For bulk backfills: subscribers are not flooded, and the caller invalidates the
+	task caches once it is done.
+	"""
+	await session.execute(text(f"SET LOCAL {SUPPRESS_EVENTS_SETTING} = 'on'"))
+
+
+def format_cursor(event: dict) -> str:
+	"""SSE id of an event: its id, then the oldest transaction still running when it was written."""
+	return f"{event['id']}-{event['xmin']}" if event.get("xmin") else str(event["id"])
+
+
+def parse_cursor(value: str) -> Tuple[int, Optional[int]]:
+	"""(event id, snapshot xmin) of a Last-Event-ID; the xmin is None for a bare id."""
+	event_id, _, xmin = value.partition("-")
+	return int(event_id), int(xmin) if xmin else None
+
+
+def format_event(cursor: str, kind: str, data: dict) -> bytes:
+	return f"id: {cursor}\nevent: {kind}\ndata: {json.dumps(data, default=str)}\n\n".encode()
+
+
+async def _load_tasks(task_ids: List[int]) -> Dict[int, dict]:
+	if not task_ids:
+		return {}
+	async with Async_session_maker() as session:
+		stmt = select(Task).options(selectinload(Task.worker)).where(Task.id.in_(task_ids))
+		result = await session.execute(stmt)
+		return {
+			task.id: TaskRead.model_validate(task, from_attributes=True).model_dump(mode="json")
+			for task in result.scalars()
+		}
+
+
+async def _render(events: List[dict]) -> List[bytes]:
+	"""Turn raw events into SSE messages, loading every referenced task in one query."""
+	needed = [event["task_id"] for event in events if event["task_id"] is not None and event["kind"] != "deleted"]
+	tasks = await _load_tasks(needed)
+	messages = []
+	for event in events:
+		data = {"task_id": event["task_id"]}
+		if event["task_id"] in tasks:
+			data["task"] = tasks[event["task_id"]]
+		messages.append(format_event(format_cursor(event), event["kind"], data))
+	return messages
+
+
+class TaskEventBroker:
+	"""Fans out the task events of this worker's LISTEN connection to its SSE clients.
+
+	Event ids are drawn at INSERT but become visible at COMMIT, so they do not arrive in
+	id order. Clients resume from a cursor holding the id and the snapshot xmin of their
+	last event: the replay returns every later id plus every event of a transaction that
+	was still running then. Delivery is at least once; each event carries the task's
+	current state, so applying it twice is harmless.
+	"""
+
+	def __init__(self):
+		self._incoming: asyncio.Queue = asyncio.Queue()
+		self._subscribers: Set[asyncio.Queue] = set()
+		self._pump: Optional[asyncio.Task] = None
+
+	def start(self) -> None:
+		self._pump = asyncio.create_task(self._run())
+
+	async def stop(self) -> None:
+		if self._pump is not None:
+			self._pump.cancel()
+			self._pump = None
+
+	def on_notify(self, payload: str) -> None:
+		self._incoming.put_nowait(json.loads(payload))
+
+	def disconnect_all(self) -> None:
+		"""Close every stream; clients reconnect with their cursor and replay what was missed."""
+		for queue in list(self._subscribers):
+			self._drop(queue)
+
+	def _drop(self, queue: asyncio.Queue) -> None:
+		self._subscribers.discard(queue)
+		while not queue.empty():
+			queue.get_nowait()
+		queue.put_nowait(None)
+
+	async def _run(self) -> None:
+		while True:
+			events = [await self._incoming.get()]
+			while not self._incoming.empty():
+				events.append(self._incoming.get_nowait())
+			try:
+				messages = await _render(events)
+			except Exception:
+				# Lot perdu pour la file en direct : les clients reprennent depuis la base
+				logger.exception("Failed to render task events, disconnecting the streams")
+				self.disconnect_all()
+				continue
+			for queue in list(self._subscribers):
+				for event, message in zip(events, messages):
+					try:
+						queue.put_nowait((event["id"], message))
+					except asyncio.QueueFull:
+						# Client trop lent : on coupe, il reprendra avec Last-Event-ID
+						self._drop(queue)
+						break
+
+	async def stream(self, cursor: Optional[str]) -> AsyncIterator[bytes]:
+		queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+		self._subscribers.add(queue)
+		try:
+			yield b"retry: 3000\n\n"
+			# Événements rejoués : ignorés s'ils arrivent aussi par la file en direct
+			replayed: Set[int] = set()
+			if cursor is not None:
+				async for event_id, message in self._replay(*parse_cursor(cursor)):
+					replayed.add(event_id)
+					yield message
+			while True:
+				try:
+					item = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+				except asyncio.TimeoutError:
+					yield b": ping\n\n"
+					continue
+				if item is None:
+					return
+				event_id, message = item
+				if event_id in replayed:
+					continue
+				yield message
+		finally:
+			self._subscribers.discard(queue)
+
+	async def _replay(self, last_id: int, xmin: Optional[int]) -> AsyncIterator[Tuple[int, bytes]]:
+		"""Events after the cursor, `REPLAY_LIMIT` at a time until none is left."""
+		condition = TaskEvent.id > last_id
+		if xmin is not None:
+			# Transactions encore en cours au dernier événement reçu, validées depuis
+			condition = or_(condition, text("task_events.txid >= CAST(:xmin AS xid8)").bindparams(xmin=str(xmin)))
+		after = None
+		while True:
+			stmt = (
+				select(
+					TaskEvent.id, TaskEvent.task_id, TaskEvent.kind,
+					literal_column("task_events.snapshot_xmin::text").label("xmin")
+				)
+				.where(condition)
+				.order_by(TaskEvent.id)
+				.limit(REPLAY_LIMIT)
+			)
+			if after is not None:
+				stmt = stmt.where(TaskEvent.id > after)
+			async with Async_session_maker() as session:
+				events = [dict(row._mapping) for row in await session.execute(stmt)]
+			for event, message in zip(events, await _render(events)):
+				yield event["id"], message
+			if len(events) < REPLAY_LIMIT:
+				# Rattrapé : la suite arrive par la file en direct, abonnée avant la reprise
+				return
+			after = events[-1]["id"]
+
+task_event_broker = TaskEventBroker()
+pg_listener.subscribe(EVENTS_CHANNEL, task_event_broker.on_notify)
+# Les NOTIFY perdus pendant une coupure sont rattrapés par la reprise des clients
+pg_listener.on_reconnect(task_event_broker.disconnect_all)
@@ -0,0 +1,153 @@
+import csv
+import logging
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import sqlalchemy.dialects.postgresql as pg
+from prometheus_client import Counter
+from sqlalchemy import column, delete, func, insert, select, text, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.main import Async_session_maker, engine
+from app.db.models import GazetteerEntry, Task
+from app.db.redis import response_cache
+from app.tasks.events import suppress_task_events
+from app.tasks.purge import live_tasks
+from app.utils.addresses import normalize_address
+from app.utils.coordinates import Coordinates
+
+logger = logging.getLogger(__name__)
+
+GAZETTEER_LOAD_BATCH = 5_000
+GEOCODE_CHUNK = 500
+GEOCODE_LOOKUPS = Counter("geocode_lookups_total", "Gazetteer address lookups by outcome", ["result"])
+
+# Meilleur candidat par adresse : filtre % (seuil pg_trgm.similarity_threshold) puis
+# tri par distance trigramme, les deux servis par l'index GiST
+MATCH_ADDRESSES = text("""
+	SELECT q.idx, g.latitude, g.longitude
+	FROM unnest(CAST(:addresses AS varchar[])) WITH ORDINALITY AS q(address, idx)
+	CROSS JOIN LATERAL (
+		SELECT latitude, longitude FROM gazetteer
+		WHERE normalized % q.address
+		ORDER BY normalized <-> q.address
+		LIMIT 1
+	) g
+""")
+
+
+def read_gazetteer(path: Path) -> Iterator[dict]:
+	"""Rows of a CSV gazetteer with `address`, `latitude` and `longitude` columns (`,` or `;`)."""
+	with path.open(newline="", encoding="utf-8-sig") as file:
+		dialect = csv.Sniffer().sniff(file.read(4096), delimiters=",;\t")
+		file.seek(0)
+		for row in csv.DictReader(file, dialect=dialect):
+			normalized = normalize_address(row["address"])
+			if normalized:
+				yield {
+					"address": row["address"].strip(), "normalized": normalized,
+					"latitude": float(row["latitude"]), "longitude": float(row["longitude"]),
+				}
+
+
+class GazetteerGeocoder:
+	"""Offline geocoding of task addresses against the local `gazetteer` table.
+
+	Addresses are normalized (`normalize_address`) on both sides and matched by trigram
+	similarity; an address below `geocode_min_similarity` stays without coordinates.
+	"""
+
+	async def load(self, path: Path, replace: bool = False) -> int:
+		loaded = 0
+		async with engine.begin() as conn:
+			if replace:
+				await conn.execute(delete(GazetteerEntry))
+			batch = []
+			for row in read_gazetteer(path):
+				batch.append(row)
+				if len(batch) >= GAZETTEER_LOAD_BATCH:
+					await conn.execute(insert(GazetteerEntry), batch)
+					loaded += len(batch)
+					batch = []
+			if batch:
+				await conn.execute(insert(GazetteerEntry), batch)
+				loaded += len(batch)
+		async with engine.connect() as conn:
+			await conn.execution_options(isolation_level="AUTOCOMMIT")
+			await conn.execute(text("ANALYZE gazetteer"))
+		return loaded
+
+	async def geocode_many(self, addresses: Sequence[Optional[str]], session: AsyncSession) -> List[Optional[Coordinates]]:
+		"""Coordinates of each address, or None; each distinct address is looked up once."""
+		normalized = [normalize_address(address) if address else "" for address in addresses]
+		distinct = sorted({address for address in normalized if address})
+		found: Dict[str, Coordinates] = {}
+		if distinct:
+			# Seuil local à la transaction en cours
+			await session.execute(select(func.set_config(
+				"pg_trgm.similarity_threshold", str(settings.geocode_min_similarity), True
+			)))
+			for start in range(0, len(distinct), GEOCODE_CHUNK):
+				chunk = distinct[start:start + GEOCODE_CHUNK]
+				for idx, latitude, longitude in await session.execute(MATCH_ADDRESSES, {"addresses": chunk}):
+					found[chunk[idx - 1]] = Coordinates(latitude, longitude)
+			GEOCODE_LOOKUPS.labels("matched").inc(len(found))
+			GEOCODE_LOOKUPS.labels("unmatched").inc(len(distinct) - len(found))
+		return [found.get(address) for address in normalized]
+
+	async def backfill(self, batch_size: int, include_completed: bool = False) -> Tuple[int, int]:
+		"""Geocode live tasks without coordinates in id order; returns (scanned, geocoded).
+
+		One transaction per batch, written without publishing task events. Only rows still
+		without coordinates are written, so a concurrent photo geotag is never overwritten
+		and the command can be re-run.
+		"""
+		scanned = geocoded = 0
+		last_id = 0
+		started = time.monotonic()
+		async with Async_session_maker() as session:
+			while True:
+				stmt = (
+					select(Task.id, Task.address)
+					.where(Task.id > last_id, Task.latitude.is_(None), live_tasks())
+					.order_by(Task.id)
+					.limit(batch_size)
+				)
+				if not include_completed:
+					stmt = stmt.where(Task.completed_at.is_(None))
+				rows = (await session.execute(stmt)).all()
+				if not rows:
+					break
+				last_id = rows[-1].id
+				scanned += len(rows)
+
+				found = [
+					(row.id, coordinates.latitude, coordinates.longitude)
+					for row, coordinates in zip(rows, await self.geocode_many([row.address for row in rows], session))
+					if coordinates is not None
+				]
+				if found:
+					await suppress_task_events(session)
+					data = values(
+						column("id", pg.INTEGER), column("latitude", pg.FLOAT), column("longitude", pg.FLOAT), name="v"
+					).data(found)
+					result = await session.execute(
+						update(Task)
+						.where(Task.id == data.c.id, Task.latitude.is_(None))
+						.values(latitude=data.c.latitude, longitude=data.c.longitude)
+						.execution_options(synchronize_session=False)
+					)
+					geocoded += result.rowcount
+				await session.commit()
+				logger.info(
+					"Geocoding backfill: up to id %s, %s/%s geocoded, %.0f tasks/s",
+					last_id, geocoded, scanned, scanned / max(time.monotonic() - started, 1e-9)
+				)
+		if geocoded:
+			await response_cache.invalidate("tasks")
+		return scanned, geocoded
+
+
+geocoder = GazetteerGeocoder()
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import re
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import MetaData, Table, delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.main import engine
+from app.db.models import Task, TaskClusterState
+
+logger = logging.getLogger(__name__)
+
+# La table `tasks` est partitionnée par mois sur `completed_at`.
+# Les tâches en attente (completed_at IS NULL) vivent dans la partition par défaut.
+DEFAULT_PARTITION = "tasks_pending"
+ARCHIVE_SCHEMA = "archive"
+PARTITION_NAME_RE = re.compile(r"^tasks_p(\d{4})_(\d{2})$")
+PARTITIONS_LOCK_KEY = 0x70617274  # un seul worker crée les partitions à la fois
+PARTITIONS_CHECK_INTERVAL = 6 * 3600
+
+
+def month_start(value: date) -> date:
+	return value.replace(day=1)
+
+
+def add_months(value: date, months: int) -> date:
+	index = value.year * 12 + value.month - 1 + months
+	return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+	return f"tasks_p{month.year:04d}_{month.month:02d}"
+
+
+def partition_month(name: str) -> date | None:
+	match = PARTITION_NAME_RE.match(name)
+	if not match:
+		return None
+	return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+async def _partitions_in(conn: AsyncConnection, schema: str, attached: bool) -> List[date]:
+	# Partitions attachées : enfants de `tasks` ; archivées : tables du schéma archive
+	if attached:
+		stmt = text("""
+			SELECT c.relname FROM pg_inherits i
+			JOIN pg_class c ON c.oid = i.inhrelid
+			JOIN pg_class p ON p.oid = i.inhparent
+			JOIN pg_namespace n ON n.oid = c.relnamespace
+			WHERE p.relname = 'tasks' AND n.nspname = :schema
+		""")
+	else:
+		stmt = text("""
+			SELECT c.relname FROM pg_class c
+			JOIN pg_namespace n ON n.oid = c.relnamespace
+			WHERE n.nspname = :schema AND c.relkind = 'r'
+		""")
+	result = await conn.execute(stmt, {"schema": schema})
+	months = [partition_month(name) for name in result.scalars()]
+	return sorted(month for month in months if month is not None)
+
+
+async def attached_months(conn: AsyncConnection) -> List[date]:
+	return await _partitions_in(conn, "public", attached=True)
+
+
+async def archived_months(conn: AsyncConnection) -> List[date]:
+	return await _partitions_in(conn, ARCHIVE_SCHEMA, attached=False)
+
+
+async def create_month_partition(conn: AsyncConnection, month: date) -> str:
+	"""Create the partition for `month`, moving any matching rows out of the default partition."""
+	name = partition_name(month)
+	low, high = month, add_months(month, 1)
+
+	await conn.execute(text(f"CREATE TABLE {name} (LIKE tasks INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+	await conn.execute(
+		text(f"""
+			WITH moved AS (
+				DELETE FROM {DEFAULT_PARTITION}
+				WHERE completed_at >= :low AND completed_at < :high
+				RETURNING *
+			)
+			INSERT INTO {name} SELECT * FROM moved
+		"""),
+		{"low": low, "high": high}
+	)
+	# Le DELETE a retiré ces id du registre ; l'INSERT dans la table pas encore attachée
+	# ne passe par aucun trigger
+	moved = (await conn.execute(text(f"INSERT INTO task_ids (id) SELECT id FROM {name}"))).rowcount
+	if moved:
+		# Le DELETE a aussi écrit des deltas de clusters négatifs sans contrepartie : tuiles à reconstruire
+		await conn.execute(delete(TaskClusterState))
+	await conn.execute(text(
+		f"ALTER TABLE tasks ATTACH PARTITION {name} FOR VALUES FROM ('{low}') TO ('{high}')"
+	))
+	return name
+
+
+async def ensure_partitions(conn: AsyncConnection, months_ahead: int = 3) -> List[str]:
+	"""Make sure partitions exist from the current month up to `months_ahead` months ahead."""
+	existing = set(await attached_months(conn))
+	current = month_start(date.today())
+	created = []
+	for offset in range(months_ahead + 1):
+		month = add_months(current, offset)
+		if month not in existing:
+			created.append(await create_month_partition(conn, month))
+	return created
+
+
+class PartitionMaintainer:
+	"""Keeps the monthly partitions created ahead, from every API worker.
+
+	Runs at startup and then every `PARTITIONS_CHECK_INTERVAL` seconds; the advisory lock
+	lets one worker do the work while the others skip that round. Without it, completions
+	past the last created month would pile up in the default partition.
+	"""
+
+	def __init__(self, months_ahead: int):
+		self.months_ahead = months_ahead
+		self._task: Optional[asyncio.Task] = None
+
+	def start(self) -> None:
+		self._task = asyncio.create_task(self._run())
+
+	async def stop(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			self._task = None
+
+	async def run_once(self) -> List[str]:
+		async with engine.begin() as conn:
+			if not (await conn.execute(select(func.pg_try_advisory_xact_lock(PARTITIONS_LOCK_KEY)))).scalar_one():
+				return []
+			return await ensure_partitions(conn, self.months_ahead)
+
+	async def _run(self) -> None:
+		while True:
+			try:
+				created = await self.run_once()
+				if created:
+					logger.info("Created task partitions: %s", ", ".join(created))
+			except Exception:
+				logger.exception("Task partition maintenance failed")
+			await asyncio.sleep(PARTITIONS_CHECK_INTERVAL)
+
+
+async def archive_partitions(conn: AsyncConnection, keep_months: int) -> List[str]:
+	"""Detach partitions older than `keep_months` months into the archive schema."""
+	cutoff = add_months(month_start(date.today()), -keep_months)
+	archived = []
+	await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+	for month in await attached_months(conn):
+		if month >= cutoff:
+			break
+		name = partition_name(month)
+		await conn.execute(text(f"ALTER TABLE tasks DETACH PARTITION {name}"))
+		await conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+		archived.append(name)
+	if archived:
+		# Les lignes détachées ne passent pas par les triggers : tuiles de clusters à reconstruire
+		await conn.execute(delete(TaskClusterState))
+	return archived
+
+
+def archived_table(month: date) -> Table:
+	"""Core table matching `tasks` for the archived partition of `month`."""
+	return Task.__table__.to_metadata(MetaData(), schema=ARCHIVE_SCHEMA, name=partition_name(month))
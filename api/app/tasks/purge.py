@@ -0,0 +1,113 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.db.main import engine
+from app.db.models import Task, TaskEvent, TaskPurge
+
+logger = logging.getLogger(__name__)
+
+PURGE_BATCH_SIZE = 1000
+PURGE_PAUSE_SECONDS = 0.1
+PURGE_LOCK_KEY = 0x7461736b  # un seul purgeur à la fois, tous workers confondus
+TASK_EVENT_RETENTION = timedelta(days=2)
+
+
+def cleared_watermark():
+	"""Highest task id covered by a logical clear (0 when the table was never cleared)."""
+	return select(func.coalesce(func.max(TaskPurge.cleared_up_to_id), 0)).scalar_subquery()
+
+
+def live_tasks(columns: Any = Task):
+	"""Filter keeping tasks that are neither soft deleted nor covered by a clear.
+
+	`columns` is the `Task` entity or the `.c` collection of a table shaped like `tasks`.
+	"""
+	return and_(columns.deleted_at.is_(None), columns.id > cleared_watermark())
+
+
+async def clear_tasks(session: AsyncSession) -> TaskPurge:
+	"""Hide every existing task in O(1) by recording the current max id."""
+	max_id = select(func.coalesce(func.max(Task.id), 0)).scalar_subquery()
+	stmt = insert(TaskPurge).values(cleared_up_to_id=max_id).returning(TaskPurge)
+	result = await session.execute(stmt)
+	purge = result.scalar_one()
+	await session.commit()
+	return purge
+
+
+async def get_latest_purge(session: AsyncSession) -> TaskPurge | None:
+	stmt = select(TaskPurge).order_by(TaskPurge.id.desc()).limit(1)
+	result = await session.execute(stmt)
+	return result.scalar_one_or_none()
+
+
+async def purge_tasks(batch_size: int = PURGE_BATCH_SIZE, pause: float = PURGE_PAUSE_SECONDS) -> int:
+	"""Physically delete hidden tasks in bounded id ranges, one transaction per batch.
+
+	Resumes the latest unfinished purge if there is one, otherwise starts a new one.
+	Returns the number of deleted rows.
+	"""
+	async with engine.connect() as conn:
+		async with conn.begin():
+			locked = (await conn.execute(select(func.pg_try_advisory_lock(PURGE_LOCK_KEY)))).scalar_one()
+		if not locked:
+			logger.info("Task purge already running, skipping")
+			return 0
+		try:
+			return await _purge_batches(conn, batch_size, pause)
+		finally:
+			async with conn.begin():
+				await conn.execute(select(func.pg_advisory_unlock(PURGE_LOCK_KEY)))
+
+
+async def _purge_batches(conn: AsyncConnection, batch_size: int, pause: float) -> int:
+	async with conn.begin():
+		purge_id, purged_up_to = (await conn.execute(
+			select(TaskPurge.id, TaskPurge.purged_up_to_id)
+			.where(TaskPurge.finished_at.is_(None))
+			.order_by(TaskPurge.id.desc())
+			.limit(1)
+		)).one_or_none() or (None, None)
+		if purge_id is None:
+			purge_id = (await conn.execute(insert(TaskPurge).returning(TaskPurge.id))).scalar_one()
+		watermark = (await conn.execute(select(cleared_watermark()))).scalar_one()
+		low, high = (await conn.execute(select(func.min(Task.id), func.max(Task.id)))).one()
+
+	deleted = 0
+	if low is not None:
+		start = max(low, (purged_up_to or 0) + 1)
+		while start <= high:
+			end = start + batch_size
+			async with conn.begin():
+				result = await conn.execute(
+					delete(Task).where(
+						Task.id >= start, Task.id < end,
+						or_(Task.id <= watermark, Task.deleted_at.is_not(None))
+					)
+				)
+				deleted += result.rowcount
+				await conn.execute(
+					update(TaskPurge)
+					.where(TaskPurge.id == purge_id)
+					.values(purged_up_to_id=end - 1, deleted_count=TaskPurge.deleted_count + result.rowcount)
+				)
+			logger.info("Task purge %s: up to id %s, %s rows deleted", purge_id, end - 1, deleted)
+			start = end
+			# Laisse respirer les autres transactions entre deux lots
+			await asyncio.sleep(pause)
+
+	async with conn.begin():
+		# Les purges plus anciennes restées inachevées sont couvertes par celle-ci
+		await conn.execute(
+			update(TaskPurge)
+			.where(TaskPurge.id <= purge_id, TaskPurge.finished_at.is_(None))
+			.values(finished_at=datetime.now())
+		)
+		# Les événements SSE ne servent qu'à la reprise des flux récents
+		await conn.execute(delete(TaskEvent).where(TaskEvent.created_at < datetime.now() - TASK_EVENT_RETENTION))
+	return deleted
@@ -1,28 +1,55 @@
-import io
-from datetime import datetime
-from typing import List, Annotated
-
-from fastapi import APIRouter, Depends, status, File, UploadFile, HTTPException, Query
-from fastapi.responses import Response
-from openpyxl.reader.excel import load_workbook
-from sqlalchemy import delete
+import asyncio
+from datetime import date
+from typing import List, Annotated, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, status, File, UploadFile, HTTPException, Query, Path, Header
+from fastapi.responses import Response, StreamingResponse
+from prometheus_client import Histogram
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlmodel import select, desc
 
-from app.auth.dependencies import AccessTokenBearer, RoleChecker, get_current_user
-from app.db.main import get_session
+from app.auth.dependencies import AccessTokenBearer, RoleChecker, get_current_user, get_stream_user
+from app.auth.utils import STREAM_TOKEN_EXPIRY, create_stream_token
+from app.config import settings
+from app.db.main import Async_session_maker, get_session
 from app.db.models import Task, WorkType, Voltage, User
+from app.db.redis import response_cache
 from app.errors import TaskNotFound, InsufficientPermission
-from app.tasks.dependencies import get_task_or_404
-from app.tasks.schemas import TaskRead, TaskCreate, TaskUpdate
+from app.tasks.batch import TaskBatchService
+from app.tasks.claims import CLAIM_MAX_TASKS, TaskClaimService
+from app.tasks.clusters import TaskClusterService
+from app.tasks.dependencies import get_sync_payload, get_task_or_404
+from app.tasks.events import task_event_broker
+from app.tasks.geocoding import geocoder
+from app.tasks.purge import get_latest_purge, purge_tasks
+from app.tasks.routing import TaskRouteService
+from app.tasks.schemas import (
+	TaskRead, TaskCreate, TaskUpdate, TaskPurgeRead, TaskBatchRequest, TaskBatchResult, TaskSyncRequest, TaskSyncResult,
+	TaskPoint, TaskCluster, TaskRoute
+)
 from app.tasks.service import TaskService
-from app.tasks.utils import get_file_from_database
-from app.utils.photo_metadata import photo_metadata
+from app.tasks.spatial import NEAR_MAX_RADIUS_M, POINTS_MAX_LIMIT, TaskSpatialService
+from app.tasks.utils import get_file_from_database, read_tasks_from_workbook
+from app.utils.admission import ConcurrencyLimit, Priority
+from app.utils.idempotency import idempotent_response, request_fingerprint
+from app.utils.single_flight import SingleFlight
 
 task_router = APIRouter()
 task_service = TaskService()
+task_batch_service = TaskBatchService()
+task_claim_service = TaskClaimService()
+task_spatial_service = TaskSpatialService()
+task_cluster_service = TaskClusterService()
+task_route_service = TaskRouteService()
+# Les requêtes identiques simultanées (même liste, mêmes paramètres, même rôle) partagent un calcul
+task_list_flight = SingleFlight("task_lists")
+EVENT_CURSOR_PATTERN = r"^\d+(-\d+)?$"
 access_token_bearer = AccessTokenBearer()
+FILE_JOB_DURATION = Histogram(
+	"task_file_job_duration_seconds", "Excel import and export durations", ["job"],
+	buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
 
 admin_checker = Depends(RoleChecker(['admin']))
 worker_checker = Depends(RoleChecker(['admin', 'worker']))
@@ -30,6 +57,16 @@ user_checker = Depends(RoleChecker(['admin', 'user']))
 guest_checker = Depends(RoleChecker(['guest']))
 all_roles_checker = Depends(RoleChecker(['admin', 'user', 'worker', 'guest']))
 
+# Placées avant l'authentification : une requête en attente ne tient pas de connexion
+# Les imports / exports Excel cèdent la place aux complétions de l'application mobile
+completion_limit = Depends(ConcurrencyLimit("completion", Priority.INTERACTIVE, queue=100, timeout=10))
+export_limit = Depends(ConcurrencyLimit(
+	"export", Priority.BULK, limit=settings.export_concurrency, queue=4, timeout=5, retry_after=30
+))
+import_limit = Depends(ConcurrencyLimit(
+	"import", Priority.BULK, limit=settings.import_concurrency, per_user=1, queue=2, timeout=5, retry_after=30
+))
+
 VALID_CODE = '202502'
 DOWNLOAD_APK_URL = f"https://firebasestorage.googleapis.com/v0/b/dagenergi-b0086.appspot.com/o/apk%2Fapp-release.apk.zip?alt=media&token=248b1700-a781-45d5-99db-44ffe94d7048"
 
@@ -43,23 +80,153 @@ async def download_apk(
 	return  {"download_url": DOWNLOAD_APK_URL}
 
 
+async def _pending_tasks_json() -> bytes:
+	# Calcul partagé : sa propre session, que la déconnexion d'un appelant ne ferme pas
+	async with Async_session_maker() as session:
+		return await task_service.get_all_tasks_json(session)
+
+
+async def _completed_tasks_json(completed_from: Optional[date], completed_to: Optional[date]) -> bytes:
+	async with Async_session_maker() as session:
+		return await task_service.get_tasks_completed_json(session, completed_from, completed_to)
+
+
 @task_router.get("/", response_model=List[TaskRead], dependencies=[all_roles_checker])
 async def get_all_tasks(
 		session: AsyncSession = Depends(get_session),
+		user: User = Depends(get_current_user),
 		_: dict = Depends(access_token_bearer)
 ):
-	stmt = select(Task).options(selectinload(Task.worker)).where(Task.is_completed == False).order_by(Task.created_at)
-	result = await session.execute(stmt)
-	tasks = result.scalars().all()
-	return tasks
+	# La connexion de l'authentification est rendue au pool avant le calcul partagé
+	await session.close()
+	body = await task_list_flight.do(("pending", user.role), _pending_tasks_json)
+	return Response(content=body, media_type="application/json")
 
 
 @task_router.get("/completed", response_model=List[TaskRead], dependencies=[all_roles_checker])
-async def get_completed_task(session: Annotated[AsyncSession, Depends(get_session)]):
-	stmt = select(Task).options(selectinload(Task.worker)).where(Task.is_completed == True).order_by(desc(Task.created_at))
-	result = await session.execute(stmt)
-	tasks = result.scalars().all()
-	return tasks
+async def get_completed_task(
+		session: Annotated[AsyncSession, Depends(get_session)],
+		user: Annotated[User, Depends(get_current_user)],
+		completed_from: Optional[date] = None,
+		completed_to: Optional[date] = None
+):
+	await session.close()
+	body = await task_list_flight.do(
+		("completed", completed_from, completed_to, user.role),
+		lambda: _completed_tasks_json(completed_from, completed_to)
+	)
+	return Response(content=body, media_type="application/json")
+
+
+@task_router.get("/archive", response_model=List[date], dependencies=[admin_checker])
+async def get_archived_months(session: AsyncSession = Depends(get_session)):
+	return await task_service.get_archived_months(session)
+
+
+@task_router.get("/archive/{month}", response_model=List[TaskRead], dependencies=[admin_checker])
+async def get_archived_tasks(
+		month: str = Path(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$"),
+		session: AsyncSession = Depends(get_session)
+):
+	year, month_number = map(int, month.split("-"))
+	return await task_service.get_archived_tasks(date(year, month_number, 1), session)
+
+
+@task_router.post("/stream-token", dependencies=[all_roles_checker])
+async def create_task_stream_token(user: User = Depends(get_current_user)):
+	token = create_stream_token({"username": user.username, "user_uid": str(user.uid), "role": user.role})
+	return {"token": token, "expires_in": int(STREAM_TOKEN_EXPIRY.total_seconds())}
+
+
+@task_router.get("/stream")
+async def stream_task_events(
+		_: User = Depends(get_stream_user),
+		session: AsyncSession = Depends(get_session),
+		last_event_id: Optional[str] = Header(default=None, pattern=EVENT_CURSOR_PATTERN),
+		cursor: Optional[str] = Query(
+			default=None, pattern=EVENT_CURSOR_PATTERN, description="Last event id, for clients that cannot set Last-Event-ID"
+		),
+):
+	# La connexion de l'authentification est rendue au pool avant d'ouvrir le flux
+	await session.close()
+	return StreamingResponse(
+		task_event_broker.stream(last_event_id or cursor),
+		media_type="text/event-stream",
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+	)
+
+
+@task_router.get("/near", response_model=List[TaskPoint], dependencies=[all_roles_checker])
+async def get_tasks_near(
+		lat: float = Query(ge=-90, le=90),
+		lon: float = Query(ge=-180, le=180),
+		radius_m: float = Query(gt=0, le=NEAR_MAX_RADIUS_M),
+		limit: int = Query(default=1000, ge=1, le=POINTS_MAX_LIMIT),
+		completed: Optional[bool] = None,
+		session: AsyncSession = Depends(get_session)
+):
+	"""Tasks within `radius_m` metres, nearest first, with their distance."""
+	body = await task_spatial_service.near(lat, lon, radius_m, limit, completed, session)
+	return Response(content=body, media_type="application/json")
+
+
+@task_router.get("/bbox", response_model=List[TaskPoint], dependencies=[all_roles_checker])
+async def get_tasks_in_bbox(
+		south: float = Query(ge=-90, le=90),
+		west: float = Query(ge=-180, le=180),
+		north: float = Query(ge=-90, le=90),
+		east: float = Query(ge=-180, le=180),
+		limit: int = Query(default=1000, ge=1, le=POINTS_MAX_LIMIT),
+		completed: Optional[bool] = None,
+		session: AsyncSession = Depends(get_session)
+):
+	"""Tasks inside a box, at most `limit` of them; `west > east` crosses the 180th meridian."""
+	if south > north:
+		raise HTTPException(status_code=400, detail="south must not be greater than north")
+	body = await task_spatial_service.in_bbox(south, west, north, east, limit, completed, session)
+	return Response(content=body, media_type="application/json")
+
+
+@task_router.get("/clusters", response_model=List[TaskCluster], dependencies=[all_roles_checker])
+async def get_task_clusters(
+		bbox: str = Query(description="west,south,east,north"),
+		zoom: int = Query(ge=0, le=22),
+		completed: Optional[bool] = None,
+		session: AsyncSession = Depends(get_session)
+):
+	"""Task counts per grid cell of the map zoom level, with centroid and work types."""
+	try:
+		west, south, east, north = (float(value) for value in bbox.split(","))
+	except ValueError:
+		raise HTTPException(status_code=400, detail="bbox must be west,south,east,north")
+	if not (-90 <= south <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180):
+		raise HTTPException(status_code=400, detail="bbox is out of range")
+	return await task_cluster_service.clusters(south, west, north, east, zoom, completed, session)
+
+
+@task_router.get("/route", response_model=TaskRoute, dependencies=[worker_checker])
+async def get_task_route(
+		start_lat: float = Query(ge=-90, le=90),
+		start_lon: float = Query(ge=-180, le=180),
+		worker: User = Depends(get_current_user),
+		session: AsyncSession = Depends(get_session)
+):
+	"""Visiting order of the caller's claimed tasks from a start point, with leg lengths."""
+	body = await task_route_service.route(start_lat, start_lon, worker, session)
+	return Response(content=body, media_type="application/json")
+
+
+@task_router.get("/claimed", response_model=List[TaskRead], dependencies=[worker_checker])
+async def get_claimed_tasks(
+		worker: User = Depends(get_current_user),
+		session: AsyncSession = Depends(get_session)
+):
+	return await task_claim_service.get_claimed(worker, session)
+
+
+@task_router.get("/purge", response_model=Optional[TaskPurgeRead], dependencies=[admin_checker])
+async def get_purge_status(session: AsyncSession = Depends(get_session)):
+	return await get_latest_purge(session)
 
 
 @task_router.get("/{task_id}", response_model=TaskRead, dependencies=[worker_checker])
@@ -75,133 +242,148 @@ async def get_task(
 	"/",
 	status_code=status.HTTP_201_CREATED,
 	response_model=TaskRead,
-	dependencies=[worker_checker]
+	dependencies=[completion_limit, worker_checker]
 )
 async def add_task(
 		task_data: TaskCreate,
 		worker: User = Depends(get_current_user),
+		session: AsyncSession = Depends(get_session),
+		idempotency_key: Optional[str] = Header(default=None, max_length=255),
+):
+	if idempotency_key is None:
+		return await task_service.create_a_task(task_data, worker, session)
+	# Une création rejouée renvoie la tâche déjà créée au lieu d'en créer un doublon
+	return await idempotent_response(
+		session, worker.uid, idempotency_key, request_fingerprint("POST", "/api/task/", task_data),
+		lambda: task_service.insert_task(task_data, worker, session),
+		status_code=status.HTTP_201_CREATED,
+		after_commit=lambda: response_cache.invalidate("tasks"),
+	)
+
+
+@task_router.post(
+	"/batch",
+	response_model=List[TaskBatchResult],
+	dependencies=[completion_limit, worker_checker]
+)
+async def apply_task_batch(
+		batch: TaskBatchRequest,
+		worker: User = Depends(get_current_user),
 		session: AsyncSession = Depends(get_session)
 ):
-	coordinates = None
-	# Utiliser les deux premières photos pour obtenir les coordonnées
-	if task_data.photos and len(task_data.photos) >= 2:
-		coordinates = photo_metadata.get_coordinate_from_url(task_data.photos[0])
-		if not coordinates:
-			coordinates = photo_metadata.get_coordinate_from_url(task_data.photos[1])
-
-	task = Task(**task_data.dict(), worker_id=worker.uid)
-	task.is_completed = True
-	task.completion_date = datetime.now().strftime("%d-%m-%Y %H:%M")
-	if coordinates:
-		task.latitude = coordinates.latitude
-		task.longitude = coordinates.longitude
-	session.add(task)
-	await session.commit()
-	await session.refresh(task)
-	return task
+	return await task_batch_service.apply(batch.operations, worker, session)
+
+
+@task_router.post(
+	"/sync",
+	response_model=List[TaskSyncResult],
+	response_model_exclude_none=True,
+	dependencies=[completion_limit, worker_checker]
+)
+async def sync_tasks(
+		payload: TaskSyncRequest = Depends(get_sync_payload),
+		worker: User = Depends(get_current_user),
+		session: AsyncSession = Depends(get_session)
+):
+	"""Completions recorded offline; the body may be sent with `Content-Encoding: gzip`."""
+	return await task_batch_service.sync(payload.items, worker, session)
+
+
+@task_router.post(
+	"/claim",
+	response_model=List[TaskRead],
+	dependencies=[completion_limit, worker_checker]
+)
+async def claim_tasks(
+		lat: float = Query(ge=-90, le=90),
+		lon: float = Query(ge=-180, le=180),
+		n: int = Query(default=5, ge=1, le=CLAIM_MAX_TASKS),
+		worker: User = Depends(get_current_user),
+		session: AsyncSession = Depends(get_session)
+):
+	"""Claim the `n` nearest unclaimed pending tasks for `claim_lease_minutes`."""
+	return await task_claim_service.claim_nearest(lat, lon, n, worker, session)
 
 
 @task_router.post(
 	"/upload",
 	status_code=status.HTTP_201_CREATED,
-	response_model=List[TaskRead]
+	response_model=List[TaskRead],
+	dependencies=[import_limit]
 )
 async def upload_file(
 		uploadFile: UploadFile = File(...),
 		session: AsyncSession = Depends(get_session),
 ):
-	uploadFile.file.seek(0)
-	content = uploadFile.file.read()
-	workbook = load_workbook(io.BytesIO(content))
-	sheet = workbook.active
-	tasks = []
-	for row in range(3, sheet.max_row + 1):
+	with FILE_JOB_DURATION.labels("import").time():
+		await uploadFile.seek(0)
+		content = await uploadFile.read()
 		try:
-			new_task = TaskCreate(
-				work_type=str(sheet.cell(row=row, column=2).value) if sheet.cell(row=row, column=2).value else None,
-				dispatcher_name=str(sheet.cell(row=row, column=3).value) if sheet.cell(row=row, column=3).value else None,
-				address=str(sheet.cell(row=row, column=4).value) if sheet.cell(row=row, column=4).value else None,
-				planner_date=str(sheet.cell(row=row, column=5).value) if sheet.cell(row=row, column=5).value else None,
-				voltage=sheet.cell(row=row, column=7).value if sheet.cell(row=row, column=7).value else None,
-				job=str(sheet.cell(row=row, column=8).value) if sheet.cell(row=row, column=8).value else None,
-				latitude=None,
-				longitude=None,
-				photos=[],
-				comments=None
-			)
+			# Lecture du classeur (openpyxl) hors de la boucle d'événements
+			new_tasks = await asyncio.to_thread(read_tasks_from_workbook, content)
 		except KeyError as e:
 			raise HTTPException(
 				status_code=400, detail=f"Missing column in the Excel file: {e}"
 			)
-		task = await task_service.create_task_from_file(new_task, session)
-		tasks.append(task)
-	return tasks
+		# Géocodage hors ligne des adresses, en une passe sur le référentiel local
+		coordinates = await geocoder.geocode_many([new_task.address for new_task in new_tasks], session)
+		return await task_service.create_tasks_from_file(new_tasks, coordinates, session)
 
 
 @task_router.patch(
 	"/{task_id}",
 	response_model=TaskRead,
-	dependencies=[worker_checker]
+	dependencies=[completion_limit, worker_checker]
 )
 async def update_task(
+		task_id: int,
 		update_data: TaskUpdate,
-		task = Depends(get_task_or_404),
 		worker = Depends(get_current_user),
 		session: AsyncSession = Depends(get_session),
+		idempotency_key: Optional[str] = Header(default=None, max_length=255),
 ):
-	update_data_dict = update_data.model_dump(exclude_unset=True)
-	photos = update_data_dict.get("photos")
-
-	# Si des photos sont fournies, on essaie d'en extraire les coordonnées
-	if photos and isinstance(photos, list) and len(photos) > 0:
-		first_photo = photos[0]
-		coordinates = photo_metadata.get_coordinate_from_url(first_photo)
-		if coordinates:
-			update_data_dict["latitude"] = coordinates.latitude
-			update_data_dict["longitude"] = coordinates.longitude
-
-	for key, value in update_data_dict.items():
-		setattr(task, key, value)
-
-	task.worker_id = worker.uid
-	task.completion_date =  datetime.now().strftime("%d-%m-%Y %H:%M")
-	task.is_completed = True
-
-	await session.commit()
-	await session.refresh(task)
-	return task
+	if idempotency_key is None:
+		return await task_service.update_task(task_id, update_data, worker, session)
+	return await idempotent_response(
+		session, worker.uid, idempotency_key, request_fingerprint("PATCH", f"/api/task/{task_id}", update_data),
+		lambda: task_service.apply_task_update(task_id, update_data, worker, session),
+		status_code=status.HTTP_200_OK,
+		after_commit=lambda: response_cache.invalidate("tasks"),
+	)
 
 @task_router.delete(
 	"/clear", status_code=status.HTTP_204_NO_CONTENT,
 	dependencies=[admin_checker]
 )
 async def delete_all_tasks(
+		background_tasks: BackgroundTasks,
 		session: AsyncSession = Depends(get_session)
 ):
-	statement = delete(Task)
-	await session.execute(statement)
-	await session.commit()
+	# Effacement logique immédiat, suppression physique par lots en arrière-plan
+	await task_service.tasks_delete(session)
+	background_tasks.add_task(purge_tasks)
 
 
 @task_router.delete(
 	"/{task_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[admin_checker]
 )
 async def delete_task(
-		task = Depends(get_current_user),
+		task_id: int,
 		session: AsyncSession = Depends(get_session),
-
 ):
-	await session.delete(task)
-	await session.commit()
+	await task_service.task_delete(task_id, session)
 
 
-@task_router.post("/download", status_code=status.HTTP_201_CREATED, dependencies=[all_roles_checker])
+@task_router.post("/download", status_code=status.HTTP_201_CREATED, dependencies=[export_limit, all_roles_checker])
 async def download(
 	session: AsyncSession = Depends(get_session),
+	completed_from: Optional[date] = None,
+	completed_to: Optional[date] = None
 ):
-	tasks = await task_service.get_tasks_completed(session)
-	file = get_file_from_database(tasks)
-	file_content = file.getvalue()
+	with FILE_JOB_DURATION.labels("export").time():
+		tasks = await task_service.get_tasks_completed(session, completed_from, completed_to)
+		file = await asyncio.to_thread(get_file_from_database, tasks)
+		file_content = file.getvalue()
 	headers = {
 		'Content-Disposition': 'attachment; filename="Reports.xlsx"',
 		"Access-Control-Allow-Origin": "*",
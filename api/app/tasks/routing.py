@@ -0,0 +1,48 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import User
+from app.db.redis import response_cache
+from app.tasks.claims import TaskClaimService
+from app.tasks.schemas import TaskRoute, TaskRouteStop
+from app.utils.routing import order_stops
+
+ROUTE_MAX_STOPS = 200
+# Clé de cache = ensemble des arrêts et de leurs coordonnées : pas d'invalidation à gérer
+ROUTE_CACHE_TTL = 3600
+# Départ arrondi à ~100 m pour que les appels successifs d'une équipe partagent l'itinéraire
+ROUTE_START_PRECISION = 3
+
+task_claim_service = TaskClaimService()
+
+
+class TaskRouteService:
+	"""Visiting order of a worker's claimed tasks: nearest neighbour, then 2-opt."""
+
+	async def route(self, start_latitude: float, start_longitude: float, worker: User, session: AsyncSession) -> bytes:
+		tasks = [
+			task for task in await task_claim_service.get_claimed(worker, session)
+			if task.latitude is not None and task.longitude is not None
+		][:ROUTE_MAX_STOPS]
+		start = (round(start_latitude, ROUTE_START_PRECISION), round(start_longitude, ROUTE_START_PRECISION))
+
+		async def compute() -> bytes:
+			if not tasks:
+				return TaskRoute(total_m=0, stops=[]).model_dump_json().encode()
+			# Calcul NumPy hors de la boucle d'événements
+			order, legs = await asyncio.to_thread(
+				order_stops, *start, [task.latitude for task in tasks], [task.longitude for task in tasks]
+			)
+			stops = [
+				TaskRouteStop(
+					id=tasks[index].id, latitude=tasks[index].latitude, longitude=tasks[index].longitude,
+					dispatcher_name=tasks[index].dispatcher_name, address=tasks[index].address,
+					leg_m=round(leg, 1)
+				)
+				for index, leg in zip(order, legs)
+			]
+			return TaskRoute(total_m=round(sum(legs), 1), stops=stops).model_dump_json().encode()
+
+		params = {"start": start, "stops": sorted((task.id, task.latitude, task.longitude) for task in tasks)}
+		return await response_cache.get_or_compute("routes", params, compute, ttl=ROUTE_CACHE_TTL)
@@ -1,16 +1,17 @@
-from datetime import datetime
-from typing import Optional, List
+from datetime import datetime, date
+from typing import Optional, List, Any, Dict, Literal, Union, Annotated
 from uuid import UUID
 
-from pydantic import BaseModel, conlist, Field
+from pydantic import BaseModel, conlist, Field, computed_field, field_validator, model_validator, TypeAdapter
 
 from app.auth.schemas import UserModel
+from app.utils.dates import format_completion_date, format_planner_date, parse_planner_date
 
 
 class TaskBase(BaseModel):
 	dispatcher_name: str
 	address: str
-	planner_date: Optional[str] = None
+	planned_date: Optional[date] = None
 	job: Optional[str] = None
 	photos: Optional[List[str]] = Field(default=None, max_length=5)
 	comments: Optional[str] = None
@@ -22,19 +23,180 @@ class TaskRead(TaskBase):
 	voltage: Optional[float]
 	latitude: Optional[float] = None
 	longitude: Optional[float] = None
-	completion_date: Optional[str] = None
+	completed_at: Optional[datetime] = None
 	created_at: datetime
 	is_completed: bool
+	version: int = 1
+	claimed_by: Optional[UUID] = None
+	claim_expires_at: Optional[datetime] = None
 
 	worker: Optional[UserModel] = None
 
+	# Vues texte conservées pour les anciens clients (dashboard, application mobile)
+	@computed_field
+	@property
+	def completion_date(self) -> Optional[str]:
+		return format_completion_date(self.completed_at)
+
+	@computed_field
+	@property
+	def planner_date(self) -> Optional[str]:
+		return format_planner_date(self.planned_date)
+
+
+task_list_adapter = TypeAdapter(List[TaskRead])
+
+
+class TaskPoint(BaseModel):
+	"""Compact task marker for map views."""
+	id: int
+	latitude: float
+	longitude: float
+	dispatcher_name: str
+	address: str
+	work_type: Optional[str] = None
+	is_completed: bool
+	completed_at: Optional[datetime] = None
+	distance_m: Optional[float] = None
+
+
+class TaskRouteStop(BaseModel):
+	id: int
+	latitude: float
+	longitude: float
+	dispatcher_name: str
+	address: str
+	leg_m: float
+
+
+class TaskRoute(BaseModel):
+	total_m: float
+	stops: List[TaskRouteStop]
+
+
+class TaskCluster(BaseModel):
+	key: int
+	count: int
+	latitude: float
+	longitude: float
+	work_types: Dict[str, int]
+
+
+def encode_tasks(tasks) -> bytes:
+	"""Serialize ORM tasks to the JSON body of a `List[TaskRead]` response."""
+	return task_list_adapter.dump_json(task_list_adapter.validate_python(tasks, from_attributes=True))
+
 
 class TaskCreate(TaskBase):
 	work_type: str
 	voltage: float
 
+	@model_validator(mode="before")
+	@classmethod
+	def accept_legacy_planner_date(cls, data: Any) -> Any:
+		if isinstance(data, dict) and "planner_date" in data and "planned_date" not in data:
+			data = dict(data)
+			data["planned_date"] = parse_planner_date(data.pop("planner_date"))
+		return data
+
 
 
 class TaskUpdate(BaseModel):
 	photos: Optional[List[str]] = Field(default=None, min_length=2, max_length=5)
 	comments: Optional[str] = None
+	version: Optional[int] = None
+
+
+class TaskPurgeRead(BaseModel):
+	id: int
+	cleared_up_to_id: Optional[int] = None
+	requested_at: datetime
+	purged_up_to_id: Optional[int] = None
+	deleted_count: int
+	finished_at: Optional[datetime] = None
+
+
+TASK_BATCH_MAX_OPERATIONS = 200
+
+
+class TaskAdminUpdate(BaseModel):
+	dispatcher_name: Optional[str] = None
+	address: Optional[str] = None
+	planned_date: Optional[date] = None
+	work_type: Optional[str] = None
+	voltage: Optional[float] = None
+	job: Optional[str] = None
+	comments: Optional[str] = None
+	worker_id: Optional[UUID] = None
+
+
+class BatchCreateOperation(BaseModel):
+	op: Literal["create"]
+	task: TaskCreate
+
+
+class BatchCompleteOperation(TaskUpdate):
+	op: Literal["complete"]
+	task_id: int
+
+
+class BatchUpdateOperation(BaseModel):
+	op: Literal["update"]
+	task_id: int
+	changes: TaskAdminUpdate
+	version: Optional[int] = None
+
+
+class BatchDeleteOperation(BaseModel):
+	op: Literal["delete"]
+	task_id: int
+
+
+TaskBatchOperation = Annotated[
+	Union[BatchCreateOperation, BatchCompleteOperation, BatchUpdateOperation, BatchDeleteOperation],
+	Field(discriminator="op")
+]
+
+
+class TaskBatchRequest(BaseModel):
+	operations: List[TaskBatchOperation] = Field(min_length=1, max_length=TASK_BATCH_MAX_OPERATIONS)
+
+
+class TaskBatchResult(BaseModel):
+	index: int
+	op: str
+	ok: bool
+	task_id: Optional[int] = None
+	version: Optional[int] = None
+	error_code: Optional[str] = None
+
+
+# Taille maximale du corps d'une synchronisation, une fois décompressé
+TASK_SYNC_MAX_BODY = 4 * 1024 * 1024
+
+
+class TaskSyncItem(BatchCompleteOperation):
+	"""A completion recorded offline by the mobile application."""
+	op: Literal["complete"] = "complete"
+	key: str = Field(min_length=1, max_length=255)
+	photos: List[str] = Field(min_length=2, max_length=5)
+	completed_at: datetime
+
+	@field_validator("completed_at")
+	@classmethod
+	def to_server_time(cls, value: datetime) -> datetime:
+		# Les dates sont stockées sans fuseau, en heure locale du serveur
+		return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+
+
+class TaskSyncRequest(BaseModel):
+	items: List[TaskSyncItem] = Field(min_length=1, max_length=TASK_BATCH_MAX_OPERATIONS)
+
+
+class TaskSyncResult(BaseModel):
+	key: str
+	ok: bool
+	task_id: Optional[int] = None
+	version: Optional[int] = None
+	error_code: Optional[str] = None
+	replayed: Optional[bool] = None
@@ -1,132 +1,228 @@
-from datetime import datetime
+from datetime import datetime, date, time, timedelta
+from typing import Optional, List
 
+from sqlalchemy import insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from sqlmodel import select, desc, delete
-
-from app.db.models import Task
-from app.tasks.schemas import TaskCreate, TaskUpdate
+from sqlmodel import select, desc
+
+from app.db.models import Task, User
+from app.db.redis import response_cache
+from app.errors import TaskClaimed, TaskNotFound, TaskVersionConflict
+from app.tasks import partitions
+from app.tasks.claims import claim_available
+from app.tasks.purge import clear_tasks, live_tasks
+from app.tasks.schemas import TaskCreate, TaskUpdate, TaskRead, encode_tasks
 from app.tasks.utils import get_file_from_database
-from app.utils.get_lat_long import get_coordinates_from_photo
+from app.utils.coordinates import Coordinates
 from app.utils.photo_metadata import photo_metadata
 
 
 class TaskService:
 
 	async def get_all_tasks(self, session: AsyncSession):
-		statement = select(Task).where(Task.is_completed == False).order_by(desc(Task.created_at))
+		# completed_at IS NULL limite la lecture à la partition des tâches en attente
+		statement = (
+			select(Task)
+			.options(selectinload(Task.worker))
+			.where(Task.is_completed == False, Task.completed_at.is_(None), live_tasks())
+			.order_by(Task.created_at)
+		)
 
 		result = await session.execute(statement)
 
 		return result.scalars().all()
 
-	async def get_task(self, task_id: int, session: AsyncSession):
-		statement = select(Task).where(Task.id == task_id)
-		result = await session.execute(statement)
+	async def get_all_tasks_json(self, session: AsyncSession) -> bytes:
+		async def compute():
+			return encode_tasks(await self.get_all_tasks(session))
 
-		return result.scalar_one_or_none()
+		return await response_cache.get_or_compute("tasks", {"list": "pending"}, compute)
 
-	async def create_task_from_file(self, task_data: TaskCreate, session: AsyncSession):
+	async def get_tasks_completed_json(
+			self, session: AsyncSession,
+			completed_from: Optional[date] = None,
+			completed_to: Optional[date] = None
+	) -> bytes:
+		async def compute():
+			return encode_tasks(await self.get_tasks_completed(session, completed_from, completed_to))
 
-		task_data_dict = task_data.model_dump(exclude_unset=True)
-		new_task = Task(**task_data_dict)
+		params = {"list": "completed", "from": completed_from, "to": completed_to}
+		return await response_cache.get_or_compute("tasks", params, compute)
 
-		session.add(new_task)
+	async def get_task(self, task_id: int, session: AsyncSession):
+		statement = select(Task).where(Task.id == task_id, live_tasks())
+		result = await session.execute(statement)
 
-		await session.commit()
+		return result.scalar_one_or_none()
 
-		await session.refresh(new_task)
+	async def create_tasks_from_file(
+			self, tasks_data: List[TaskCreate], coordinates: List[Optional[Coordinates]], session: AsyncSession
+	) -> List[TaskRead]:
+		"""Insert the rows of an imported workbook in one statement and one transaction."""
+		if not tasks_data:
+			return []
+		rows = []
+		for task_data, found in zip(tasks_data, coordinates):
+			row = task_data.model_dump()
+			# Mêmes clés pour toutes les lignes de l'INSERT multi-lignes
+			row.update(
+				latitude=found.latitude if found else None,
+				longitude=found.longitude if found else None
+			)
+			rows.append(row)
+
+		# INSERT multi-lignes ; l'ordre du RETURNING suit celui des paramètres
+		stmt = insert(Task).returning(*Task.__table__.c, sort_by_parameter_order=True)
+		result = await session.execute(stmt, rows)
+		tasks = [TaskRead.model_validate(row, from_attributes=True) for row in result.mappings()]
 
-		return new_task
+		await session.commit()
+		await response_cache.invalidate("tasks")
+		return tasks
 
-	async def create_a_task(self, task_data: TaskCreate, username: str, session: AsyncSession):
-		coordinates = None
-		# Utiliser les deux premières photos pour obtenir les coordonnées
-		if task_data.photos and len(task_data.photos) >= 2:
-			coordinates = photo_metadata.get_coordinate_from_url(task_data.photos[0])
-			if not coordinates:
-				coordinates = photo_metadata.get_coordinate_from_url(task_data.photos[1])
+	async def create_a_task(self, task_data: TaskCreate, worker: User, session: AsyncSession) -> TaskRead:
+		task = await self.insert_task(task_data, worker, session)
+		await session.commit()
+		await response_cache.invalidate("tasks")
+		return task
 
+	async def insert_task(self, task_data: TaskCreate, worker: User, session: AsyncSession) -> TaskRead:
+		"""Write of `create_a_task`, left uncommitted in the caller's transaction."""
 		task_data_dict = task_data.model_dump()
-		new_task = Task(
-			**task_data_dict,
-			completion_date=datetime.now().strftime("%d-%m-%Y %H:%M"),
+		task_data_dict.update(
+			worker_id=worker.uid,
+			completed_at=datetime.now(),
 			is_completed=True
 		)
 
+		coordinates = await photo_metadata.get_coordinate_from_urls(task_data.photos)
 		if coordinates:
-			new_task.longitude = coordinates.longitude
-			new_task.latitude = coordinates.latitude
-
-		session.add(new_task)
-		await session.commit()
-		await session.refresh(new_task)
-		return new_task
+			task_data_dict["latitude"] = coordinates.latitude
+			task_data_dict["longitude"] = coordinates.longitude
 
+		# Un seul aller-retour : INSERT ... RETURNING
+		stmt = insert(Task).values(**task_data_dict).returning(*Task.__table__.c)
+		result = await session.execute(stmt)
+		row = result.mappings().one()
+		return TaskRead.model_validate({**row, "worker": worker}, from_attributes=True)
 
 	async def update_task(
 			self, task_id: int,
 			update_data: TaskUpdate,
-			session: AsyncSession,
-			username: str
-	):
-		task_to_update = await self.get_task(task_id, session)
-		if not task_to_update:
-			return None
+			worker: User,
+			session: AsyncSession
+	) -> TaskRead:
+		task = await self.apply_task_update(task_id, update_data, worker, session)
+		await session.commit()
+		await response_cache.invalidate("tasks")
+		return task
 
+	async def apply_task_update(
+			self, task_id: int,
+			update_data: TaskUpdate,
+			worker: User,
+			session: AsyncSession
+	) -> TaskRead:
+		"""Write of `update_task`, left uncommitted; rolls back and raises on conflict."""
 		update_data_dict = update_data.model_dump(exclude_unset=True)
+		expected_version = update_data_dict.pop("version", None)
 
-		# Gestion des coordonnées à partir des photos
-		coordinates = None
-		if 'photos' in update_data_dict and update_data_dict['photos']:
-			photos = update_data_dict['photos']
-			if len(photos) > 0:
-				coordinates = photo_metadata.get_coordinate_from_url(photos[0])
-			if not coordinates and len(photos) > 1:
-				coordinates = photo_metadata.get_coordinate_from_url(photos[1])
-
-			if coordinates:
-				update_data_dict['latitude'] = coordinates.latitude
-				update_data_dict['longitude'] = coordinates.longitude
-
-		# Mise à jour des champs
-		for key, value in update_data_dict.items():
-			setattr(task_to_update, key, value)
+		coordinates = await photo_metadata.get_coordinate_from_urls(update_data_dict.get("photos"))
+		if coordinates:
+			update_data_dict["latitude"] = coordinates.latitude
+			update_data_dict["longitude"] = coordinates.longitude
+
+		now = datetime.now()
+		update_data_dict.update(
+			worker_id=worker.uid,
+			completed_at=now,
+			is_completed=True,
+			version=Task.version + 1
+		)
 
-		task_to_update.supervisor = username
-		task_to_update.completion_date = datetime.now().strftime("%d-%m-%Y %H:%M")
-		task_to_update.is_completed = True
+		# Un seul aller-retour : UPDATE ... RETURNING, protégé par la version si fournie
+		# et par la réservation d'un autre worker
+		stmt = update(Task).where(Task.id == task_id, live_tasks(), claim_available(worker.uid, now))
+		if expected_version is not None:
+			stmt = stmt.where(Task.version == expected_version)
+		stmt = (
+			stmt.values(**update_data_dict)
+			.returning(*Task.__table__.c)
+			.execution_options(synchronize_session=False)
+		)
+		result = await session.execute(stmt)
+		row = result.mappings().one_or_none()
 
-		await session.commit()
-		await session.refresh(task_to_update)
-		return task_to_update
+		if row is None:
+			await session.rollback()
+			task = await self.get_task(task_id, session)
+			if task is None:
+				raise TaskNotFound(f"Task {task_id} not found")
+			if task.claimed_by not in (None, worker.uid) and task.claim_expires_at >= now:
+				raise TaskClaimed(f"Task {task_id} is claimed by another worker")
+			raise TaskVersionConflict(f"Task {task_id} is no longer at version {expected_version}")
 
+		return TaskRead.model_validate({**row, "worker": worker}, from_attributes=True)
 
 	async def task_delete(self, task_id: int, session: AsyncSession):
-		task_to_delete = await self.get_task(task_id, session)
-
-		if task_to_delete is not None:
-			await session.delete(task_to_delete)
-
-			await session.commit()
-
-			return {}
-		else:
-			return None
-
-	async def tasks_delete(self, session: AsyncSession):
-		statement = delete(Task)
-		await session.execute(statement)
+		# Suppression logique ; la purge physique se fait en tâche de fond
+		stmt = (
+			update(Task)
+			.where(Task.id == task_id, live_tasks())
+			.values(deleted_at=datetime.now())
+			.returning(Task.id)
+			.execution_options(synchronize_session=False)
+		)
+		result = await session.execute(stmt)
+		if result.scalar_one_or_none() is None:
+			raise TaskNotFound(f"Task {task_id} not found")
 		await session.commit()
-		return  {}
+		await response_cache.invalidate("tasks")
+		return {}
 
-	async def get_tasks_completed(self, session: AsyncSession):
+	async def tasks_delete(self, session: AsyncSession):
+		purge = await clear_tasks(session)
+		await response_cache.invalidate("tasks")
+		return purge
+
+	async def get_tasks_completed(
+			self, session: AsyncSession,
+			completed_from: Optional[date] = None,
+			completed_to: Optional[date] = None
+	):
 		stmt = (
 			select(Task)
 			.options(selectinload(Task.worker))  # charge le worker
-			.where(Task.is_completed == True)
-			.order_by(desc(Task.created_at))
+			.where(Task.is_completed == True, live_tasks())
+			.order_by(desc(Task.completed_at))
 		)
+		# Bornes inclusives, appliquées sur l'index de completed_at
+		if completed_from:
+			stmt = stmt.where(Task.completed_at >= datetime.combine(completed_from, time.min))
+		if completed_to:
+			stmt = stmt.where(Task.completed_at < datetime.combine(completed_to + timedelta(days=1), time.min))
 		result = await session.execute(stmt)
 		tasks = result.scalars().all()
 		return tasks
+
+	async def get_archived_months(self, session: AsyncSession) -> List[date]:
+		conn = await session.connection()
+		return await partitions.archived_months(conn)
+
+	async def get_archived_tasks(self, month: date, session: AsyncSession) -> List[TaskRead]:
+		conn = await session.connection()
+		if month not in await partitions.archived_months(conn):
+			return []
+		archived = partitions.archived_table(month)
+		stmt = (
+			select(archived, User)
+			.outerjoin(User, User.uid == archived.c.worker_id)
+			.where(live_tasks(archived.c))
+			.order_by(desc(archived.c.completed_at))
+		)
+		result = await session.execute(stmt)
+		return [
+			TaskRead.model_validate({**row._mapping, "worker": row.User}, from_attributes=True)
+			for row in result
+		]
@@ -0,0 +1,94 @@
+import math
+from typing import List, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Task
+from app.tasks.purge import live_tasks
+from app.tasks.schemas import TaskPoint
+from app.utils.geo import boxes_around, cell_ranges, haversine_m, split_antimeridian
+
+NEAR_MAX_RADIUS_M = 50_000
+# Candidats lus, par ordre de distance approchée, avant l'affinage exact : la marge couvre
+# l'écart entre distance équirectangulaire et haversine
+NEAR_CANDIDATE_FACTOR = 2
+NEAR_MAX_CANDIDATES = 50_000
+POINTS_MAX_LIMIT = 5_000
+
+POINT_COLUMNS = (
+	Task.id, Task.latitude, Task.longitude, Task.dispatcher_name, Task.address,
+	Task.work_type, Task.is_completed, Task.completed_at,
+)
+task_point_adapter = TypeAdapter(List[TaskPoint])
+
+
+def in_boxes(boxes):
+	"""Index-backed filter on `tasks.cell`, then the exact box on latitude / longitude."""
+	return or_(*(
+		Task.cell.between(low, high)
+		& Task.latitude.between(south, north)
+		& Task.longitude.between(west, east)
+		for south, west, north, east in boxes
+		for low, high in cell_ranges(south, west, north, east)
+	))
+
+
+def approx_distance(latitude: float, longitude: float):
+	"""Squared equirectangular distance in degrees, for ordering only; wraps at ±180°."""
+	dlon = func.abs(Task.longitude - longitude)
+	dlon = func.least(dlon, 360 - dlon)
+	cos_lat = math.cos(math.radians(latitude))
+	return func.power(Task.latitude - latitude, 2) + func.power(dlon * cos_lat, 2)
+
+
+def by_status(stmt, completed: Optional[bool]):
+	if completed is True:
+		return stmt.where(Task.completed_at.is_not(None))
+	if completed is False:
+		# completed_at IS NULL limite la lecture à la partition des tâches en attente
+		return stmt.where(Task.completed_at.is_(None))
+	return stmt
+
+
+class TaskSpatialService:
+	"""Map queries over task coordinates, served from the `cell` index."""
+
+	async def near(
+			self, latitude: float, longitude: float, radius_m: float, limit: int,
+			completed: Optional[bool], session: AsyncSession
+	) -> bytes:
+		# Les plus proches d'abord : même une zone dense ne tronque que les plus éloignés
+		stmt = (
+			select(*POINT_COLUMNS)
+			.where(in_boxes(boxes_around(latitude, longitude, radius_m)), live_tasks())
+			.order_by(approx_distance(latitude, longitude))
+			.limit(min(limit * NEAR_CANDIDATE_FACTOR, NEAR_MAX_CANDIDATES))
+		)
+		rows = (await session.execute(by_status(stmt, completed))).all()
+		if not rows:
+			return b"[]"
+
+		# Affinage vectorisé : distance exacte, rayon puis tri des plus proches
+		distances = haversine_m(latitude, longitude, [row.latitude for row in rows], [row.longitude for row in rows])
+		inside = (distances <= radius_m).nonzero()[0]
+		nearest = inside[distances[inside].argsort(kind="stable")[:limit]]
+		points = [
+			TaskPoint(**rows[i]._mapping, distance_m=round(float(distances[i]), 1))
+			for i in nearest
+		]
+		return task_point_adapter.dump_json(points, exclude_none=True)
+
+	async def in_bbox(
+			self, south: float, west: float, north: float, east: float, limit: int,
+			completed: Optional[bool], session: AsyncSession
+	) -> bytes:
+		stmt = (
+			select(*POINT_COLUMNS)
+			.where(in_boxes(split_antimeridian(south, west, north, east)), live_tasks())
+			.limit(limit)
+		)
+		rows = (await session.execute(by_status(stmt, completed))).all()
+		points = [TaskPoint(**row._mapping) for row in rows]
+		return task_point_adapter.dump_json(points, exclude_none=True)
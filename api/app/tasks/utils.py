@@ -1,14 +1,17 @@
 from io import BytesIO
-from typing import List
-
-from openpyxl.workbook import Workbook
-from openpyxl.worksheet.worksheet import Worksheet
-from openpyxl.styles import Alignment, Font, PatternFill
+from typing import TYPE_CHECKING, List
 
 from app.db.models import Task
+from app.errors import InvalidPlannerDate
+from app.tasks.schemas import TaskCreate
+from app.utils.dates import format_completion_date, format_planner_date, parse_planner_date
+
+# openpyxl est importé dans les fonctions : seul l'export Excel en paie le coût
+if TYPE_CHECKING:
+	from openpyxl.worksheet.worksheet import Worksheet
 
 
-def draw_report_header(worksheet: Worksheet) -> None:
+def draw_report_header(worksheet: "Worksheet") -> None:
 	headers = [
 		"№", "Тип работ", "Диспетчерское наименование ОЭСХ", "Адрес объекта",
 		"Дата работ по плану", "Класс напряжения, кВ", "Работы",
@@ -21,7 +24,9 @@ def draw_report_header(worksheet: Worksheet) -> None:
 	set_column_sizes(worksheet)
 
 
-def set_header_row(worksheet: Worksheet, headers: list[str]) -> None:
+def set_header_row(worksheet: "Worksheet", headers: list[str]) -> None:
+	from openpyxl.styles import Alignment, Font
+
 	alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
 	bold_font = Font(bold=True)
 
@@ -33,7 +38,7 @@ def set_header_row(worksheet: Worksheet, headers: list[str]) -> None:
 	worksheet.row_dimensions[1].height = 30
 
 
-def set_column_sizes(worksheet: Worksheet) -> None:
+def set_column_sizes(worksheet: "Worksheet") -> None:
 	column_widths = {
 		"A": 10, "B": 30, "C": 30, "D": 30, "E": 30,
 		"F": 20, "G": 30, "H": 30, "I": 20, "J": 20,
@@ -48,6 +53,9 @@ def set_column_sizes(worksheet: Worksheet) -> None:
 
 
 def get_file_from_database(tasks: List[Task]) -> BytesIO:
+	from openpyxl.styles import Alignment, Font
+	from openpyxl.workbook import Workbook
+
 	workbook = Workbook()
 	worksheet = workbook.active
 	draw_report_header(worksheet)
@@ -61,10 +69,10 @@ def get_file_from_database(tasks: List[Task]) -> BytesIO:
 			task.work_type,
 			task.dispatcher_name,
 			task.address,
-			task.planner_date,
+			format_planner_date(task.planned_date),
 			task.voltage,
 			task.job,
-			task.completion_date,
+			format_completion_date(task.completed_at),
 			task.latitude,
 			task.longitude,
 		]
@@ -99,4 +107,40 @@ def get_file_from_database(tasks: List[Task]) -> BytesIO:
 	buffer = BytesIO()
 	workbook.save(buffer)
 	buffer.seek(0)
-	return buffer
\ No newline at end of file
+	return buffer
+
+
+def read_tasks_from_workbook(content: bytes) -> List[TaskCreate]:
+	"""Parse an uploaded planning workbook; data rows start at row 3.
+
+	Raises InvalidPlannerDate listing every row whose planner date cannot be parsed, so
+	nothing is imported with its date silently dropped.
+	"""
+	# openpyxl n'est chargé qu'au premier import de fichier, pas au démarrage des workers
+	from openpyxl.reader.excel import load_workbook
+
+	workbook = load_workbook(BytesIO(content))
+	sheet = workbook.active
+	tasks = []
+	invalid_dates = []
+	for row in range(3, sheet.max_row + 1):
+		try:
+			planned_date = parse_planner_date(sheet.cell(row=row, column=5).value)
+		except ValueError:
+			invalid_dates.append(f"row {row}: {sheet.cell(row=row, column=5).value!r}")
+			continue
+		tasks.append(TaskCreate(
+			work_type=str(sheet.cell(row=row, column=2).value) if sheet.cell(row=row, column=2).value else None,
+			dispatcher_name=str(sheet.cell(row=row, column=3).value) if sheet.cell(row=row, column=3).value else None,
+			address=str(sheet.cell(row=row, column=4).value) if sheet.cell(row=row, column=4).value else None,
+			planned_date=planned_date,
+			voltage=sheet.cell(row=row, column=7).value if sheet.cell(row=row, column=7).value else None,
+			job=str(sheet.cell(row=row, column=8).value) if sheet.cell(row=row, column=8).value else None,
+			latitude=None,
+			longitude=None,
+			photos=[],
+			comments=None
+		))
+	if invalid_dates:
+		raise InvalidPlannerDate(f"Unrecognised planner dates: {', '.join(invalid_dates)}")
+	return tasks
@@ -0,0 +1,58 @@
+import re
+
+# Abréviations courantes des adresses russes, développées pour que « ул. Ленина » et
+# « улица Ленина » donnent les mêmes trigrammes
+ABBREVIATIONS = {
+	"ул": "улица",
+	"пр-т": "проспект", "пр-кт": "проспект", "просп": "проспект", "пркт": "проспект",
+	"пр": "проезд", "пр-д": "проезд",
+	"пер": "переулок",
+	"б-р": "бульвар", "бул": "бульвар", "бр": "бульвар",
+	"ш": "шоссе",
+	"наб": "набережная",
+	"пл": "площадь",
+	"туп": "тупик",
+	"мкр": "микрорайон", "мкрн": "микрорайон", "мкр-н": "микрорайон", "м-н": "микрорайон",
+	"обл": "область",
+	"р-н": "район", "р-он": "район",
+	"пос": "поселок", "п": "поселок", "пгт": "поселок", "рп": "поселок",
+	"с": "село",
+	"дер": "деревня",
+	"корп": "корпус", "к": "корпус",
+	"стр": "строение",
+	"кв": "квартира",
+	"тер": "территория",
+}
+
+# Mots qui n'aident pas à distinguer deux adresses
+NOISE = {"г", "гор", "город", "д", "дом", "россия", "российская", "федерация", "рф"}
+
+_SEPARATORS = re.compile(r"[^\w\-/]+")
+_POSTCODE = re.compile(r"^\d{6}$")
+_HOUSE_BUILDING = re.compile(r"^(\d+\w?)(к|корп|стр|с)(\d+)$")
+# Suffixes collés au numéro : « с » y désigne un строение, pas un село
+HOUSE_SUFFIXES = {"к": "корпус", "корп": "корпус", "стр": "строение", "с": "строение"}
+
+
+def normalize_address(address: str) -> str:
+	"""Canonical form of a Russian address for trigram matching.
+
+	Lowercases, folds ё into е, splits on punctuation, expands abbreviations and drops
+	postcodes and words that carry no location ("г.", "д.", "Россия"). A "д." followed
+	by a word rather than a house number is read as "деревня".
+	"""
+	tokens = [token.strip("-/") for token in _SEPARATORS.split(address.lower().replace("ё", "е"))]
+	tokens = [token for token in tokens if token]
+	words = []
+	for position, token in enumerate(tokens):
+		following = tokens[position + 1] if position + 1 < len(tokens) else ""
+		if token == "д" and following and not following[0].isdigit():
+			words.append("деревня")
+		elif token in NOISE or _POSTCODE.match(token):
+			continue
+		elif match := _HOUSE_BUILDING.match(token):
+			# « 5к2 » : numéro, puis corps ou bâtiment
+			words += [match.group(1), HOUSE_SUFFIXES[match.group(2)], match.group(3)]
+		else:
+			words.append(ABBREVIATIONS.get(token, token))
+	return " ".join(words)
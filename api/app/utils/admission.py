@@ -0,0 +1,273 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+import uuid
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from enum import IntEnum
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from prometheus_client import Counter, Gauge
+from redis.exceptions import RedisError
+
+from app.auth.utils import decode_token
+from app.config import settings
+from app.db.redis import response_cache
+from app.errors import ServiceOverloaded
+
+logger = logging.getLogger(__name__)
+
+SLOT_KEY_PREFIX = "tec-bloc:admission"
+SLOT_LEASE_SECONDS = 60
+SLOT_POLL_INTERVAL = 0.1
+
+# Purge des baux expirés puis prise d'un créneau si la limite le permet, en une étape
+_ACQUIRE_SLOT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[3]) then
+	redis.call('ZADD', KEYS[1], ARGV[2], ARGV[4])
+	redis.call('EXPIRE', KEYS[1], ARGV[5])
+	return 1
+end
+return 0
+"""
+
+ADMISSION_WAITING = Gauge(
+	"admission_waiting", "Requests queued for an admission slot", ["limit"], multiprocess_mode="livesum"
+)
+ADMISSION_ACTIVE = Gauge(
+	"admission_active", "Requests holding an admission slot", ["limit"], multiprocess_mode="livesum"
+)
+ADMISSION_REJECTED = Counter(
+	"admission_rejected_total", "Requests rejected with 503 by admission control", ["limit", "reason"]
+)
+
+
+class Priority(IntEnum):
+	INTERACTIVE = 0  # complétions et créations depuis l'application mobile
+	BULK = 1  # imports / exports Excel de l'administration
+
+
+class PriorityGate:
+	"""Counting semaphore with a bounded, priority-ordered wait queue.
+
+	Interactive callers may use every slot; bulk callers only `capacity - reserved`, and
+	never overtake a queued interactive caller.
+	"""
+
+	def __init__(self, capacity: int, reserved: int = 0):
+		self.capacity = capacity
+		self.reserved = reserved
+		self.in_use = 0
+		self.waiting = 0
+		self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+		self._seq = itertools.count()
+
+	def _limit(self, priority: Priority) -> int:
+		return self.capacity if priority == Priority.INTERACTIVE else self.capacity - self.reserved
+
+	def _can_enter(self, priority: Priority) -> bool:
+		self._drop_abandoned()
+		if self._waiters and self._waiters[0][0] <= priority:
+			return False
+		return self.in_use < self._limit(priority)
+
+	def _drop_abandoned(self) -> None:
+		while self._waiters and self._waiters[0][2].done():
+			heapq.heappop(self._waiters)
+
+	async def acquire(self, priority: Priority, timeout: float, max_waiting: int) -> bool:
+		"""Take a slot; False when the queue is full or the wait times out."""
+		if self._can_enter(priority):
+			self.in_use += 1
+			return True
+		if self.waiting >= max_waiting:
+			return False
+
+		future = asyncio.get_running_loop().create_future()
+		heapq.heappush(self._waiters, (priority, next(self._seq), future))
+		self.waiting += 1
+		try:
+			await asyncio.wait_for(asyncio.shield(future), timeout)
+			return True
+		except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+			if future.done() and not future.cancelled():
+				# Le créneau a été attribué au moment de l'expiration : on le rend
+				self.release()
+			else:
+				future.cancel()
+			if isinstance(e, asyncio.CancelledError):
+				raise
+			return False
+		finally:
+			self.waiting -= 1
+
+	def release(self) -> None:
+		self.in_use -= 1
+		self._drop_abandoned()
+		while self._waiters:
+			priority, _, future = self._waiters[0]
+			if future.done():
+				heapq.heappop(self._waiters)
+				continue
+			if self.in_use >= self._limit(priority):
+				break
+			heapq.heappop(self._waiters)
+			self.in_use += 1
+			future.set_result(None)
+
+
+class SharedSlots:
+	"""Slots counted in Redis, so that a limit holds across every worker process.
+
+	A holder is a member of a sorted set scored by its lease expiry; the lease is renewed
+	while the request runs, so the slots of a crashed worker free themselves. Without Redis,
+	or when it fails, acquisition succeeds and only the per-worker limits apply.
+	"""
+
+	def __init__(self):
+		self._script = None
+		self._renewals: Dict[Tuple[str, str], asyncio.Task] = {}
+
+	def _acquire_script(self):
+		client = response_cache.client
+		if client is None:
+			return None
+		if self._script is None:
+			self._script = client.register_script(_ACQUIRE_SLOT)
+		return self._script
+
+	async def acquire(self, name: str, limit: int, holder: str, timeout: float) -> bool:
+		"""Take one of `limit` slots of `name`, polling for at most `timeout` seconds."""
+		script = self._acquire_script()
+		if script is None:
+			return True
+		key = f"{SLOT_KEY_PREFIX}:{name}"
+		deadline = time.monotonic() + timeout
+		while True:
+			now = time.time()
+			try:
+				acquired = await script(
+					keys=[key], args=[now, now + SLOT_LEASE_SECONDS, limit, holder, SLOT_LEASE_SECONDS * 2]
+				)
+			except RedisError as e:
+				logger.warning("Shared admission slots unavailable, using per-worker limits: %s", e)
+				return True
+			if acquired:
+				self._renewals[(key, holder)] = asyncio.create_task(self._renew(key, holder))
+				return True
+			if time.monotonic() + SLOT_POLL_INTERVAL > deadline:
+				return False
+			await asyncio.sleep(SLOT_POLL_INTERVAL)
+
+	async def release(self, name: str, holder: str) -> None:
+		key = f"{SLOT_KEY_PREFIX}:{name}"
+		renewal = self._renewals.pop((key, holder), None)
+		if renewal is None:
+			return
+		renewal.cancel()
+		try:
+			await response_cache.client.zrem(key, holder)
+		except RedisError as e:
+			logger.warning("Shared admission slot release failed, it expires with its lease: %s", e)
+
+	async def _renew(self, key: str, holder: str) -> None:
+		while True:
+			await asyncio.sleep(SLOT_LEASE_SECONDS / 3)
+			try:
+				await response_cache.client.zadd(key, {holder: time.time() + SLOT_LEASE_SECONDS}, xx=True)
+			except RedisError as e:
+				logger.warning("Shared admission lease renewal failed: %s", e)
+
+
+# Créneaux partagés par toutes les routes limitées d'un worker : ils protègent ses propres
+# ressources (pool, boucle) et restent donc locaux
+admission_gate = PriorityGate(settings.admission_capacity, settings.admission_reserved)
+shared_slots = SharedSlots()
+
+
+def caller_key(request: Request) -> str:
+	"""The user behind the request when it carries a valid token, its client address otherwise."""
+	scheme, _, token = request.headers.get("authorization", "").partition(" ")
+	if scheme.lower() == "bearer" and token:
+		payload = decode_token(token)
+		if payload and payload.get("user", {}).get("user_uid"):
+			return payload["user"]["user_uid"]
+	return request.client.host if request.client else "unknown"
+
+
+class ConcurrencyLimit:
+	"""Route dependency bounding concurrent executions.
+
+	`limit` caps the route across users and `per_user` per caller. Both hold across all
+	workers through `shared_slots`, on top of a local gate that keeps this worker's waiters
+	in priority order. They are enforced before the shared admission gate, which orders
+	waiters by `priority`. Over-limit callers wait at most `timeout` seconds in a queue of
+	`queue` entries, then get 503 with Retry-After.
+	"""
+
+	def __init__(
+			self, name: str, priority: Priority,
+			limit: Optional[int] = None, per_user: Optional[int] = None,
+			queue: int = 0, timeout: float = 5.0, retry_after: int = 10,
+			gate: PriorityGate = admission_gate,
+	):
+		self.name = name
+		self.priority = priority
+		self.limit = limit
+		self.per_user = per_user
+		self.queue = queue
+		self.timeout = timeout
+		self.retry_after = retry_after
+		self.gate = gate
+		self._route = PriorityGate(limit) if limit is not None else None
+		self._by_user: Dict[str, int] = defaultdict(int)
+
+	def _reject(self, reason: str) -> ServiceOverloaded:
+		ADMISSION_REJECTED.labels(self.name, reason).inc()
+		return ServiceOverloaded(f"Too many concurrent {self.name} requests, retry later", self.retry_after)
+
+	def _leave(self, key: str) -> None:
+		self._by_user[key] -= 1
+		if not self._by_user[key]:
+			del self._by_user[key]
+
+	async def __call__(self, request: Request) -> AsyncIterator[None]:
+		key = caller_key(request)
+		if self.per_user is not None and self._by_user[key] >= self.per_user:
+			raise self._reject("per_user")
+
+		holder = uuid.uuid4().hex
+		async with AsyncExitStack() as stack:
+			self._by_user[key] += 1
+			stack.callback(self._leave, key)
+			if self.per_user is not None:
+				user_slots = f"{self.name}:user:{key}"
+				if not await shared_slots.acquire(user_slots, self.per_user, holder, timeout=0):
+					raise self._reject("per_user")
+				stack.push_async_callback(shared_slots.release, user_slots, holder)
+
+			waiting = ADMISSION_WAITING.labels(self.name)
+			waiting.inc()
+			try:
+				deadline = time.monotonic() + self.timeout
+				if self._route is not None:
+					if not await self._route.acquire(self.priority, self.timeout, self.queue):
+						raise self._reject("route")
+					stack.callback(self._route.release)
+					if not await shared_slots.acquire(self.name, self.limit, holder, deadline - time.monotonic()):
+						raise self._reject("route")
+					stack.push_async_callback(shared_slots.release, self.name, holder)
+				if not await self.gate.acquire(self.priority, max(0.0, deadline - time.monotonic()), self.queue):
+					raise self._reject("gate")
+				stack.callback(self.gate.release)
+			finally:
+				waiting.dec()
+
+			active = ADMISSION_ACTIVE.labels(self.name)
+			active.inc()
+			stack.callback(active.dec)
+			yield
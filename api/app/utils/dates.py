@@ -0,0 +1,49 @@
+from datetime import date, datetime
+from typing import Any, Optional
+
+COMPLETION_DATE_FORMAT = "%d-%m-%Y %H:%M"
+PLANNER_DATE_FORMAT = "%d.%m.%Y"
+
+# Formats rencontrés dans les fichiers Excel importés et dans l'ancienne colonne texte
+PLANNER_DATE_INPUT_FORMATS = (
+	"%Y-%m-%d %H:%M:%S",
+	"%Y-%m-%d",
+	"%d.%m.%Y",
+	"%d-%m-%Y",
+	"%d/%m/%Y",
+	"%d.%m.%y",
+)
+
+
+def format_completion_date(value: Optional[datetime]) -> Optional[str]:
+	"""Legacy string view of `Task.completed_at`."""
+	return value.strftime(COMPLETION_DATE_FORMAT) if value else None
+
+
+def format_planner_date(value: Optional[date]) -> Optional[str]:
+	"""Legacy string view of `Task.planned_date`."""
+	return value.strftime(PLANNER_DATE_FORMAT) if value else None
+
+
+def parse_planner_date(value: Any) -> Optional[date]:
+	"""Parse a planner date coming from Excel or from the legacy free-text field.
+
+	Blank values give None; text in none of `PLANNER_DATE_INPUT_FORMATS` raises ValueError
+	rather than being dropped.
+	"""
+	if value is None:
+		return None
+	if isinstance(value, datetime):
+		return value.date()
+	if isinstance(value, date):
+		return value
+
+	text = str(value).strip()
+	if not text:
+		return None
+	for fmt in PLANNER_DATE_INPUT_FORMATS:
+		try:
+			return datetime.strptime(text, fmt).date()
+		except ValueError:
+			continue
+	raise ValueError(f"unrecognised planner date {text!r}")
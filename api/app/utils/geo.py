@@ -0,0 +1,111 @@
+import math
+from typing import TYPE_CHECKING, List, Sequence, Tuple
+
+if TYPE_CHECKING:
+	import numpy as np
+
+EARTH_RADIUS_M = 6_371_008.8
+
+# Cellule Morton : longitude et latitude quantifiées sur 26 bits chacune puis entrelacées
+# (longitude sur les bits pairs). Doit rester identique à la fonction SQL geo_cell().
+CELL_BITS = 26
+CELL_SIDE = 1 << CELL_BITS
+
+Range = Tuple[int, int]
+
+
+def _quantize(value: float, low: float, span: float) -> int:
+	return min(max(int(math.floor((value - low) / span * CELL_SIDE)), 0), CELL_SIDE - 1)
+
+
+def _spread(value: int) -> int:
+	value &= 0xFFFFFFFF
+	value = (value | (value << 16)) & 0x0000FFFF0000FFFF
+	value = (value | (value << 8)) & 0x00FF00FF00FF00FF
+	value = (value | (value << 4)) & 0x0F0F0F0F0F0F0F0F
+	value = (value | (value << 2)) & 0x3333333333333333
+	value = (value | (value << 1)) & 0x5555555555555555
+	return value
+
+
+def interleave(x: int, y: int) -> int:
+	return _spread(x) | (_spread(y) << 1)
+
+
+def grid_xy(latitude: float, longitude: float) -> Tuple[int, int]:
+	return _quantize(longitude, -180.0, 360.0), _quantize(latitude, -90.0, 180.0)
+
+
+def geo_cell(latitude: float, longitude: float) -> int:
+	"""Morton code of a point, as stored in `tasks.cell`."""
+	return interleave(*grid_xy(latitude, longitude))
+
+
+def bbox_around(latitude: float, longitude: float, radius_m: float) -> Tuple[float, float, float, float]:
+	"""(south, west, north, east) of the box enclosing a circle of `radius_m` metres.
+
+	Longitudes wrap: near the 180th meridian west > east (see `split_antimeridian`).
+	"""
+	dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+	cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+	dlon = math.degrees(radius_m / (EARTH_RADIUS_M * cos_lat))
+	south, north = max(latitude - dlat, -90.0), min(latitude + dlat, 90.0)
+	if dlon >= 180.0:
+		return south, -180.0, north, 180.0
+	west, east = longitude - dlon, longitude + dlon
+	# Tchoukotka : le cercle déborde sur l'autre côté du 180e méridien
+	if west < -180.0:
+		west += 360.0
+	if east > 180.0:
+		east -= 360.0
+	return south, west, north, east
+
+
+def boxes_around(latitude: float, longitude: float, radius_m: float) -> List[Tuple[float, float, float, float]]:
+	"""`bbox_around` as one or two boxes that do not cross the 180th meridian."""
+	return split_antimeridian(*bbox_around(latitude, longitude, radius_m))
+
+
+def split_antimeridian(south: float, west: float, north: float, east: float) -> List[Tuple[float, float, float, float]]:
+	"""A box crossing the 180th meridian (west > east) as two boxes that do not."""
+	if west <= east:
+		return [(south, west, north, east)]
+	return [(south, west, north, 180.0), (south, -180.0, north, east)]
+
+
+def haversine_m(latitude: float, longitude: float, latitudes: Sequence[float], longitudes: Sequence[float]) -> "np.ndarray":
+	"""Great-circle distances in metres from one point to arrays of points."""
+	import numpy as np
+
+	lat1 = math.radians(latitude)
+	lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+	dlon = np.radians(np.asarray(longitudes, dtype=np.float64) - longitude)
+	a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+	return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def cell_ranges(south: float, west: float, north: float, east: float, max_cells: int = 16) -> List[Range]:
+	"""Inclusive `tasks.cell` ranges covering a bounding box.
+
+	The box is covered by at most `max_cells` aligned grid cells, picked at the finest
+	level that allows it; each cell is one contiguous run of Morton codes, and adjacent
+	runs are merged. The cover is a superset: callers still filter on the exact box.
+	"""
+	x0, y0 = grid_xy(south, west)
+	x1, y1 = grid_xy(north, east)
+	shift = 0
+	while ((x1 >> shift) - (x0 >> shift) + 1) * ((y1 >> shift) - (y0 >> shift) + 1) > max_cells:
+		shift += 1
+
+	ranges = sorted(
+		(interleave(cx, cy) << (2 * shift), ((interleave(cx, cy) + 1) << (2 * shift)) - 1)
+		for cx in range(x0 >> shift, (x1 >> shift) + 1)
+		for cy in range(y0 >> shift, (y1 >> shift) + 1)
+	)
+	merged = [ranges[0]]
+	for low, high in ranges[1:]:
+		if low == merged[-1][1] + 1:
+			merged[-1] = (merged[-1][0], high)
+		else:
+			merged.append((low, high))
+	return merged
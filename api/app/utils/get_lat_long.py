@@ -1,23 +1,20 @@
 from exif import Image
 
+from app.utils.http_client import http_pool
+
 
 async def get_coordinates_from_photo(photo_url: str):
     """
     	Download Image from URL and extract coordinates.
     """
-    import aiohttp
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(photo_url) as resp:
-            if resp.status == 200:
-                photo_bytes = await resp.read()
-
-                img = Image(photo_bytes)
-                if img.has_exif:
-                    if img.gps_latitude and img.gps_longitude:
-                        latitude = convert_to_decimal(img.gps_latitude, img.gps_latitude_ref)
-                        longitude = convert_to_decimal(img.gps_longitude, img.gps_longitude_ref)
-                        return latitude, longitude
+    resp = await http_pool.client.get(photo_url)
+    if resp.status_code == 200:
+        img = Image(resp.content)
+        if img.has_exif:
+            if img.gps_latitude and img.gps_longitude:
+                latitude = convert_to_decimal(img.gps_latitude, img.gps_latitude_ref)
+                longitude = convert_to_decimal(img.gps_longitude, img.gps_longitude_ref)
+                return latitude, longitude
     return None, None
 
 def convert_to_decimal(gps_data, ref):
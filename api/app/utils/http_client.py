@@ -0,0 +1,40 @@
+from typing import Optional
+
+import httpx
+
+from app.config import settings
+
+
+class HttpClientPool:
+	"""One keep-alive HTTP client per worker, used to fetch task photos.
+
+	The lifespan opens and closes it; code running outside the app (CLI) gets a
+	client created on first use.
+	"""
+
+	def __init__(self):
+		self._client: Optional[httpx.AsyncClient] = None
+
+	@property
+	def client(self) -> httpx.AsyncClient:
+		if self._client is None:
+			self._client = httpx.AsyncClient(
+				timeout=httpx.Timeout(settings.http_timeout),
+				limits=httpx.Limits(
+					max_connections=settings.http_max_connections,
+					max_keepalive_connections=settings.http_max_connections,
+				),
+				follow_redirects=True,
+			)
+		return self._client
+
+	async def start(self) -> None:
+		self.client
+
+	async def close(self) -> None:
+		if self._client is not None:
+			await self._client.aclose()
+			self._client = None
+
+
+http_pool = HttpClientPool()
@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy import column, delete, func, select, text, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.main import engine
+from app.db.models import IdempotencyKey
+from app.errors import IdempotencyKeyMismatch
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_LOCK_TIMEOUT = "30s"
+IDEMPOTENCY_PURGE_LOCK_KEY = 0x69646d70  # un seul worker purge les clés expirées à la fois
+IDEMPOTENCY_PURGE_INTERVAL = 3600
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def request_fingerprint(method: str, path: str, payload: BaseModel) -> str:
+	return hashlib.sha256(f"{method} {path} {payload.model_dump_json()}".encode()).hexdigest()
+
+
+class IdempotencyKeys:
+	"""Run an operation at most once per (user, Idempotency-Key).
+
+	The key row is inserted in the caller's transaction, the operation writes in that same
+	transaction and its response is stored before the single commit: the task and its key
+	become visible together or not at all. A concurrent duplicate blocks on the row lock
+	and then reads the stored response instead of running the operation again. If the
+	operation fails the transaction, key included, is rolled back and the client may retry
+	with the same key. Expired rows are reclaimed on reuse and purged every
+	`IDEMPOTENCY_PURGE_INTERVAL` seconds by each API worker once `start` is called.
+	"""
+
+	def __init__(self):
+		self._purger: Optional[asyncio.Task] = None
+
+	def start(self) -> None:
+		self._purger = asyncio.create_task(self._purge_periodically())
+
+	async def stop(self) -> None:
+		if self._purger is not None:
+			self._purger.cancel()
+			self._purger = None
+
+	async def run(
+			self, session: AsyncSession, user_id: uuid.UUID, key: str, request_hash: str,
+			compute: Callable[[], Awaitable[Tuple[int, bytes]]]
+	) -> Tuple[int, bytes, bool]:
+		await session.execute(text(f"SET LOCAL lock_timeout = '{IDEMPOTENCY_LOCK_TIMEOUT}'"))
+		expires_at = datetime.now() + timedelta(hours=settings.idempotency_ttl_hours)
+		stmt = insert(IdempotencyKey).values(
+			user_id=user_id, key=key, request_hash=request_hash, expires_at=expires_at
+		)
+		stmt = stmt.on_conflict_do_update(
+			index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+			set_={"request_hash": request_hash, "status_code": None, "response": None, "expires_at": expires_at},
+			where=IdempotencyKey.expires_at < func.now(),
+		).returning(IdempotencyKey.key)
+		claimed = (await session.execute(stmt)).first()
+
+		if claimed is None:
+			# Le premier appel est terminé (l'INSERT attendait son verrou) : on rejoue sa réponse
+			stored = (await session.execute(
+				select(IdempotencyKey.request_hash, IdempotencyKey.status_code, IdempotencyKey.response)
+				.where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+			)).one()
+			await session.rollback()
+			if stored.request_hash != request_hash:
+				raise IdempotencyKeyMismatch(f"Idempotency key {key} was used for a different request")
+			return stored.status_code, stored.response, True
+
+		status_code, body = await compute()
+		await session.execute(
+			update(IdempotencyKey)
+			.where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+			.values(status_code=status_code, response=body)
+		)
+		await session.commit()
+		return status_code, body, False
+
+	async def stored_many(
+			self, session: AsyncSession, user_id: uuid.UUID, keys: Iterable[str]
+	) -> Dict[str, Tuple[str, bytes]]:
+		"""Request hash and stored response of the keys that already completed."""
+		result = await session.execute(
+			select(IdempotencyKey.key, IdempotencyKey.request_hash, IdempotencyKey.response)
+			.where(
+				IdempotencyKey.user_id == user_id,
+				IdempotencyKey.key.in_(list(keys)),
+				IdempotencyKey.response.is_not(None),
+				IdempotencyKey.expires_at >= func.now(),
+			)
+		)
+		return {row.key: (row.request_hash, row.response) for row in result}
+
+	async def claim_many(self, session: AsyncSession, user_id: uuid.UUID, hashes: Dict[str, str]) -> Set[str]:
+		"""Insert the key rows in the caller's transaction; returns the keys it now owns.
+
+		Same protocol as `run`, for many keys at once: the rows stay locked until the caller
+		commits, after storing the responses with `store_many`.
+		"""
+		expires_at = datetime.now() + timedelta(hours=settings.idempotency_ttl_hours)
+		# Ordre de clé constant : deux synchronisations concurrentes ne s'interbloquent pas
+		stmt = insert(IdempotencyKey).values([
+			{"user_id": user_id, "key": key, "request_hash": hashes[key], "expires_at": expires_at}
+			for key in sorted(hashes)
+		])
+		stmt = stmt.on_conflict_do_update(
+			index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+			set_={"request_hash": stmt.excluded.request_hash, "status_code": None, "response": None, "expires_at": expires_at},
+			where=IdempotencyKey.expires_at < func.now(),
+		).returning(IdempotencyKey.key)
+		return set((await session.execute(stmt)).scalars())
+
+	async def store_many(
+			self, session: AsyncSession, user_id: uuid.UUID, responses: Dict[str, bytes], status_code: int
+	) -> None:
+		data = values(column("key", pg.VARCHAR), column("response", pg.BYTEA), name="r").data(list(responses.items()))
+		await session.execute(
+			update(IdempotencyKey)
+			.where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == data.c.key)
+			.values(status_code=status_code, response=data.c.response)
+			.execution_options(synchronize_session=False)
+		)
+
+	async def purge_expired(self) -> int:
+		async with engine.begin() as conn:
+			if not (await conn.execute(select(func.pg_try_advisory_xact_lock(IDEMPOTENCY_PURGE_LOCK_KEY)))).scalar_one():
+				return 0
+			result = await conn.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < func.now()))
+		return result.rowcount
+
+	async def _purge_periodically(self) -> None:
+		while True:
+			try:
+				deleted = await self.purge_expired()
+				if deleted:
+					logger.info("Deleted %s expired idempotency keys", deleted)
+			except Exception:
+				logger.exception("Idempotency key purge failed")
+			await asyncio.sleep(IDEMPOTENCY_PURGE_INTERVAL)
+
+
+idempotency_keys = IdempotencyKeys()
+
+
+async def idempotent_response(
+		session: AsyncSession, user_id: uuid.UUID, key: str, request_hash: str,
+		compute: Callable[[], Awaitable[BaseModel]], status_code: int,
+		after_commit: Optional[Callable[[], Awaitable[None]]] = None
+) -> Response:
+	"""Run `compute` (which must not commit) under an idempotency key, in `session`.
+
+	`after_commit` runs once the operation is committed, not on a replay.
+	"""
+	async def run() -> Tuple[int, bytes]:
+		result = await compute()
+		return status_code, result.model_dump_json().encode()
+
+	stored_status, body, replayed = await idempotency_keys.run(session, user_id, key, request_hash, run)
+	if not replayed and after_commit is not None:
+		await after_commit()
+	headers = {REPLAYED_HEADER: "true"} if replayed else None
+	return Response(content=body, status_code=stored_status, media_type="application/json", headers=headers)
@@ -0,0 +1,67 @@
+"""pytest plugin failing any test during which an event loop was blocked.
+
+Enable it with `pytest -p app.utils.loop_blocking_plugin`. Every event loop created
+while the tests run (pytest-asyncio loops, the loop behind Starlette's TestClient) is
+watched by a LoopMonitor; a test fails when one of its callbacks holds the loop longer
+than `--loop-block-threshold` milliseconds, and the report shows the blocking stack.
+"""
+import asyncio
+
+import pytest
+
+from app.utils import loop_monitor
+
+
+class MonitoredEventLoopPolicy(asyncio.DefaultEventLoopPolicy):
+	def __init__(self, threshold: float):
+		super().__init__()
+		self.threshold = threshold
+
+	def new_event_loop(self) -> asyncio.AbstractEventLoop:
+		loop = super().new_event_loop()
+		monitor = loop_monitor.LoopMonitor(interval=self.threshold / 2, threshold=self.threshold)
+		# Démarré au premier tour de la boucle, depuis son propre thread
+		loop.call_soon(monitor.start)
+		return loop
+
+
+def pytest_addoption(parser):
+	parser.addoption(
+		"--loop-block-threshold", type=float, default=100,
+		help="Milliseconds a callback may hold the event loop before the test fails",
+	)
+
+
+def pytest_configure(config):
+	threshold = config.getoption("--loop-block-threshold") / 1000
+	asyncio.set_event_loop_policy(MonitoredEventLoopPolicy(threshold))
+	loop_monitor.record_blocked_calls = True
+
+
+def _fail_if_blocked() -> None:
+	if loop_monitor.blocked_calls:
+		details = "\n\n".join(
+			f"Blocked for {call.duration * 1000:.0f} ms at:\n{call.stack}" for call in loop_monitor.blocked_calls
+		)
+		loop_monitor.blocked_calls.clear()
+		pytest.fail(f"Event loop blocked during the test:\n{details}", pytrace=False)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+	loop_monitor.blocked_calls.clear()
+
+
+# Vérifié à la fin de l'appel (échec du test), puis du teardown (erreur)
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+	result = yield
+	_fail_if_blocked()
+	return result
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_teardown(item, nextitem):
+	result = yield
+	_fail_if_blocked()
+	return result
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from typing import List, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+LAG_QUANTILES = (0.5, 0.9, 0.99)
+# Les quantiles portent sur la dernière minute, quel que soit l'intervalle des battements
+LAG_WINDOW_SECONDS = 60
+
+EVENT_LOOP_LAG = Histogram(
+	"event_loop_lag_seconds", "Delay between a scheduled wake-up of the event loop and its execution",
+	buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+EVENT_LOOP_LAG_QUANTILE = Gauge(
+	"event_loop_lag_quantile_seconds", "Event loop lag percentiles over the last minute", ["quantile"],
+	multiprocess_mode="max",
+)
+EVENT_LOOP_BLOCKED = Counter(
+	"event_loop_blocked_total", "Times a callback held the event loop longer than the blocking threshold"
+)
+
+
+@dataclass
+class BlockedCall:
+	duration: float
+	stack: str
+
+
+# Alimentée seulement quand record_blocked_calls est actif (mode pytest)
+blocked_calls: List[BlockedCall] = []
+record_blocked_calls = False
+
+
+class LoopMonitor:
+	"""Measure the lag of an event loop and report callbacks that block it.
+
+	A heartbeat scheduled on the loop every `interval` seconds measures how late it runs.
+	A watchdog thread checks the heartbeat; when it is older than `threshold`, the loop
+	thread is stuck in a callback and its current stack is captured and logged.
+	"""
+
+	def __init__(self, interval: float = 0.1, threshold: float = 0.1):
+		self.interval = interval
+		self.threshold = threshold
+		self._loop: Optional[asyncio.AbstractEventLoop] = None
+		self._loop_thread: Optional[int] = None
+		self._heartbeat = 0.0
+		self._handle: Optional[asyncio.TimerHandle] = None
+		self._watchdog: Optional[threading.Thread] = None
+		self._stopped = threading.Event()
+		self._samples: deque = deque(maxlen=max(1, round(LAG_WINDOW_SECONDS / interval)))
+
+	def start(self) -> None:
+		"""Attach to the running loop; must be called from the loop thread."""
+		self._loop = asyncio.get_running_loop()
+		self._loop_thread = threading.get_ident()
+		self._stopped.clear()
+		self._heartbeat = time.monotonic()
+		self._schedule()
+		self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+		self._watchdog.start()
+
+	def stop(self) -> None:
+		self._stopped.set()
+		if self._handle is not None:
+			self._handle.cancel()
+			self._handle = None
+
+	def _schedule(self) -> None:
+		self._handle = self._loop.call_later(self.interval, self._beat, self._loop.time() + self.interval)
+
+	def _beat(self, expected: float) -> None:
+		lag = max(0.0, self._loop.time() - expected)
+		self._heartbeat = time.monotonic()
+		EVENT_LOOP_LAG.observe(lag)
+		self._samples.append(lag)
+		if len(self._samples) % 10 == 0:
+			ordered = sorted(self._samples)
+			for quantile in LAG_QUANTILES:
+				EVENT_LOOP_LAG_QUANTILE.labels(str(quantile)).set(ordered[int(quantile * (len(ordered) - 1))])
+		if not self._stopped.is_set():
+			self._schedule()
+
+	def _watch(self) -> None:
+		reported = 0.0
+		paused = False
+		while not self._stopped.wait(self.threshold / 2):
+			if self._loop.is_closed():
+				return
+			if not self._loop.is_running():
+				paused = True
+				continue
+			if paused:
+				# La boucle reprend après un arrêt : le battement en retard n'est pas un blocage
+				paused = False
+				self._heartbeat = time.monotonic()
+				continue
+			heartbeat = self._heartbeat
+			stalled = time.monotonic() - heartbeat - self.interval
+			# Un seul rapport par épisode de blocage
+			if stalled > self.threshold and reported != heartbeat:
+				reported = heartbeat
+				self._report(stalled)
+
+	def _report(self, stalled: float) -> None:
+		frame = sys._current_frames().get(self._loop_thread)
+		stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+		EVENT_LOOP_BLOCKED.inc()
+		logger.warning("Event loop blocked for more than %.0f ms at:\n%s", stalled * 1000, stack)
+		if record_blocked_calls:
+			blocked_calls.append(BlockedCall(duration=stalled, stack=stack))
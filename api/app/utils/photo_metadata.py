@@ -1,15 +1,30 @@
+import asyncio
 from io import BytesIO
 
-import requests
-from PIL import Image
-from PIL.ExifTags import TAGS
+import httpx
+from prometheus_client import Counter, Histogram
+
 from app.utils.coordinates import Coordinates
+from app.utils.http_client import http_pool
+
+GEOTAG_FETCH_DURATION = Histogram("geotag_fetch_duration_seconds", "Photo download time for geotagging")
+GEOTAG_FETCH_BYTES = Counter("geotag_fetch_bytes_total", "Bytes of photos downloaded for geotagging")
+# hit : coordonnées trouvées dans l'EXIF, miss : aucune, error : téléchargement en échec
+GEOTAG_LOOKUPS = Counter("geotag_lookups_total", "Photo geotag lookups by outcome", ["result"])
+
+
+class PhotoFetchError(Exception):
+	"""A photo could not be downloaded: its missing coordinates say nothing about its EXIF."""
 
 
 class PhotoMetadata:
 	@staticmethod
 	def _get_exif_data(photo: bytes) -> dict:
 		"""Extract EXIF data from the photo."""
+		# Pillow n'est chargé qu'au premier géotag
+		from PIL import Image
+		from PIL.ExifTags import TAGS
+
 		try:
 			with BytesIO(photo) as img_buf:
 				with Image.open(img_buf) as img:
@@ -49,18 +64,44 @@ class PhotoMetadata:
 		print("No GPS information found in photo.")
 		return None
 
-	def get_coordinate_from_url(self, url: str) -> Coordinates | None:
-		""" Download image from URL and get GPS coordinates."""
+	async def get_coordinate_from_url(self, url: str, strict: bool = False) -> Coordinates | None:
+		""" Download image from URL and get GPS coordinates.
+
+		A failed download gives None, or raises PhotoFetchError with `strict`.
+		"""
 		try:
-			response = requests.get(url)
-			response.raise_for_status()
-			return self.get_coordinate(response.content)
-		except requests.RequestException as e:
+			with GEOTAG_FETCH_DURATION.time():
+				response = await http_pool.client.get(url)
+				response.raise_for_status()
+		except httpx.HTTPError as e:
+			GEOTAG_LOOKUPS.labels("error").inc()
+			if strict:
+				raise PhotoFetchError(url) from e
 			print(f"Error fetching image from URL: {e}")
-		return None
-
-
+			return None
+		GEOTAG_FETCH_BYTES.inc(len(response.content))
+		# Le décodage EXIF (Pillow) ne doit pas bloquer la boucle d'événements
+		coordinates = await asyncio.to_thread(self.get_coordinate, response.content)
+		GEOTAG_LOOKUPS.labels("hit" if coordinates else "miss").inc()
+		return coordinates
 
+	async def get_coordinate_from_urls(self, urls: list[str] | None, strict: bool = False) -> Coordinates | None:
+		"""Get the GPS coordinates from the first of the two first photos that has them.
 
+		With `strict`, None means that every photo was read and had none; when a download
+		failed and no other photo had coordinates, PhotoFetchError is raised instead.
+		"""
+		failure = None
+		for url in (urls or [])[:2]:
+			try:
+				coordinates = await self.get_coordinate_from_url(url, strict)
+			except PhotoFetchError as error:
+				failure = error
+				continue
+			if coordinates:
+				return coordinates
+		if failure is not None:
+			raise failure
+		return None
 
 photo_metadata = PhotoMetadata()
@@ -0,0 +1,82 @@
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Sequence
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.notify import notify, pg_listener
+
+INVALIDATION_CHANNEL = "reference_data"
+CACHE_CONTROL = "public, max-age=60"
+
+
+@dataclass(frozen=True)
+class CachedBody:
+	body: bytes
+	etag: str
+
+
+class ReferenceCache:
+	"""Process-local cache of a rarely changing list, kept as encoded JSON bytes."""
+
+	def __init__(self, name: str, item_type: Any):
+		self.name = name
+		self._adapter = TypeAdapter(item_type)
+		self._entry: CachedBody | None = None
+		# Incrémenté à chaque invalidation : un chargement commencé avant n'est pas conservé
+		self._generation = 0
+		self._lock = asyncio.Lock()
+		caches[name] = self
+
+	async def get(self, load: Callable[[], Awaitable[Sequence[Any]]]) -> CachedBody:
+		entry = self._entry
+		if entry is not None:
+			return entry
+		async with self._lock:
+			if self._entry is not None:
+				return self._entry
+			generation = self._generation
+			items = self._adapter.validate_python(await load(), from_attributes=True)
+			body = self._adapter.dump_json(items)
+			entry = CachedBody(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+			if self._generation == generation:
+				self._entry = entry
+			return entry
+
+	def invalidate(self) -> None:
+		self._generation += 1
+		self._entry = None
+
+	async def publish_invalidation(self, session: AsyncSession) -> None:
+		"""Queue the invalidation for every worker; it is sent when the transaction commits."""
+		await notify(session, INVALIDATION_CHANNEL, self.name)
+
+
+caches: Dict[str, ReferenceCache] = {}
+
+
+def _on_invalidation(payload: str) -> None:
+	cache = caches.get(payload)
+	if cache is not None:
+		cache.invalidate()
+
+
+def _invalidate_all() -> None:
+	for cache in caches.values():
+		cache.invalidate()
+
+
+pg_listener.subscribe(INVALIDATION_CHANNEL, _on_invalidation)
+# Les invalidations envoyées pendant une coupure de la connexion LISTEN sont perdues
+pg_listener.on_reconnect(_invalidate_all)
+
+
+def cached_response(request: Request, entry: CachedBody) -> Response:
+	headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL}
+	if request.headers.get("if-none-match") == entry.etag:
+		return Response(status_code=304, headers=headers)
+	return Response(content=entry.body, media_type="application/json", headers=headers)
@@ -0,0 +1,86 @@
+import time
+from typing import TYPE_CHECKING, List, Sequence
+
+from app.utils.geo import EARTH_RADIUS_M
+
+if TYPE_CHECKING:
+	import numpy as np
+
+# Le 2-opt s'arrête au premier de ces seuils atteint
+TWO_OPT_MAX_PASSES = 500
+TWO_OPT_TIME_BUDGET = 0.05
+TWO_OPT_MIN_GAIN_M = 1.0
+
+
+def haversine_matrix(latitudes: Sequence[float], longitudes: Sequence[float]) -> "np.ndarray":
+	"""Pairwise great-circle distances in metres."""
+	import numpy as np
+
+	lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+	lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+	dlat = lat[:, None] - lat[None, :]
+	dlon = lon[:, None] - lon[None, :]
+	a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+	return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def nearest_neighbour(distances: "np.ndarray") -> List[int]:
+	"""Greedy open path from node 0 through every node."""
+	import numpy as np
+
+	size = len(distances)
+	visited = np.zeros(size, dtype=bool)
+	path = [0]
+	visited[0] = True
+	for _ in range(size - 1):
+		row = np.where(visited, np.inf, distances[path[-1]])
+		path.append(int(row.argmin()))
+		visited[path[-1]] = True
+	return path
+
+
+def two_opt(path: List[int], distances: "np.ndarray") -> List[int]:
+	"""Improve an open path starting at node 0 by best-improvement 2-opt moves.
+
+	Reversing path[i..j] replaces the edges (a, b) and (c, d) by (a, c) and (b, d), where
+	a = path[i-1], b = path[i], c = path[j], d = path[j+1]. The path end is free, which is
+	modelled with a virtual node at distance 0 from every node. Each pass evaluates every
+	(i, j) at once on the distance matrix.
+	"""
+	import numpy as np
+
+	size = len(path)
+	if size < 4:
+		return path
+	padded = np.zeros((size + 1, size + 1))
+	padded[:size, :size] = distances
+	route = np.array(path + [size])
+	deadline = time.perf_counter() + TWO_OPT_TIME_BUDGET
+
+	i = np.arange(1, size)[:, None]
+	j = np.arange(1, size)[None, :]
+	valid = j > i
+	for _ in range(TWO_OPT_MAX_PASSES):
+		a, b = route[i - 1], route[i]
+		c, d = route[j], route[j + 1]
+		gain = padded[a, b] + padded[c, d] - padded[a, c] - padded[b, d]
+		gain = np.where(valid, gain, 0.0)
+		best = int(gain.argmax())
+		bi, bj = divmod(best, size - 1)
+		if gain.flat[best] < TWO_OPT_MIN_GAIN_M:
+			break
+		route[bi + 1:bj + 2] = route[bi + 1:bj + 2][::-1].copy()
+		if time.perf_counter() > deadline:
+			break
+	return [int(node) for node in route[:-1]]
+
+
+def order_stops(
+		start_latitude: float, start_longitude: float,
+		latitudes: Sequence[float], longitudes: Sequence[float]
+) -> "tuple[List[int], List[float]]":
+	"""Visiting order of the stops from a start point, and the length of each leg in metres."""
+	distances = haversine_matrix([start_latitude, *latitudes], [start_longitude, *longitudes])
+	path = two_opt(nearest_neighbour(distances), distances)
+	legs = [float(distances[path[k - 1], path[k]]) for k in range(1, len(path))]
+	return [node - 1 for node in path[1:]], legs
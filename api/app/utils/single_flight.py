@@ -0,0 +1,42 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from prometheus_client import Counter
+
+CALLS = Counter(
+	"single_flight_calls_total", "Calls made through a single-flight group", ["group"]
+)
+SHARED = Counter(
+	"single_flight_shared_total", "Calls served by an already running computation", ["group"]
+)
+
+
+class SingleFlight:
+	"""Collapse concurrent calls with the same key into one in-flight computation.
+
+	The coalescing ratio of a group is single_flight_shared_total / single_flight_calls_total.
+	`compute` outlives the caller that started it, so it must not use that caller's
+	request-scoped resources (its database session in particular).
+	"""
+
+	def __init__(self, group: str):
+		self.group = group
+		self._calls: Dict[Hashable, asyncio.Task] = {}
+
+	async def do(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+		CALLS.labels(self.group).inc()
+		task = self._calls.get(key)
+		if task is not None:
+			SHARED.labels(self.group).inc()
+		else:
+			task = asyncio.ensure_future(compute())
+			self._calls[key] = task
+			task.add_done_callback(lambda done: self._forget(key, done))
+		# shield : l'annulation d'un appelant n'interrompt pas le calcul partagé
+		return await asyncio.shield(task)
+
+	def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+		if self._calls.get(key) is task:
+			del self._calls[key]
+		if not task.cancelled():
+			task.exception()
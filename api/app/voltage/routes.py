@@ -1,10 +1,11 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.main import get_session
 from app.errors import VoltageNotFound
+from app.utils.reference_cache import cached_response
 from app.voltage.schemas import Voltage, VoltageCreateModel
 from app.voltage.service import VoltageService
 
@@ -12,10 +13,10 @@ voltage_router = APIRouter(tags=['Voltage'])
 voltage_service = VoltageService()
 
 @voltage_router.get("/", response_model=List[Voltage])
-async def get_all_voltage(session: AsyncSession = Depends(get_session)):
-	voltages = await voltage_service.get_all_voltages(session)
+async def get_all_voltage(request: Request, session: AsyncSession = Depends(get_session)):
+	voltages = await voltage_service.get_all_voltages_cached(session)
 
-	return voltages
+	return cached_response(request, voltages)
 
 
 @voltage_router.get("/{voltage_id}", response_model=Voltage)
@@ -1,13 +1,18 @@
 
+from typing import List
+
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, desc, asc
 
 from app.db.models import Voltage
 from app.errors import VoltageNotFound
-from app.voltage.schemas import VoltageCreateModel
+from app.utils.reference_cache import ReferenceCache, CachedBody
+from app.voltage.schemas import VoltageCreateModel, Voltage as VoltageSchema
 
 
 class VoltageService:
+	cache = ReferenceCache("voltages", List[VoltageSchema])
 
 	async def get_all_voltages(self, session: AsyncSession):
 		stmt = select(Voltage).order_by(asc(Voltage.volt))
@@ -15,6 +20,9 @@ class VoltageService:
 		result = await session.execute(stmt)
 		return result.scalars().all()
 
+	async def get_all_voltages_cached(self, session: AsyncSession) -> CachedBody:
+		return await self.cache.get(lambda: self.get_all_voltages(session))
+
 	async def get_voltage(self, voltage_id: str, session: AsyncSession):
 		stmt = select(Voltage).where(Voltage.uid == voltage_id)
 
@@ -23,12 +31,14 @@ class VoltageService:
 		return result.scalar_one_or_none()
 
 	async def create_voltage(self, voltage_data: VoltageCreateModel, session: AsyncSession):
-		voltage_data_dict =voltage_data.model_dump()
+		voltage_data_dict = voltage_data.model_dump()
 
-		voltage = Voltage(**voltage_data_dict)
-
-		session.add(voltage)
+		stmt = insert(Voltage).values(**voltage_data_dict).returning(*Voltage.__table__.c)
+		result = await session.execute(stmt)
+		voltage = VoltageSchema.model_validate(result.mappings().one())
+		await self.cache.publish_invalidation(session)
 		await session.commit()
+		self.cache.invalidate()
 
 		return voltage
 
@@ -37,7 +47,9 @@ class VoltageService:
 
 		if voltage_to_delete is not None:
 			await session.delete(voltage_to_delete)
+			await self.cache.publish_invalidation(session)
 			await session.commit()
+			self.cache.invalidate()
 			return {}
 		else:
 			return None
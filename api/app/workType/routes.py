@@ -1,10 +1,11 @@
 from typing import List
 
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.main import get_session
 from app.errors import WorkTypeNotFound
+from app.utils.reference_cache import cached_response
 from app.workType.schemas import WorkType, WorkTypeCreateModel
 from app.workType.service import WorkTypeService
 
@@ -16,11 +17,12 @@ work_type_service = WorkTypeService()
 					  status_code=status.HTTP_200_OK,
 					  response_model=List[WorkType])
 async def get_all_work_type(
+		request: Request,
 		session: AsyncSession = Depends(get_session)
 ):
-	work_types = await work_type_service.get_all_work_type(session)
+	work_types = await work_type_service.get_all_work_type_cached(session)
 
-	return work_types
+	return cached_response(request, work_types)
 
 
 @work_type_router.get("/{work_type_id}", response_model=WorkType)
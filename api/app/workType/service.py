@@ -1,11 +1,15 @@
+from typing import List
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, desc
 
 from app.db.models import WorkType
-from app.workType.schemas import WorkTypeCreateModel
+from app.utils.reference_cache import ReferenceCache, CachedBody
+from app.workType.schemas import WorkTypeCreateModel, WorkType as WorkTypeSchema
 
 
 class WorkTypeService:
+	cache = ReferenceCache("work_types", List[WorkTypeSchema])
 
 	async def create_work_type(self, session: AsyncSession, work_type_data: WorkTypeCreateModel):
 		work_type_data_dict = work_type_data.model_dump()
@@ -13,7 +17,9 @@ class WorkTypeService:
 
 		session.add(new_work_type)
 
+		await self.cache.publish_invalidation(session)
 		await session.commit()
+		self.cache.invalidate()
 		await session.refresh(new_work_type)
 		return  new_work_type
 
@@ -31,12 +37,17 @@ class WorkTypeService:
 		work_types = result.scalars().all()
 		return work_types
 
+	async def get_all_work_type_cached(self, session: AsyncSession) -> CachedBody:
+		return await self.cache.get(lambda: self.get_all_work_type(session))
+
 	async def delete_work_type(self, work_type_uid: str, session: AsyncSession):
 		work_type = await self.get_work_by_uid(work_type_uid, session)
 
 		if work_type is not None:
 			await session.delete(work_type)
+			await self.cache.publish_invalidation(session)
 			await session.commit()
+			self.cache.invalidate()
 			return {}
 		else:
 			return None
@@ -0,0 +1,21 @@
+"""Benchmark suite of the API: `python -m benchmarks --help` from the api directory.
+
+	python -m benchmarks seed --tasks 500000 --users 3000 --reset
+	python -m benchmarks photos --latency-ms 80
+	python manage.py serve
+	python -m benchmarks run --output benchmarks/results/$(git rev-parse --short HEAD).json
+	python -m benchmarks compare benchmarks/results/<before>.json benchmarks/results/<after>.json
+"""
+import typer
+
+from benchmarks import load, photo_server, seed
+
+cli = typer.Typer(help="Load tests of the API hot paths")
+cli.command("seed")(seed.seed)
+cli.command("photos")(photo_server.photos)
+cli.command("run")(load.run)
+cli.command("compare")(load.compare)
+
+
+if __name__ == "__main__":
+	cli()
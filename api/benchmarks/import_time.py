@@ -0,0 +1,79 @@
+"""Cold-start import cost of the API, measured with `python -X importtime`.
+
+Imports `main` in a fresh interpreter, prints the slowest modules and fails when a
+library reserved for a specific code path is loaded at startup or when the total
+exceeds the budget. Meant to run in CI as a regression guard:
+
+	python benchmarks/import_time.py --budget-ms 1500
+"""
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import typer
+
+API_DIR = Path(__file__).resolve().parent.parent
+# Chargés uniquement par l'import/export Excel et le géotag
+LAZY_MODULES = ["openpyxl", "PIL", "requests", "exif", "aiohttp", "numpy"]
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+cli = typer.Typer()
+
+
+def measure(module: str) -> List[tuple]:
+	"""Return (name, self_us, cumulative_us, depth) for every module imported by `module`."""
+	result = subprocess.run(
+		[sys.executable, "-X", "importtime", "-c", f"import {module}"],
+		cwd=API_DIR,
+		env={**os.environ, "PYTHONPATH": str(API_DIR)},
+		capture_output=True,
+		text=True,
+	)
+	if result.returncode != 0:
+		raise RuntimeError(result.stderr.strip().splitlines()[-1])
+	entries = []
+	for line in result.stderr.splitlines():
+		match = LINE.match(line)
+		if match:
+			self_us, cumulative_us, indent, name = match.groups()
+			entries.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+	return entries
+
+
+@cli.command()
+def main(
+		module: str = typer.Option("main", help="Module imported at worker start"),
+		budget_ms: float = typer.Option(None, help="Fail when the total import time exceeds this"),
+		top: int = typer.Option(15, help="Number of top-level packages listed"),
+):
+	entries = measure(module)
+	total_ms = next(cumulative for name, _, cumulative, _ in entries if name == module) / 1000
+
+	# Temps propre de chaque module, regroupé par paquet de premier niveau
+	packages: Dict[str, int] = {}
+	for name, self_us, _, _ in entries:
+		root = name.split(".")[0]
+		packages[root] = packages.get(root, 0) + self_us
+	for root, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+		typer.echo(f"{self_us / 1000:>10.1f} ms  {root}")
+	typer.echo(f"{total_ms:>10.1f} ms  total ({module})")
+
+	imported = {name.split(".")[0] for name, *_ in entries}
+	eager = [name for name in LAZY_MODULES if name in imported]
+	failed = False
+	if eager:
+		typer.echo(f"Imported at startup but reserved for lazy loading: {', '.join(eager)}", err=True)
+		failed = True
+	if budget_ms is not None and total_ms > budget_ms:
+		typer.echo(f"Startup import time {total_ms:.0f} ms exceeds the {budget_ms:.0f} ms budget", err=True)
+		failed = True
+	if failed:
+		raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+	cli()
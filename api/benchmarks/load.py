@@ -0,0 +1,178 @@
+"""Drive the hot endpoints at a fixed concurrency and write a diffable baseline.
+
+	python -m benchmarks run --concurrency 32 --duration 20 --output benchmarks/results/baseline.json
+	python -m benchmarks compare benchmarks/results/baseline.json benchmarks/results/candidate.json
+
+Each scenario runs alone for `--duration` seconds after a short warm-up, so the
+numbers of one endpoint are not affected by the others.
+"""
+import asyncio
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import typer
+
+from benchmarks.scenarios import DEFAULT_MANIFEST, SCENARIOS, BenchContext, Scenario, ScenarioExhausted
+
+cli = typer.Typer()
+
+
+def percentile(ordered: List[float], quantile: float) -> float:
+	if not ordered:
+		return 0.0
+	return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+	ordered = sorted(latencies)
+	return {
+		"requests": len(ordered),
+		"errors": errors,
+		"throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+		"mean_ms": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+		"p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+		"p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+		"p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+	}
+
+
+async def run_scenario(
+		client: httpx.AsyncClient, scenario: Scenario, ctx: BenchContext,
+		concurrency: int, duration: float, warmup: float
+) -> dict:
+	latencies: List[float] = []
+	errors = 0
+	measuring = False
+	stop_at = time.monotonic() + warmup + duration
+
+	async def worker():
+		nonlocal errors
+		while time.monotonic() < stop_at:
+			started = time.perf_counter()
+			try:
+				response = await scenario(client, ctx)
+				failed = response.status_code >= 400
+			except ScenarioExhausted:
+				return
+			except httpx.HTTPError:
+				failed = True
+			if measuring:
+				latencies.append(time.perf_counter() - started)
+				errors += failed
+
+	async def start_measuring():
+		nonlocal measuring
+		await asyncio.sleep(warmup)
+		measuring = True
+		return time.monotonic()
+
+	measure_start, _ = await asyncio.gather(start_measuring(), asyncio.gather(*(worker() for _ in range(concurrency))))
+	return summarize(latencies, errors, time.monotonic() - measure_start)
+
+
+async def login_token(client: httpx.AsyncClient, username: str, password: str) -> str:
+	response = await client.post("/api/auth/login", json={"username": username, "password": password})
+	response.raise_for_status()
+	return response.json()["access_token"]
+
+
+def git_commit() -> Optional[str]:
+	try:
+		return subprocess.run(
+			["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+		).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+async def run_all(base_url: str, manifest: dict, names: List[str], concurrency: int, duration: float, warmup: float) -> Dict[str, dict]:
+	limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+	async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+		ctx = BenchContext(
+			manifest=manifest,
+			admin_token=await login_token(client, manifest["admin"], manifest["password"]),
+			worker_token=await login_token(client, manifest["workers"][0], manifest["password"]),
+			pending_ids=list(manifest["pending_ids"]),
+		)
+		results = {}
+		for name in names:
+			typer.echo(f"  {name} ...")
+			results[name] = await run_scenario(client, SCENARIOS[name], ctx, concurrency, duration, warmup)
+		return results
+
+
+@cli.command()
+def run(
+		base_url: str = typer.Option("http://127.0.0.1:8000"),
+		manifest: Path = typer.Option(DEFAULT_MANIFEST, help="Written by `python -m benchmarks seed`"),
+		scenario: List[str] = typer.Option(list(SCENARIOS), help="Scenarios to run, in order"),
+		concurrency: int = typer.Option(32, help="Concurrent clients"),
+		duration: float = typer.Option(20.0, help="Measured seconds per scenario"),
+		warmup: float = typer.Option(3.0, help="Unmeasured seconds before each scenario"),
+		output: Path = typer.Option(Path("benchmarks/results/latest.json"), help="Baseline file to write"),
+		label: str = typer.Option("", help="Free-form note stored with the results"),
+):
+	"""Run the load test against a running server."""
+	unknown = [name for name in scenario if name not in SCENARIOS]
+	if unknown:
+		raise typer.BadParameter(f"Unknown scenarios: {', '.join(unknown)}")
+	data = json.loads(manifest.read_text())
+	results = asyncio.run(run_all(base_url, data, scenario, concurrency, duration, warmup))
+
+	baseline = {
+		"meta": {
+			"commit": git_commit(),
+			"label": label,
+			"date": datetime.now().isoformat(timespec="seconds"),
+			"python": platform.python_version(),
+			"concurrency": concurrency,
+			"duration_s": duration,
+			"pending_tasks": data["pending_tasks"],
+			"completed_tasks": data["completed_tasks"],
+		},
+		"results": results,
+	}
+	output.parent.mkdir(parents=True, exist_ok=True)
+	output.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+
+	typer.echo(f"{'scenario':<16}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+	for name, r in results.items():
+		typer.echo(f"{name:<16}{r['throughput_rps']:>10.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['errors']:>8}")
+	typer.echo(f"Results written to {output}")
+
+
+@cli.command()
+def compare(
+		baseline: Path,
+		candidate: Path,
+		tolerance: float = typer.Option(10.0, help="Allowed regression in percent before failing"),
+):
+	"""Diff two result files; exits 1 when a scenario regresses beyond the tolerance."""
+	before = json.loads(baseline.read_text())["results"]
+	after = json.loads(candidate.read_text())["results"]
+
+	def change(old: float, new: float) -> float:
+		return (new - old) / old * 100 if old else 0.0
+
+	regressions = []
+	typer.echo(f"{'scenario':<16}{'req/s':>18}{'p95 ms':>18}{'p99 ms':>18}")
+	for name in sorted(before.keys() & after.keys()):
+		old, new = before[name], after[name]
+		rps = change(old["throughput_rps"], new["throughput_rps"])
+		p95 = change(old["p95_ms"], new["p95_ms"])
+		p99 = change(old["p99_ms"], new["p99_ms"])
+		typer.echo(
+			f"{name:<16}{new['throughput_rps']:>10.1f} {rps:>+6.1f}%{new['p95_ms']:>10.1f} {p95:>+6.1f}%"
+			f"{new['p99_ms']:>10.1f} {p99:>+6.1f}%"
+		)
+		if rps < -tolerance or p95 > tolerance:
+			regressions.append(name)
+	if regressions:
+		typer.echo(f"Regressed beyond {tolerance}%: {', '.join(regressions)}", err=True)
+		raise typer.Exit(1)
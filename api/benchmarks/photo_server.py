@@ -0,0 +1,76 @@
+"""Stub photo host: serves the same geotagged JPEG for every path after a configurable delay.
+
+Stands in for the photo storage during load tests, so geotagging latency is
+controlled (`--latency-ms`, `--jitter-ms`) instead of depending on the network.
+"""
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import typer
+
+cli = typer.Typer()
+
+GPS_IFD = 0x8825
+
+
+def geotagged_jpeg(latitude: float = 55.7558, longitude: float = 37.6173, size: int = 1024) -> bytes:
+	from PIL import Image
+
+	def dms(value: float):
+		degrees = int(value)
+		minutes = int((value - degrees) * 60)
+		seconds = round(((value - degrees) * 60 - minutes) * 60, 4)
+		return (float(degrees), float(minutes), seconds)
+
+	image = Image.effect_noise((size, size * 3 // 4), 64).convert("RGB")
+	exif = Image.Exif()
+	exif[GPS_IFD] = {1: "N", 2: dms(latitude), 3: "E", 4: dms(longitude)}
+	buffer = BytesIO()
+	image.save(buffer, "JPEG", exif=exif.tobytes(), quality=85)
+	return buffer.getvalue()
+
+
+def make_handler(photo: bytes, latency: float, jitter: float):
+	class PhotoHandler(BaseHTTPRequestHandler):
+		protocol_version = "HTTP/1.1"
+
+		def do_GET(self):
+			time.sleep(max(0.0, latency + random.uniform(-jitter, jitter)))
+			self.send_response(200)
+			self.send_header("Content-Type", "image/jpeg")
+			self.send_header("Content-Length", str(len(photo)))
+			self.end_headers()
+			self.wfile.write(photo)
+
+		def log_message(self, format, *args):
+			pass
+
+	return PhotoHandler
+
+
+def start_photo_server(host: str, port: int, latency_ms: float, jitter_ms: float) -> ThreadingHTTPServer:
+	"""Start the stub server in a background thread; call `shutdown()` to stop it."""
+	handler = make_handler(geotagged_jpeg(), latency_ms / 1000, jitter_ms / 1000)
+	server = ThreadingHTTPServer((host, port), handler)
+	server.daemon_threads = True
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	return server
+
+
+@cli.command()
+def photos(
+		host: str = typer.Option("127.0.0.1"),
+		port: int = typer.Option(8900),
+		latency_ms: float = typer.Option(50, help="Delay before each photo is sent"),
+		jitter_ms: float = typer.Option(20, help="Random +/- variation of the delay"),
+):
+	"""Serve geotagged photos for the load tests until interrupted."""
+	server = start_photo_server(host, port, latency_ms, jitter_ms)
+	typer.echo(f"Serving photos on http://{host}:{port} ({latency_ms} ms +/- {jitter_ms} ms)")
+	try:
+		threading.Event().wait()
+	except KeyboardInterrupt:
+		server.shutdown()
@@ -0,0 +1,128 @@
+"""Requests replayed by the load test, one coroutine per hot path."""
+import gzip
+import json
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from io import BytesIO
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+# Écrit par `python -m benchmarks seed`, lu par `run`
+DEFAULT_MANIFEST = Path(__file__).resolve().parent / "seed.json"
+
+
+class ScenarioExhausted(Exception):
+	"""Raised when a scenario has no input left (e.g. every pending task is completed)."""
+
+
+@dataclass
+class BenchContext:
+	manifest: dict
+	admin_token: str
+	worker_token: str
+	pending_ids: List[int] = field(default_factory=list)
+	upload_rows: int = 50
+	sync_items: int = 50
+	_workbook: bytes = b""
+
+	@property
+	def admin(self) -> dict:
+		return {"Authorization": f"Bearer {self.admin_token}"}
+
+	@property
+	def worker(self) -> dict:
+		return {"Authorization": f"Bearer {self.worker_token}"}
+
+	def photos(self, count: int = 2) -> List[str]:
+		base = self.manifest["photo_url"]
+		return [f"{base}/photos/bench_{random.randrange(10**9)}_{k}.jpg" for k in range(count)]
+
+	def workbook(self) -> bytes:
+		"""Planning workbook in the upload layout (data from row 3), built once."""
+		if not self._workbook:
+			from openpyxl import Workbook
+
+			workbook = Workbook()
+			sheet = workbook.active
+			sheet.append(["№", "Тип работ", "Диспетчерское наименование", "Адрес", "Дата", "", "кВ", "Работы"])
+			sheet.append([])
+			for row in range(self.upload_rows):
+				sheet.append([
+					row + 1, "Осмотр", f"ТП-{row}", f"ул. Нагрузочная, д. {row}",
+					(date.today() + timedelta(days=row % 30)).strftime("%d.%m.%Y"), "", 10, "Осмотр ТП",
+				])
+			buffer = BytesIO()
+			workbook.save(buffer)
+			self._workbook = buffer.getvalue()
+		return self._workbook
+
+
+async def login(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+	username = random.choice(ctx.manifest["workers"])
+	return await client.post("/api/auth/login", json={"username": username, "password": ctx.manifest["password"]})
+
+
+async def list_pending(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+	return await client.get("/api/task/", headers=ctx.worker)
+
+
+async def list_completed(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+	params = {"completed_from": (date.today() - timedelta(days=30)).isoformat()}
+	return await client.get("/api/task/completed", params=params, headers=ctx.admin)
+
+
+async def get_task(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+	task_id = random.choice(ctx.manifest["completed_ids"])
+	return await client.get(f"/api/task/{task_id}", headers=ctx.worker)
+
+
+async def complete_task(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+	# Chaque tâche en attente n'est complétée qu'une fois
+	if not ctx.pending_ids:
+		raise ScenarioExhausted()
+	task_id = ctx.pending_ids.pop()
+	return await client.patch(f"/api/task/{task_id}", json={"photos": ctx.photos(2)}, headers=ctx.worker)
+
+
+async def sync_tasks(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+	# Retour de zone blanche : un lot compressé de complétions hors ligne
+	if len(ctx.pending_ids) < ctx.sync_items:
+		raise ScenarioExhausted()
+	items = [
+		{
+			"key": str(uuid.uuid4()), "task_id": ctx.pending_ids.pop(), "photos": ctx.photos(2),
+			"completed_at": (datetime.now() - timedelta(hours=k)).isoformat(),
+		}
+		for k in range(ctx.sync_items)
+	]
+	body = gzip.compress(json.dumps({"items": items}).encode())
+	headers = {**ctx.worker, "Content-Type": "application/json", "Content-Encoding": "gzip"}
+	return await client.post("/api/task/sync", content=body, headers=headers)
+
+
+async def upload_xlsx(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+	files = {"uploadFile": ("planning.xlsx", ctx.workbook(), "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+	return await client.post("/api/task/upload", files=files, headers=ctx.admin)
+
+
+async def download_xlsx(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+	params = {"completed_from": (date.today() - timedelta(days=7)).isoformat()}
+	return await client.post("/api/task/download", params=params, headers=ctx.admin)
+
+
+Scenario = Callable[[httpx.AsyncClient, BenchContext], Awaitable[httpx.Response]]
+
+SCENARIOS: Dict[str, Scenario] = {
+	"login": login,
+	"list_pending": list_pending,
+	"list_completed": list_completed,
+	"get_task": get_task,
+	"complete_task": complete_task,
+	"sync_tasks": sync_tasks,
+	"upload_xlsx": upload_xlsx,
+	"download_xlsx": download_xlsx,
+}
@@ -0,0 +1,172 @@
+"""Seed a local database with realistic volumes for the load tests.
+
+Users are `bench_admin` and `bench_worker_<n>`, all with the password `benchmark`.
+Tasks are generated server-side with generate_series, in batches, with the change
+notification trigger disabled. Photo URLs point at the stub photo server. Run it
+against a throwaway database only: `--reset` truncates the task tables.
+"""
+import asyncio
+import json
+from datetime import date
+from pathlib import Path
+
+import typer
+from sqlalchemy import text
+
+from app.db.main import engine
+from app.tasks import partitions
+from benchmarks.scenarios import DEFAULT_MANIFEST
+
+BENCH_PASSWORD = "benchmark"
+SEED_BATCH = 50_000
+MANIFEST_SAMPLE = 5_000
+
+cli = typer.Typer()
+
+INSERT_TASKS = text("""
+	WITH workers AS (
+		SELECT array_agg(uid ORDER BY username) AS uids FROM users WHERE username LIKE 'bench\\_worker\\_%'
+	), rows AS (
+		SELECT g, random() < CAST(:completed_ratio AS float) AS done, random() < CAST(:deleted_ratio AS float) AS gone,
+			now() - random() * CAST(:months AS integer) * interval '30 days' AS done_at
+		FROM generate_series(CAST(:low AS integer), CAST(:high AS integer)) g
+	)
+	INSERT INTO tasks (
+		dispatcher_name, address, planned_date, work_type, voltage, job, latitude, longitude,
+		photos, comments, completed_at, is_completed, created_at, version, worker_id, deleted_at
+	)
+	SELECT
+		'ТП-' || (g % 5000),
+		'ул. Тестовая, д. ' || (g % 300) || ', Москва',
+		current_date - (g % (CAST(:months AS integer) * 30)),
+		(ARRAY['Осмотр', 'Ремонт', 'Замена', 'Измерение'])[1 + g % 4],
+		(ARRAY[0.4, 6, 10, 35, 110])[1 + g % 5],
+		'Работа ' || g,
+		CASE WHEN done THEN 55.5 + random() ELSE NULL END,
+		CASE WHEN done THEN 37.3 + random() ELSE NULL END,
+		CASE WHEN done
+			THEN ARRAY(SELECT CAST(:photo_url AS varchar) || '/photos/' || g || '_' || k || '.jpg' FROM generate_series(1, 2 + g % 4) k)
+			ELSE '{}'::varchar[] END,
+		CASE WHEN g % 7 = 0 THEN 'Комментарий к работе ' || g ELSE NULL END,
+		CASE WHEN done THEN done_at ELSE NULL END,
+		done,
+		CASE WHEN done THEN done_at - interval '2 days' ELSE now() - random() * interval '14 days' END,
+		1,
+		CASE WHEN done THEN workers.uids[1 + g % cardinality(workers.uids)] ELSE NULL END,
+		CASE WHEN gone THEN now() ELSE NULL END
+	FROM rows, workers
+""")
+
+
+async def reset() -> None:
+	async with engine.begin() as conn:
+		await conn.execute(text("TRUNCATE tasks, task_events, task_purges RESTART IDENTITY"))
+		await conn.execute(text("DELETE FROM users WHERE username LIKE 'bench\\_%'"))
+
+
+async def seed_users(users: int) -> None:
+	from app.auth.utils import generate_passwd_hash
+
+	# Un seul hachage bcrypt pour tous les comptes de test
+	password_hash = await generate_passwd_hash(BENCH_PASSWORD)
+	async with engine.begin() as conn:
+		if (await conn.execute(text("SELECT count(*) FROM users WHERE username LIKE 'bench\\_%'"))).scalar():
+			raise typer.BadParameter("Benchmark users already exist, run with --reset")
+		await conn.execute(
+			text("""
+				INSERT INTO users (uid, username, full_name, role, password_hash, created_at, updated_at)
+				SELECT gen_random_uuid(), 'bench_admin', 'Bench Admin', 'admin', :hash, now(), now()
+				UNION ALL
+				SELECT gen_random_uuid(), 'bench_worker_' || g, 'Bench Worker ' || g, 'worker', :hash, now(), now()
+				FROM generate_series(1, CAST(:users AS integer)) g
+			"""),
+			{"hash": password_hash, "users": users}
+		)
+
+
+async def seed_partitions(months: int) -> None:
+	async with engine.begin() as conn:
+		existing = set(await partitions.attached_months(conn))
+		current = partitions.month_start(date.today())
+		for offset in range(-months - 1, 1):
+			month = partitions.add_months(current, offset)
+			if month not in existing:
+				await partitions.create_month_partition(conn, month)
+		await partitions.ensure_partitions(conn)
+
+
+async def seed_tasks(tasks: int, months: int, completed_ratio: float, deleted_ratio: float, photo_url: str) -> None:
+	async with engine.begin() as conn:
+		await conn.execute(text("ALTER TABLE tasks DISABLE TRIGGER tasks_notify"))
+	try:
+		for low in range(1, tasks + 1, SEED_BATCH):
+			high = min(low + SEED_BATCH - 1, tasks)
+			async with engine.begin() as conn:
+				await conn.execute(INSERT_TASKS, {
+					"low": low, "high": high, "months": months, "photo_url": photo_url,
+					"completed_ratio": completed_ratio, "deleted_ratio": deleted_ratio,
+				})
+			typer.echo(f"  tasks {high}/{tasks}")
+	finally:
+		async with engine.begin() as conn:
+			await conn.execute(text("ALTER TABLE tasks ENABLE TRIGGER tasks_notify"))
+	async with engine.connect() as conn:
+		await conn.execution_options(isolation_level="AUTOCOMMIT")
+		await conn.execute(text("ANALYZE users"))
+		await conn.execute(text("ANALYZE tasks"))
+
+
+async def write_manifest(path: Path, photo_url: str) -> dict:
+	async with engine.connect() as conn:
+		async def ids(condition: str):
+			result = await conn.execute(text(
+				f"SELECT id FROM tasks WHERE deleted_at IS NULL AND {condition} ORDER BY random() LIMIT {MANIFEST_SAMPLE}"
+			))
+			return result.scalars().all()
+
+		counts = (await conn.execute(text(
+			"SELECT count(*) FILTER (WHERE completed_at IS NULL), count(*) FILTER (WHERE completed_at IS NOT NULL) FROM tasks"
+		))).one()
+		workers = (await conn.execute(text(
+			"SELECT username FROM users WHERE username LIKE 'bench\\_worker\\_%' ORDER BY username LIMIT 500"
+		))).scalars().all()
+		manifest = {
+			"password": BENCH_PASSWORD,
+			"admin": "bench_admin",
+			"workers": workers,
+			"pending_tasks": counts[0],
+			"completed_tasks": counts[1],
+			"pending_ids": await ids("completed_at IS NULL"),
+			"completed_ids": await ids("completed_at IS NOT NULL"),
+			"photo_url": photo_url,
+		}
+	path.write_text(json.dumps(manifest))
+	return manifest
+
+
+@cli.command()
+def seed(
+		tasks: int = typer.Option(200_000, help="Tasks to create (100k-1M for realistic runs)"),
+		users: int = typer.Option(2_000, help="Worker accounts to create"),
+		months: int = typer.Option(12, help="Months of completion history"),
+		completed_ratio: float = typer.Option(0.8, help="Share of tasks already completed"),
+		deleted_ratio: float = typer.Option(0.01, help="Share of soft-deleted tasks"),
+		photo_url: str = typer.Option("http://127.0.0.1:8900", help="Base URL of the stub photo server"),
+		manifest: Path = typer.Option(DEFAULT_MANIFEST, help="Where to write the ids used by the load test"),
+		reset_tables: bool = typer.Option(False, "--reset", help="Truncate tasks and remove benchmark users first"),
+):
+	"""Fill the database with benchmark users and tasks."""
+	async def run():
+		if reset_tables:
+			await reset()
+		typer.echo(f"Seeding {users} users")
+		await seed_users(users)
+		await seed_partitions(months)
+		typer.echo(f"Seeding {tasks} tasks")
+		await seed_tasks(tasks, months, completed_ratio, deleted_ratio, photo_url)
+		written = await write_manifest(manifest, photo_url)
+		await engine.dispose()
+		return written
+
+	written = asyncio.run(run())
+	typer.echo(f"{written['pending_tasks']} pending, {written['completed_tasks']} completed; manifest: {manifest}")
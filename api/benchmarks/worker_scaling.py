@@ -0,0 +1,117 @@
+"""Throughput of the hot endpoints as the number of server workers grows.
+
+Starts `manage.py serve` once per worker count against the configured database and
+drives it with a fixed number of concurrent keep-alive clients:
+
+	python benchmarks/worker_scaling.py --username admin --password secret --workers 1 --workers 2 --workers 4
+
+The load generator is a single process: run it from another machine, or keep the
+concurrency modest, when measuring more workers than the host has spare cores.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import httpx
+import typer
+
+API_DIR = Path(__file__).resolve().parent.parent
+HOT_ENDPOINTS = ["/api/task/", "/api/voltage/", "/api/workType/", "/api/auth/me"]
+
+cli = typer.Typer()
+
+
+async def wait_until_ready(base_url: str, timeout: float = 30) -> None:
+	deadline = time.monotonic() + timeout
+	async with httpx.AsyncClient(base_url=base_url) as client:
+		while time.monotonic() < deadline:
+			try:
+				if (await client.get("/")).status_code == 200:
+					return
+			except httpx.TransportError:
+				pass
+			await asyncio.sleep(0.2)
+	raise RuntimeError("Server did not start")
+
+
+async def login(base_url: str, username: str, password: str) -> str:
+	async with httpx.AsyncClient(base_url=base_url) as client:
+		response = await client.post("/api/auth/login", json={"username": username, "password": password})
+		response.raise_for_status()
+		return response.json()["access_token"]
+
+
+async def load(base_url: str, token: str, path: str, concurrency: int, duration: float) -> dict:
+	limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+	headers = {"Authorization": f"Bearer {token}"}
+	latencies: List[float] = []
+	errors = 0
+	stop_at = time.monotonic() + duration
+
+	async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=30) as client:
+		async def client_loop():
+			nonlocal errors
+			while time.monotonic() < stop_at:
+				started = time.perf_counter()
+				try:
+					response = await client.get(path)
+					if response.status_code >= 400:
+						errors += 1
+				except httpx.HTTPError:
+					errors += 1
+				latencies.append(time.perf_counter() - started)
+
+		await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+
+	latencies.sort()
+	return {
+		"rps": len(latencies) / duration,
+		"p50": latencies[len(latencies) // 2] * 1000 if latencies else 0,
+		"p99": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0,
+		"errors": errors,
+	}
+
+
+@cli.command()
+def main(
+		username: str = typer.Option(...),
+		password: str = typer.Option(...),
+		workers: List[int] = typer.Option([1, 2, 4], help="Worker counts to compare"),
+		concurrency: int = typer.Option(64, help="Concurrent clients per endpoint"),
+		duration: float = typer.Option(10.0, help="Seconds of load per endpoint"),
+		port: int = typer.Option(8100),
+):
+	base_url = f"http://127.0.0.1:{port}"
+	results = {}
+	for count in workers:
+		server = subprocess.Popen(
+			[sys.executable, "manage.py", "serve", "--host", "127.0.0.1", "--port", str(port), "--workers", str(count)],
+			cwd=API_DIR,
+			env={**os.environ, "PYTHONPATH": str(API_DIR)},
+		)
+		try:
+			asyncio.run(wait_until_ready(base_url))
+			token = asyncio.run(login(base_url, username, password))
+			for path in HOT_ENDPOINTS:
+				results[(count, path)] = asyncio.run(load(base_url, token, path, concurrency, duration))
+		finally:
+			server.terminate()
+			server.wait()
+
+	typer.echo(f"{'endpoint':<18}{'workers':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}{'scaling':>9}")
+	for path in HOT_ENDPOINTS:
+		baseline = results[(workers[0], path)]["rps"] or 1
+		for count in workers:
+			r = results[(count, path)]
+			typer.echo(
+				f"{path:<18}{count:>8}{r['rps']:>10.0f}{r['p50']:>10.1f}{r['p99']:>10.1f}{r['errors']:>8}"
+				f"{r['rps'] / baseline:>8.2f}x"
+			)
+
+
+if __name__ == "__main__":
+	cli()
@@ -5,10 +5,16 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.auth.routes import auth_router
+from app.config import settings
+from app.errors import register_all_errors
+from app.lifespan import lifespan
+from app.metrics import MetricsMiddleware, metrics_app
+from app.profiling import SQLProfilingMiddleware
 from app.tasks.routes import task_router
 from app.voltage.routes import voltage_router
 from app.workType.routes import work_type_router
 
+
 app = FastAPI(
 	title="Тек Блок",
 	description="API для управления ежедневными задачами",
@@ -17,9 +23,10 @@ app = FastAPI(
 	swagger_ui_parameters={
         "persistAuthorization": True
     },
+	lifespan=lifespan,
 )
 
-
+register_all_errors(app)
 
 #Register the origins
 origins = ["*"]
@@ -30,12 +37,21 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"]
 )
+app.add_middleware(MetricsMiddleware)
+if settings.sql_profiling:
+	app.add_middleware(
+		SQLProfilingMiddleware,
+		headers=settings.is_debug(),
+		slow_request_ms=settings.slow_request_ms,
+		n_plus_one_threshold=settings.n_plus_one_threshold,
+	)
 
 
 app.include_router(auth_router, prefix="/api/auth", tags=['Auth'])
 app.include_router(task_router, prefix="/api/task", tags=["Tasks"])
 app.include_router(work_type_router, prefix="/api/workType")
 app.include_router(voltage_router, prefix="/api/voltage")
+app.mount("/metrics", metrics_app())
 
 
 @app.get('/')
@@ -0,0 +1,123 @@
+import asyncio
+from pathlib import Path
+
+import typer
+
+from app import server
+from app.db.main import engine
+from app.settings import Config
+from app.tasks import partitions
+from app.tasks.backfill import DEFAULT_CHECKPOINT, GeotagBackfill
+from app.tasks.clusters import TaskClusterService
+from app.tasks.geocoding import geocoder
+from app.tasks.purge import purge_tasks
+from app.utils.idempotency import idempotency_keys
+
+cli = typer.Typer(help="Commandes d'administration de l'API Тек Блок")
+partitions_cli = typer.Typer(help="Partitions mensuelles de la table tasks")
+tasks_cli = typer.Typer(help="Maintenance des tâches")
+geocode_cli = typer.Typer(help="Géocodage hors ligne des adresses")
+cli.add_typer(partitions_cli, name="partitions")
+cli.add_typer(tasks_cli, name="tasks")
+cli.add_typer(geocode_cli, name="geocode")
+
+
+@cli.command("serve")
+def serve(
+		host: str = typer.Option("0.0.0.0"),
+		port: int = typer.Option(8000),
+		workers: int = typer.Option(None, help="Worker processes (default: WEB_CONCURRENCY or available CPUs)")
+):
+	"""Run the API with the production server profile."""
+	server.serve(host, port, workers)
+
+
+@partitions_cli.command("ensure")
+def ensure_partitions(
+		months_ahead: int = typer.Option(Config.task_partition_months_ahead, help="Months to create ahead of the current one")
+):
+	"""Create the monthly partitions for the coming months."""
+	async def run():
+		async with engine.begin() as conn:
+			return await partitions.ensure_partitions(conn, months_ahead)
+
+	created = asyncio.run(run())
+	typer.echo(f"Created partitions: {', '.join(created) or 'none'}")
+
+
+@partitions_cli.command("archive")
+def archive_partitions(
+		keep_months: int = typer.Option(Config.task_archive_after_months, help="Months kept in the hot table")
+):
+	"""Detach partitions older than the retention window into the archive schema."""
+	async def run():
+		async with engine.begin() as conn:
+			return await partitions.archive_partitions(conn, keep_months)
+
+	archived = asyncio.run(run())
+	typer.echo(f"Archived partitions: {', '.join(archived) or 'none'}")
+
+
+@tasks_cli.command("purge")
+def purge(
+		batch_size: int = typer.Option(1000, help="Rows deleted per transaction"),
+		pause: float = typer.Option(0.1, help="Seconds to sleep between batches")
+):
+	"""Physically delete soft-deleted and cleared tasks in bounded batches."""
+	deleted = asyncio.run(purge_tasks(batch_size, pause))
+	typer.echo(f"Purged {deleted} tasks")
+
+
+@tasks_cli.command("purge-idempotency-keys")
+def purge_idempotency_keys():
+	"""Delete the stored responses of expired idempotency keys."""
+	deleted = asyncio.run(idempotency_keys.purge_expired())
+	typer.echo(f"Deleted {deleted} expired idempotency keys")
+
+
+@tasks_cli.command("rebuild-cluster-tiles")
+def rebuild_cluster_tiles():
+	"""Recompute the precomputed map cluster tiles from the tasks table."""
+	asyncio.run(TaskClusterService().rebuild())
+	typer.echo("Cluster tiles rebuilt")
+
+
+@tasks_cli.command("geotag-backfill")
+def geotag_backfill(
+		batch_size: int = typer.Option(500, help="Tasks resolved and updated per transaction"),
+		concurrency: int = typer.Option(16, help="Photo sets resolved at the same time"),
+		checkpoint: Path = typer.Option(DEFAULT_CHECKPOINT, help="File recording the last processed task id"),
+		restart: bool = typer.Option(False, "--restart", help="Ignore the checkpoint and start from the first task")
+):
+	"""Set the coordinates of tasks that have photos but no coordinates, from the photos' EXIF."""
+	def report(progress, rate):
+		typer.echo(f"up to id {progress.last_id}: {progress.geotagged}/{progress.scanned} geotagged, {rate:.1f} tasks/s")
+
+	progress = asyncio.run(GeotagBackfill(checkpoint, batch_size, concurrency).run(restart, report))
+	typer.echo(f"Geotagged {progress.geotagged} of {progress.scanned} tasks with photos and no coordinates")
+	if progress.failed_ids:
+		typer.echo(f"{len(progress.failed_ids)} tasks had photos that could not be downloaded; run again to retry them")
+
+
+@geocode_cli.command("load")
+def load_gazetteer(
+		path: Path = typer.Argument(..., exists=True, dir_okay=False, help="CSV with address, latitude, longitude"),
+		replace: bool = typer.Option(False, "--replace", help="Delete the current gazetteer first")
+):
+	"""Load an address gazetteer file into the gazetteer table."""
+	loaded = asyncio.run(geocoder.load(path, replace))
+	typer.echo(f"Loaded {loaded} gazetteer entries")
+
+
+@geocode_cli.command("backfill")
+def geocode_backfill(
+		batch_size: int = typer.Option(1000, help="Tasks geocoded per transaction"),
+		include_completed: bool = typer.Option(False, "--all", help="Also geocode completed tasks without coordinates")
+):
+	"""Geocode the addresses of tasks that have no coordinates yet."""
+	scanned, geocoded = asyncio.run(geocoder.backfill(batch_size, include_completed))
+	typer.echo(f"Geocoded {geocoded} of {scanned} tasks without coordinates")
+
+
+if __name__ == "__main__":
+	cli()
@@ -0,0 +1,88 @@
+"""Task events and notify triggers
+
+Revision ID: 1b9d5f0e7c3a
+Revises: e5b830c6d9a1
+Create Date: 2026-10-19 17:52:09.315604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b9d5f0e7c3a'
+down_revision: Union[str, None] = 'e5b830c6d9a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('task_events',
+    sa.Column('id', sa.BIGINT(), autoincrement=True, nullable=False),
+    sa.Column('task_id', sa.INTEGER(), nullable=True),
+    sa.Column('kind', sa.VARCHAR(), nullable=False),
+    sa.Column('created_at', postgresql.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    op.execute("""
+        CREATE FUNCTION publish_task_event(p_task_id INTEGER, p_kind VARCHAR) RETURNS VOID AS $$
+        DECLARE
+            event_id BIGINT;
+        BEGIN
+            INSERT INTO task_events (task_id, kind) VALUES (p_task_id, p_kind) RETURNING id INTO event_id;
+            PERFORM pg_notify('task_events', json_build_object('id', event_id, 'task_id', p_task_id, 'kind', p_kind)::text);
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Un UPDATE qui change de partition (complétion d'une tâche en attente) est exécuté
+    # comme DELETE + INSERT : l'INSERT d'une ligne complétée produit donc l'événement
+    # « completed ». Les DELETE physiques ne viennent que de la purge et sont ignorés.
+    op.execute("""
+        CREATE FUNCTION tasks_notify() RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM publish_task_event(NEW.id, CASE WHEN NEW.is_completed THEN 'completed' ELSE 'created' END);
+            ELSIF NEW.deleted_at IS NOT NULL AND OLD.deleted_at IS NULL THEN
+                PERFORM publish_task_event(NEW.id, 'deleted');
+            ELSIF NEW.is_completed AND NOT coalesce(OLD.is_completed, false) THEN
+                PERFORM publish_task_event(NEW.id, 'completed');
+            ELSE
+                PERFORM publish_task_event(NEW.id, 'updated');
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_notify AFTER INSERT OR UPDATE ON tasks
+        FOR EACH ROW EXECUTE FUNCTION tasks_notify()
+    """)
+
+    op.execute("""
+        CREATE FUNCTION task_purges_notify() RETURNS TRIGGER AS $$
+        BEGIN
+            IF NEW.cleared_up_to_id IS NOT NULL THEN
+                PERFORM publish_task_event(NULL, 'cleared');
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER task_purges_notify AFTER INSERT ON task_purges
+        FOR EACH ROW EXECUTE FUNCTION task_purges_notify()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER task_purges_notify ON task_purges")
+    op.execute("DROP FUNCTION task_purges_notify()")
+    op.execute("DROP TRIGGER tasks_notify ON tasks")
+    op.execute("DROP FUNCTION tasks_notify()")
+    op.execute("DROP FUNCTION publish_task_event(INTEGER, VARCHAR)")
+    op.drop_table('task_events')
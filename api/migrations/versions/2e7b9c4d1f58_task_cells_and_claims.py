@@ -0,0 +1,112 @@
+"""Task grid cells and claims
+
+Revision ID: 2e7b9c4d1f58
+Revises: 7a4c2e9f1d86
+Create Date: 2026-10-19 22:03:51.640172
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import text
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2e7b9c4d1f58'
+down_revision: Union[str, None] = '7a4c2e9f1d86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _archived_partitions(bind) -> list[str]:
+    return bind.execute(text(
+        "SELECT tablename FROM pg_tables WHERE schemaname = 'archive' AND tablename LIKE 'tasks_p%'"
+    )).scalars().all()
+
+
+def _columns():
+    return [
+        sa.Column('cell', sa.BIGINT(), nullable=True),
+        sa.Column('claimed_by', postgresql.UUID(), nullable=True),
+        sa.Column('claim_expires_at', postgresql.TIMESTAMP(), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    for column in _columns():
+        op.add_column('tasks', column)
+    # Les partitions détachées doivent garder la même forme que `tasks`
+    for name in _archived_partitions(bind):
+        for column in _columns():
+            op.add_column(name, column, schema='archive')
+
+    # Même quantification et même entrelacement que app.utils.geo.geo_cell
+    op.execute("""
+        CREATE FUNCTION geo_cell(lat DOUBLE PRECISION, lon DOUBLE PRECISION) RETURNS BIGINT AS $$
+        DECLARE
+            x BIGINT := greatest(least(floor((lon + 180) / 360 * 67108864), 67108863), 0);
+            y BIGINT := greatest(least(floor((lat + 90) / 180 * 67108864), 67108863), 0);
+        BEGIN
+            x := (x | (x << 16)) & 281470681808895;
+            x := (x | (x << 8)) & 71777214294589695;
+            x := (x | (x << 4)) & 1085102592571150095;
+            x := (x | (x << 2)) & 3689348814741910323;
+            x := (x | (x << 1)) & 6148914691236517205;
+            y := (y | (y << 16)) & 281470681808895;
+            y := (y | (y << 8)) & 71777214294589695;
+            y := (y | (y << 4)) & 1085102592571150095;
+            y := (y | (y << 2)) & 3689348814741910323;
+            y := (y | (y << 1)) & 6148914691236517205;
+            RETURN x | (y << 1);
+        END;
+        $$ LANGUAGE plpgsql IMMUTABLE STRICT PARALLEL SAFE
+    """)
+    op.execute("""
+        CREATE FUNCTION tasks_set_cell() RETURNS TRIGGER AS $$
+        BEGIN
+            NEW.cell := geo_cell(NEW.latitude, NEW.longitude);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_set_cell BEFORE INSERT OR UPDATE OF latitude, longitude ON tasks
+        FOR EACH ROW EXECUTE FUNCTION tasks_set_cell()
+    """)
+
+    # Remplissage sans publier un événement par ligne
+    op.execute("ALTER TABLE tasks DISABLE TRIGGER tasks_notify")
+    op.execute("""
+        UPDATE tasks SET cell = geo_cell(latitude, longitude)
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+    """)
+    op.execute("ALTER TABLE tasks ENABLE TRIGGER tasks_notify")
+
+    op.create_index(
+        'ix_tasks_cell_live', 'tasks', ['cell'],
+        unique=False, postgresql_where=sa.text('deleted_at IS NULL')
+    )
+    op.create_index(
+        'ix_tasks_claimed_by', 'tasks', ['claimed_by'],
+        unique=False, postgresql_where=sa.text('claimed_by IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+
+    op.drop_index('ix_tasks_claimed_by', table_name='tasks')
+    op.drop_index('ix_tasks_cell_live', table_name='tasks')
+    op.execute("DROP TRIGGER tasks_set_cell ON tasks")
+    op.execute("DROP FUNCTION tasks_set_cell()")
+    op.execute("DROP FUNCTION geo_cell(DOUBLE PRECISION, DOUBLE PRECISION)")
+
+    for name in _archived_partitions(bind):
+        for column in reversed(_columns()):
+            op.drop_column(name, column.name, schema='archive')
+    for column in reversed(_columns()):
+        op.drop_column('tasks', column.name)
@@ -0,0 +1,26 @@
+"""Add task version for optimistic concurrency
+
+Revision ID: 3c1f7a9e2b54
+Revises: f9b85e3dd3ee
+Create Date: 2026-10-19 14:40:12.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f7a9e2b54'
+down_revision: Union[str, None] = 'f9b85e3dd3ee'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('version', sa.INTEGER(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('tasks', 'version')
@@ -0,0 +1,40 @@
+"""Address gazetteer for offline geocoding
+
+Revision ID: 5b1e8d4a7c29
+Revises: 9f3d6a2c8b17
+Create Date: 2026-10-19 23:12:40.117952
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e8d4a7c29'
+down_revision: Union[str, None] = '9f3d6a2c8b17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_table('gazetteer',
+    sa.Column('id', sa.INTEGER(), autoincrement=True, nullable=False),
+    sa.Column('address', sa.VARCHAR(), nullable=False),
+    sa.Column('normalized', sa.VARCHAR(), nullable=False),
+    sa.Column('latitude', sa.FLOAT(), nullable=False),
+    sa.Column('longitude', sa.FLOAT(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # GiST plutôt que GIN : permet le tri par distance (<->) pour le meilleur candidat
+    op.create_index(
+        'ix_gazetteer_normalized_trgm', 'gazetteer', ['normalized'], unique=False,
+        postgresql_using='gist', postgresql_ops={'normalized': 'gist_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_gazetteer_normalized_trgm', table_name='gazetteer', postgresql_using='gist')
+    op.drop_table('gazetteer')
@@ -0,0 +1,61 @@
+"""Commit-safe cursor for task events
+
+Revision ID: 6c3e9a1d4b72
+Revises: 5b1e8d4a7c29
+Create Date: 2026-10-20 10:21:09.418337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c3e9a1d4b72'
+down_revision: Union[str, None] = '5b1e8d4a7c29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Les id viennent de la séquence à l'INSERT mais deviennent visibles au COMMIT :
+    # chaque événement garde la transaction qui l'a produit (txid) et le plus ancien
+    # xid encore en cours à ce moment (snapshot_xmin). Toute transaction validée après
+    # lui a un txid >= snapshot_xmin, ce qui permet une reprise sans perte.
+    op.execute("""
+        ALTER TABLE task_events
+            ADD COLUMN txid xid8 NOT NULL DEFAULT pg_current_xact_id(),
+            ADD COLUMN snapshot_xmin xid8 NOT NULL DEFAULT pg_snapshot_xmin(pg_current_snapshot())
+    """)
+    op.create_index('ix_task_events_txid', 'task_events', ['txid'], unique=False)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION publish_task_event(p_task_id INTEGER, p_kind VARCHAR) RETURNS VOID AS $$
+        DECLARE
+            event_id BIGINT;
+            event_xmin xid8;
+        BEGIN
+            INSERT INTO task_events (task_id, kind) VALUES (p_task_id, p_kind)
+            RETURNING id, snapshot_xmin INTO event_id, event_xmin;
+            PERFORM pg_notify('task_events', json_build_object(
+                'id', event_id, 'task_id', p_task_id, 'kind', p_kind, 'xmin', event_xmin::text
+            )::text);
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION publish_task_event(p_task_id INTEGER, p_kind VARCHAR) RETURNS VOID AS $$
+        DECLARE
+            event_id BIGINT;
+        BEGIN
+            INSERT INTO task_events (task_id, kind) VALUES (p_task_id, p_kind) RETURNING id INTO event_id;
+            PERFORM pg_notify('task_events', json_build_object('id', event_id, 'task_id', p_task_id, 'kind', p_kind)::text);
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.drop_index('ix_task_events_txid', table_name='task_events')
+    op.execute("ALTER TABLE task_events DROP COLUMN snapshot_xmin, DROP COLUMN txid")
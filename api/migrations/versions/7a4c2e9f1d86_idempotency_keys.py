@@ -0,0 +1,37 @@
+"""Idempotency keys
+
+Revision ID: 7a4c2e9f1d86
+Revises: 1b9d5f0e7c3a
+Create Date: 2026-10-19 21:14:37.208413
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a4c2e9f1d86'
+down_revision: Union[str, None] = '1b9d5f0e7c3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('idempotency_keys',
+    sa.Column('user_id', postgresql.UUID(), nullable=False),
+    sa.Column('key', sa.VARCHAR(length=255), nullable=False),
+    sa.Column('request_hash', sa.CHAR(length=64), nullable=False),
+    sa.Column('status_code', sa.SMALLINT(), nullable=True),
+    sa.Column('response', postgresql.BYTEA(), nullable=True),
+    sa.Column('expires_at', postgresql.TIMESTAMP(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'key')
+    )
+    op.create_index(op.f('ix_idempotency_keys_expires_at'), 'idempotency_keys', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_idempotency_keys_expires_at'), table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
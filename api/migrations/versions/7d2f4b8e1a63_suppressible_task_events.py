@@ -0,0 +1,56 @@
+"""Suppressible task events
+
+Revision ID: 7d2f4b8e1a63
+Revises: 6c3e9a1d4b72
+Create Date: 2026-10-20 15:04:37.226918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2f4b8e1a63'
+down_revision: Union[str, None] = '6c3e9a1d4b72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TASKS_NOTIFY_BODY = """
+            IF TG_OP = 'INSERT' THEN
+                PERFORM publish_task_event(NEW.id, CASE WHEN NEW.is_completed THEN 'completed' ELSE 'created' END);
+            ELSIF NEW.deleted_at IS NOT NULL AND OLD.deleted_at IS NULL THEN
+                PERFORM publish_task_event(NEW.id, 'deleted');
+            ELSIF NEW.is_completed AND NOT coalesce(OLD.is_completed, false) THEN
+                PERFORM publish_task_event(NEW.id, 'completed');
+            ELSE
+                PERFORM publish_task_event(NEW.id, 'updated');
+            END IF;
+            RETURN NULL;
+"""
+
+
+def upgrade() -> None:
+    # Les backfills (géotag, géocodage) écrivent des milliers de lignes : la transaction
+    # qui pose app.suppress_task_events (SET LOCAL) ne produit aucun événement par ligne.
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION tasks_notify() RETURNS TRIGGER AS $$
+        BEGIN
+            IF current_setting('app.suppress_task_events', true) = 'on' THEN
+                RETURN NULL;
+            END IF;
+{TASKS_NOTIFY_BODY}
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION tasks_notify() RETURNS TRIGGER AS $$
+        BEGIN
+{TASKS_NOTIFY_BODY}
+        END;
+        $$ LANGUAGE plpgsql
+    """)
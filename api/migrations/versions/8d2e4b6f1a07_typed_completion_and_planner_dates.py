@@ -0,0 +1,127 @@
+"""Typed completion and planner dates
+
+Revision ID: 8d2e4b6f1a07
+Revises: 3c1f7a9e2b54
+Create Date: 2026-10-19 15:05:47.502913
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import text
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2e4b6f1a07'
+down_revision: Union[str, None] = '3c1f7a9e2b54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+BATCH_SIZE = 5000
+
+# Conversions tolérantes : une valeur hors plage (« 32.13.2024 ») donne NULL au lieu
+# d'interrompre le remplissage au milieu de la table. Fonctions de session (pg_temp).
+CREATE_HELPERS_SQL = [
+    text("""
+        CREATE FUNCTION pg_temp.try_to_date(value text, format text) RETURNS date
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            RETURN to_date(value, format);
+        EXCEPTION WHEN others THEN
+            RETURN NULL;
+        END $$
+    """),
+    text("""
+        CREATE FUNCTION pg_temp.try_to_timestamp(value text, format text) RETURNS timestamp
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            RETURN to_timestamp(value, format)::timestamp;
+        EXCEPTION WHEN others THEN
+            RETURN NULL;
+        END $$
+    """),
+]
+
+# Conversion ensembliste des anciennes chaînes, une plage d'id à la fois.
+# Les formats reconnus sont ceux de app.utils.dates.PLANNER_DATE_INPUT_FORMATS.
+BACKFILL_SQL = text(r"""
+    UPDATE tasks SET
+        completed_at = CASE
+            WHEN completion_date ~ '^\d{2}-\d{2}-\d{4} \d{2}:\d{2}$'
+                THEN pg_temp.try_to_timestamp(completion_date, 'DD-MM-YYYY HH24:MI')
+        END,
+        planned_date = CASE
+            WHEN planner_date ~ '^\d{4}-\d{2}-\d{2}( \d{2}:\d{2}:\d{2})?$'
+                THEN pg_temp.try_to_date(left(planner_date, 10), 'YYYY-MM-DD')
+            WHEN planner_date ~ '^\d{2}\.\d{2}\.\d{4}$'
+                THEN pg_temp.try_to_date(planner_date, 'DD.MM.YYYY')
+            WHEN planner_date ~ '^\d{2}-\d{2}-\d{4}$'
+                THEN pg_temp.try_to_date(planner_date, 'DD-MM-YYYY')
+            WHEN planner_date ~ '^\d{2}/\d{2}/\d{4}$'
+                THEN pg_temp.try_to_date(planner_date, 'DD/MM/YYYY')
+            WHEN planner_date ~ '^\d{2}\.\d{2}\.\d{2}$'
+                THEN pg_temp.try_to_date(planner_date, 'DD.MM.YY')
+        END
+    WHERE id >= :low AND id < :high
+""")
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('completed_at', sa.TIMESTAMP(), nullable=True))
+    op.add_column('tasks', sa.Column('planned_date', sa.DATE(), nullable=True))
+
+    # Chaque lot est validé séparément pour ne pas verrouiller toute la table
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        for statement in CREATE_HELPERS_SQL:
+            bind.execute(statement)
+        low, high = bind.execute(text("SELECT min(id), max(id) FROM tasks")).one()
+        if low is not None:
+            for start in range(low, high + 1, BATCH_SIZE):
+                bind.execute(BACKFILL_SQL, {"low": start, "high": start + BATCH_SIZE})
+
+        unparsed = bind.execute(text("""
+            SELECT
+                count(*) FILTER (WHERE btrim(planner_date) <> '' AND planned_date IS NULL),
+                count(*) FILTER (WHERE btrim(completion_date) <> '' AND completed_at IS NULL)
+            FROM tasks
+        """)).one()
+        if any(unparsed):
+            # c47a91d3e5f2 refuse de supprimer les colonnes texte tant que ces valeurs restent
+            logger.warning(
+                "%s planner_date and %s completion_date values could not be converted; set "
+                "planned_date / completed_at for them before upgrading past c47a91d3e5f2",
+                *unparsed
+            )
+
+        op.create_index(
+            op.f('ix_tasks_completed_at'), 'tasks', ['completed_at'],
+            unique=False, postgresql_concurrently=True
+        )
+        op.create_index(
+            op.f('ix_tasks_planned_date'), 'tasks', ['planned_date'],
+            unique=False, postgresql_concurrently=True
+        )
+
+    # Les anciennes colonnes texte restent en place (non mappées) jusqu'à la révision
+    # suivante, c47a91d3e5f2, qui les supprime après avoir vérifié qu'aucune valeur n'est
+    # restée sans conversion.
+
+
+def downgrade() -> None:
+    op.execute(text("""
+        UPDATE tasks SET completion_date = to_char(completed_at, 'DD-MM-YYYY HH24:MI')
+        WHERE completed_at IS NOT NULL
+    """))
+    op.execute(text("""
+        UPDATE tasks SET planner_date = to_char(planned_date, 'DD.MM.YYYY')
+        WHERE planner_date IS NULL AND planned_date IS NOT NULL
+    """))
+    op.drop_index(op.f('ix_tasks_planned_date'), table_name='tasks')
+    op.drop_index(op.f('ix_tasks_completed_at'), table_name='tasks')
+    op.drop_column('tasks', 'planned_date')
+    op.drop_column('tasks', 'completed_at')
@@ -0,0 +1,82 @@
+"""Task cluster tiles
+
+Revision ID: 9f3d6a2c8b17
+Revises: 2e7b9c4d1f58
+Create Date: 2026-10-19 22:41:12.508337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f3d6a2c8b17'
+down_revision: Union[str, None] = '2e7b9c4d1f58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('task_cluster_tiles',
+    sa.Column('level', sa.SMALLINT(), nullable=False),
+    sa.Column('key', sa.BIGINT(), nullable=False),
+    sa.Column('completed', sa.BOOLEAN(), nullable=False),
+    sa.Column('work_type', sa.VARCHAR(), nullable=False),
+    sa.Column('count', sa.INTEGER(), nullable=False),
+    sa.Column('lat_sum', sa.FLOAT(), nullable=False),
+    sa.Column('lon_sum', sa.FLOAT(), nullable=False),
+    sa.PrimaryKeyConstraint('level', 'key', 'completed', 'work_type')
+    )
+    op.create_table('task_cluster_deltas',
+    sa.Column('id', sa.BIGINT(), autoincrement=True, nullable=False),
+    sa.Column('task_id', sa.INTEGER(), nullable=False),
+    sa.Column('cell', sa.BIGINT(), nullable=False),
+    sa.Column('completed', sa.BOOLEAN(), nullable=False),
+    sa.Column('work_type', sa.VARCHAR(), nullable=False),
+    sa.Column('count', sa.SMALLINT(), nullable=False),
+    sa.Column('lat_sum', sa.FLOAT(), nullable=False),
+    sa.Column('lon_sum', sa.FLOAT(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Vide : la première lecture des clusters lance la construction en arrière-plan
+    op.create_table('task_cluster_state',
+    sa.Column('id', sa.SMALLINT(), nullable=False),
+    sa.Column('cleared_up_to_id', sa.INTEGER(), nullable=False),
+    sa.Column('built_at', postgresql.TIMESTAMP(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # Chaque écriture ne fait qu'ajouter des lignes : pas de verrou partagé sur les tuiles
+    # grossières pendant les transactions de complétion. Le déplacement de partition d'une
+    # complétion arrive ici comme DELETE + INSERT.
+    op.execute("""
+        CREATE FUNCTION tasks_cluster_delta() RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' AND OLD.deleted_at IS NULL AND OLD.cell IS NOT NULL THEN
+                INSERT INTO task_cluster_deltas (task_id, cell, completed, work_type, count, lat_sum, lon_sum)
+                VALUES (OLD.id, OLD.cell, OLD.completed_at IS NOT NULL, OLD.work_type, -1, -OLD.latitude, -OLD.longitude);
+            END IF;
+            IF TG_OP <> 'DELETE' AND NEW.deleted_at IS NULL AND NEW.cell IS NOT NULL THEN
+                INSERT INTO task_cluster_deltas (task_id, cell, completed, work_type, count, lat_sum, lon_sum)
+                VALUES (NEW.id, NEW.cell, NEW.completed_at IS NOT NULL, NEW.work_type, 1, NEW.latitude, NEW.longitude);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_cluster_delta
+        AFTER INSERT OR DELETE OR UPDATE OF latitude, longitude, completed_at, work_type, deleted_at ON tasks
+        FOR EACH ROW EXECUTE FUNCTION tasks_cluster_delta()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER tasks_cluster_delta ON tasks")
+    op.execute("DROP FUNCTION tasks_cluster_delta()")
+    op.drop_table('task_cluster_state')
+    op.drop_table('task_cluster_deltas')
+    op.drop_table('task_cluster_tiles')
@@ -0,0 +1,161 @@
+"""Partition tasks by completion month
+
+Revision ID: c47a91d3e5f2
+Revises: 8d2e4b6f1a07
+Create Date: 2026-10-19 15:48:03.771205
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47a91d3e5f2'
+down_revision: Union[str, None] = '8d2e4b6f1a07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+MONTHS_AHEAD = 3
+
+COLUMNS = (
+    "id, dispatcher_name, address, planned_date, work_type, voltage, job, latitude, longitude, "
+    "photos, comments, completed_at, is_completed, created_at, version, worker_id"
+)
+
+COLUMNS_DDL = """
+    id INTEGER NOT NULL DEFAULT nextval('tasks_id_seq'),
+    dispatcher_name VARCHAR NOT NULL,
+    address VARCHAR NOT NULL,
+    planned_date DATE,
+    work_type VARCHAR NOT NULL,
+    voltage FLOAT NOT NULL,
+    job VARCHAR,
+    latitude FLOAT,
+    longitude FLOAT,
+    photos VARCHAR[],
+    comments TEXT,
+    completed_at TIMESTAMP,
+    is_completed BOOLEAN,
+    created_at TIMESTAMP NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    worker_id UUID REFERENCES users (uid),
+    CONSTRAINT photos_length_check CHECK (array_length(photos, 1) BETWEEN 2 AND 5)
+"""
+
+INDEXES = (
+    ('ix_tasks_worker_id', ['worker_id']),
+    ('ix_tasks_completed_at', ['completed_at']),
+    ('ix_tasks_planned_date', ['planned_date']),
+    ('ix_tasks_created_at', ['created_at']),
+)
+
+
+def _add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _copy_in_batches(bind, source: str, target: str) -> None:
+    low, high = bind.execute(text(f"SELECT min(id), max(id) FROM {source}")).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, BATCH_SIZE):
+        bind.execute(
+            text(f"INSERT INTO {target} ({COLUMNS}) SELECT {COLUMNS} FROM {source} WHERE id >= :low AND id < :high"),
+            {"low": start, "high": start + BATCH_SIZE}
+        )
+
+
+def _check_legacy_dates(bind) -> None:
+    # Les colonnes texte disparaissent avec l'ancienne table : on refuse de perdre une
+    # date que 8d2e4b6f1a07 n'a pas su convertir
+    rows = bind.execute(text("""
+        SELECT id, planner_date, completion_date FROM tasks
+        WHERE (planner_date IS NOT NULL AND btrim(planner_date) <> '' AND planned_date IS NULL)
+           OR (completion_date IS NOT NULL AND btrim(completion_date) <> '' AND completed_at IS NULL)
+        ORDER BY id
+        LIMIT 20
+    """)).all()
+    if rows:
+        sample = ", ".join(f"id {row.id}: {row.planner_date!r} / {row.completion_date!r}" for row in rows)
+        raise RuntimeError(
+            "tasks.planner_date / tasks.completion_date hold values that were not converted "
+            f"(e.g. {sample}). Fix planned_date / completed_at for these rows, then re-run the upgrade."
+        )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    _check_legacy_dates(bind)
+
+    op.execute("CREATE SCHEMA IF NOT EXISTS archive")
+
+    # Mise de côté de l'ancienne table ; ses index libèrent leurs noms
+    op.rename_table('tasks', 'tasks_legacy')
+    op.execute("ALTER TABLE tasks_legacy RENAME CONSTRAINT tasks_pkey TO tasks_legacy_pkey")
+    for name, _ in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+    # Les colonnes texte conservées par 8d2e4b6f1a07 ne sont pas reprises (vérifiées plus haut).
+    # Pas de clé primaire sans la clé de partition, nullable : l'unicité de id seul est
+    # assurée par le registre task_ids (e3a8c5f20d94)
+    op.execute(f"""
+        CREATE TABLE tasks ({COLUMNS_DDL},
+            CONSTRAINT tasks_id_completed_at_key UNIQUE NULLS NOT DISTINCT (id, completed_at)
+        ) PARTITION BY RANGE (completed_at)
+    """)
+    op.execute("ALTER SEQUENCE tasks_id_seq OWNED BY tasks.id")
+    op.execute("CREATE TABLE tasks_pending PARTITION OF tasks DEFAULT")
+
+    first = bind.execute(text("SELECT date_trunc('month', min(completed_at))::date FROM tasks_legacy")).scalar()
+    current = date.today().replace(day=1)
+    month = first or current
+    while month <= _add_months(current, MONTHS_AHEAD):
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE tasks_p{month.year:04d}_{month.month:02d} PARTITION OF tasks "
+            f"FOR VALUES FROM ('{month}') TO ('{upper}')"
+        )
+        month = upper
+
+    _copy_in_batches(bind, 'tasks_legacy', 'tasks')
+    op.drop_table('tasks_legacy')
+
+    for name, columns in INDEXES:
+        op.create_index(name, 'tasks', columns, unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+
+    op.execute(f"""
+        CREATE TABLE tasks_plain ({COLUMNS_DDL},
+            completion_date VARCHAR,
+            planner_date VARCHAR,
+            CONSTRAINT tasks_plain_pkey PRIMARY KEY (id)
+        )
+    """)
+    _copy_in_batches(bind, 'tasks', 'tasks_plain')
+
+    # Les partitions archivées sont réintégrées avant suppression
+    archived = bind.execute(text(
+        "SELECT tablename FROM pg_tables WHERE schemaname = 'archive' AND tablename LIKE 'tasks_p%'"
+    )).scalars().all()
+    for name in archived:
+        _copy_in_batches(bind, f"archive.{name}", 'tasks_plain')
+        op.execute(f"DROP TABLE archive.{name}")
+
+    op.execute("ALTER SEQUENCE tasks_id_seq OWNED BY tasks_plain.id")
+    op.drop_table('tasks')
+    op.rename_table('tasks_plain', 'tasks')
+    op.execute("ALTER TABLE tasks RENAME CONSTRAINT tasks_plain_pkey TO tasks_pkey")
+
+    for name, columns in INDEXES:
+        if name != 'ix_tasks_created_at':
+            op.create_index(name, 'tasks', columns, unique=False)
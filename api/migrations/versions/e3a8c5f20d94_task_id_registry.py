@@ -0,0 +1,81 @@
+"""Task id registry
+
+Revision ID: e3a8c5f20d94
+Revises: 7d2f4b8e1a63
+Create Date: 2026-10-20 17:12:48.530164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a8c5f20d94'
+down_revision: Union[str, None] = '7d2f4b8e1a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _check_duplicate_ids(bind) -> None:
+    duplicates = bind.execute(text("""
+        SELECT id, count(*) AS copies FROM tasks GROUP BY id HAVING count(*) > 1 ORDER BY id LIMIT 20
+    """)).all()
+    if duplicates:
+        sample = ", ".join(f"id {row.id} ({row.copies} rows)" for row in duplicates)
+        raise RuntimeError(
+            f"tasks holds several rows with the same id (e.g. {sample}). "
+            "Keep one row per id, then re-run the upgrade."
+        )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    # Une clé primaire d'une table partitionnée doit contenir la clé de partition
+    # (completed_at, nullable) : tasks n'a que UNIQUE (id, completed_at), qui laisse
+    # le même id exister dans deux partitions. Chaque id est donc aussi inscrit ici.
+    _check_duplicate_ids(bind)
+    op.create_table('task_ids',
+    sa.Column('id', sa.INTEGER(), autoincrement=False, nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("INSERT INTO task_ids (id) SELECT id FROM tasks")
+    # Les partitions archivées gardent leurs id : ils ne sont pas réattribués
+    archived = bind.execute(text(
+        "SELECT tablename FROM pg_tables WHERE schemaname = 'archive' AND tablename LIKE 'tasks_p%'"
+    )).scalars().all()
+    for name in archived:
+        op.execute(f"INSERT INTO task_ids (id) SELECT id FROM archive.{name}")
+
+    # Un changement de partition (complétion) est exécuté comme DELETE + INSERT : l'id
+    # est retiré puis réinscrit dans la même transaction
+    op.execute("""
+        CREATE FUNCTION tasks_register_id() RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO task_ids (id) VALUES (NEW.id);
+                RETURN NEW;
+            ELSIF TG_OP = 'DELETE' THEN
+                DELETE FROM task_ids WHERE id = OLD.id;
+                RETURN OLD;
+            END IF;
+            IF NEW.id <> OLD.id THEN
+                UPDATE task_ids SET id = NEW.id WHERE id = OLD.id;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_register_id BEFORE INSERT OR DELETE OR UPDATE OF id ON tasks
+        FOR EACH ROW EXECUTE FUNCTION tasks_register_id()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER tasks_register_id ON tasks")
+    op.execute("DROP FUNCTION tasks_register_id()")
+    op.drop_table('task_ids')
@@ -0,0 +1,77 @@
+"""Soft delete tasks and purge log
+
+Revision ID: e5b830c6d9a1
+Revises: c47a91d3e5f2
+Create Date: 2026-10-19 16:31:25.640118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b830c6d9a1'
+down_revision: Union[str, None] = 'c47a91d3e5f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _archived_partitions(bind) -> list[str]:
+    return bind.execute(text(
+        "SELECT tablename FROM pg_tables WHERE schemaname = 'archive' AND tablename LIKE 'tasks_p%'"
+    )).scalars().all()
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    op.add_column('tasks', sa.Column('deleted_at', postgresql.TIMESTAMP(), nullable=True))
+    # Les partitions détachées doivent garder la même forme que `tasks`
+    for name in _archived_partitions(bind):
+        op.add_column(name, sa.Column('deleted_at', postgresql.TIMESTAMP(), nullable=True), schema='archive')
+
+    op.drop_index('ix_tasks_completed_at', table_name='tasks')
+    op.drop_index('ix_tasks_created_at', table_name='tasks')
+    op.create_index(
+        'ix_tasks_completed_at_live', 'tasks', ['completed_at'],
+        unique=False, postgresql_where=sa.text('deleted_at IS NULL')
+    )
+    op.create_index(
+        'ix_tasks_created_at_live', 'tasks', ['created_at'],
+        unique=False, postgresql_where=sa.text('deleted_at IS NULL')
+    )
+
+    op.create_table('task_purges',
+    sa.Column('id', sa.INTEGER(), autoincrement=True, nullable=False),
+    sa.Column('cleared_up_to_id', sa.INTEGER(), nullable=True),
+    sa.Column('requested_at', postgresql.TIMESTAMP(), nullable=False),
+    sa.Column('purged_up_to_id', sa.INTEGER(), nullable=True),
+    sa.Column('deleted_count', sa.INTEGER(), server_default='0', nullable=False),
+    sa.Column('finished_at', postgresql.TIMESTAMP(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+
+    # Les tâches masquées par un effacement logique sont supprimées pour de bon
+    op.execute(text("""
+        DELETE FROM tasks
+        WHERE deleted_at IS NOT NULL
+           OR id <= (SELECT coalesce(max(cleared_up_to_id), 0) FROM task_purges)
+    """))
+    op.drop_table('task_purges')
+
+    op.drop_index('ix_tasks_created_at_live', table_name='tasks')
+    op.drop_index('ix_tasks_completed_at_live', table_name='tasks')
+    op.create_index('ix_tasks_created_at', 'tasks', ['created_at'], unique=False)
+    op.create_index('ix_tasks_completed_at', 'tasks', ['completed_at'], unique=False)
+
+    for name in _archived_partitions(bind):
+        op.drop_column(name, 'deleted_at', schema='archive')
+    op.drop_column('tasks', 'deleted_at')
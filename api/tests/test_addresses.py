@@ -0,0 +1,41 @@
+import pytest
+
+from app.utils.addresses import normalize_address
+
+
+@pytest.mark.parametrize("address, expected", [
+	("ул. Ленина, д. 5", "улица ленина 5"),
+	("улица Ленина 5", "улица ленина 5"),
+	("пр-т Мира, 12", "проспект мира 12"),
+	("б-р Победы 3", "бульвар победы 3"),
+])
+def test_expands_abbreviations(address, expected):
+	assert normalize_address(address) == expected
+
+
+def test_drops_postcode_city_and_country():
+	assert normalize_address("644000, Россия, г. Омск, ул. Ленина, д. 5") == "омск улица ленина 5"
+
+
+def test_folds_yo_and_case():
+	assert normalize_address("ПОС. ЁЛКИНО") == "поселок елкино"
+
+
+@pytest.mark.parametrize("address, expected", [
+	("ул. Ленина 5к2", "улица ленина 5 корпус 2"),
+	("ул. Ленина 5корп2", "улица ленина 5 корпус 2"),
+	("ул. Ленина 5стр3", "улица ленина 5 строение 3"),
+	("ул. Ленина 5с3", "улица ленина 5 строение 3"),
+	("ул. Ленина, д. 12а, к. 1", "улица ленина 12а корпус 1"),
+])
+def test_house_building_suffix(address, expected):
+	assert normalize_address(address) == expected
+
+
+def test_standalone_s_is_a_village():
+	assert normalize_address("с. Ивановка, ул. Садовая 1") == "село ивановка улица садовая 1"
+
+
+def test_d_before_a_name_is_a_village():
+	assert normalize_address("д. Петровка, 7") == "деревня петровка 7"
+	assert normalize_address("д. 7") == "7"
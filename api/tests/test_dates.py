@@ -0,0 +1,38 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.utils.dates import format_completion_date, format_planner_date, parse_planner_date
+
+
+@pytest.mark.parametrize("value", [
+	"2024-03-05 00:00:00",
+	"2024-03-05",
+	"05.03.2024",
+	"05-03-2024",
+	"05/03/2024",
+	"05.03.24",
+	"  05.03.2024 ",
+	datetime(2024, 3, 5, 14, 30),
+	date(2024, 3, 5),
+])
+def test_parse_planner_date_formats(value):
+	assert parse_planner_date(value) == date(2024, 3, 5)
+
+
+@pytest.mark.parametrize("value", [None, "", "   "])
+def test_blank_planner_date_is_none(value):
+	assert parse_planner_date(value) is None
+
+
+@pytest.mark.parametrize("value", ["32.13.2024", "demain", "2024/03/05", "5 mars"])
+def test_unparseable_planner_date_raises(value):
+	with pytest.raises(ValueError):
+		parse_planner_date(value)
+
+
+def test_legacy_string_views():
+	assert format_completion_date(datetime(2024, 3, 5, 9, 7)) == "05-03-2024 09:07"
+	assert format_planner_date(date(2024, 3, 5)) == "05.03.2024"
+	assert format_completion_date(None) is None
+	assert format_planner_date(None) is None
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from app.utils.geo import (
+	CELL_BITS, bbox_around, boxes_around, cell_ranges, geo_cell, haversine_m, interleave, split_antimeridian
+)
+
+
+def test_interleave_puts_longitude_on_even_bits():
+	assert interleave(1, 0) == 0b01
+	assert interleave(0, 1) == 0b10
+	assert interleave(0b11, 0b01) == 0b0111
+	assert interleave((1 << CELL_BITS) - 1, (1 << CELL_BITS) - 1) == (1 << 2 * CELL_BITS) - 1
+
+
+def test_geo_cell_corners_and_clamping():
+	assert geo_cell(-90.0, -180.0) == 0
+	assert geo_cell(90.0, 180.0) == (1 << 2 * CELL_BITS) - 1
+	assert geo_cell(95.0, 200.0) == geo_cell(90.0, 180.0)
+
+
+def test_nearby_points_share_a_cell_prefix():
+	# ~1 m d'écart : mêmes cellules aux niveaux grossiers
+	shift = 2 * (CELL_BITS - 10)
+	assert geo_cell(55.7558, 37.6173) >> shift == geo_cell(55.75581, 37.61731) >> shift
+
+
+@pytest.mark.parametrize("box", [
+	(55.5, 37.3, 56.0, 37.9),
+	(-34.0, 18.3, -33.8, 18.6),
+	(0.0, -1.0, 1.0, 1.0),
+	(10.0, 10.0, 10.0, 10.0),
+])
+def test_cell_ranges_cover_the_box(box):
+	south, west, north, east = box
+	ranges = cell_ranges(*box)
+	assert len(ranges) <= 16
+	assert all(low <= high for low, high in ranges)
+	# Triées, disjointes et non adjacentes (fusionnées)
+	assert all(previous[1] + 1 < current[0] for previous, current in zip(ranges, ranges[1:]))
+
+	rng = random.Random(0)
+	for _ in range(500):
+		cell = geo_cell(rng.uniform(south, north), rng.uniform(west, east))
+		assert any(low <= cell <= high for low, high in ranges)
+
+
+def test_split_antimeridian():
+	assert split_antimeridian(60.0, 10.0, 61.0, 20.0) == [(60.0, 10.0, 61.0, 20.0)]
+	assert split_antimeridian(64.0, 179.0, 66.0, -179.0) == [(64.0, 179.0, 66.0, 180.0), (64.0, -180.0, 66.0, -179.0)]
+
+
+def test_bbox_around_wraps_across_the_antimeridian():
+	south, west, north, east = bbox_around(65.0, 179.9, 50_000)
+	assert west > east
+	assert 178.0 < west < 179.9 and -179.9 < east < -178.0
+	assert len(boxes_around(65.0, 179.9, 50_000)) == 2
+	assert len(boxes_around(65.0, 100.0, 50_000)) == 1
+
+
+def test_bbox_around_near_the_pole_spans_every_longitude():
+	south, west, north, east = bbox_around(89.9, 10.0, 50_000)
+	assert (west, east, north) == (-180.0, 180.0, 90.0)
+
+
+def test_bbox_around_encloses_the_circle():
+	south, west, north, east = bbox_around(55.75, 37.62, 10_000)
+	distances = haversine_m(55.75, 37.62, [south, north, 55.75, 55.75], [37.62, 37.62, west, east])
+	assert distances == pytest.approx([10_000] * 4, rel=1e-3)
+
+
+def test_haversine_one_degree_of_latitude():
+	assert haversine_m(0.0, 0.0, [1.0], [0.0])[0] == pytest.approx(111_195, rel=1e-4)
+	# Au travers du 180e méridien
+	assert haversine_m(0.0, 179.5, [0.0], [-179.5])[0] == pytest.approx(111_195, rel=1e-4)
@@ -0,0 +1,30 @@
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_blocking_test_fails_and_yielding_test_passes(pytester, monkeypatch):
+	monkeypatch.setenv("PYTHONPATH", str(API_DIR))
+	pytester.makepyfile("""
+		import asyncio
+		import time
+
+		def test_blocks_the_loop():
+			async def main():
+				time.sleep(0.3)
+			asyncio.run(main())
+
+		def test_awaits():
+			async def main():
+				await asyncio.sleep(0.3)
+			asyncio.run(main())
+	""")
+
+	result = pytester.runpytest_subprocess("-p", "app.utils.loop_blocking_plugin", "--loop-block-threshold", "100")
+
+	result.assert_outcomes(passed=1, failed=1)
+	result.stdout.fnmatch_lines([
+		"*test_blocks_the_loop*",
+		"*Event loop blocked during the test*",
+		"*time.sleep(0.3)*",
+	])
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from app.utils.admission import Priority, PriorityGate
+
+
+@pytest.mark.asyncio
+async def test_bulk_callers_leave_reserved_slots_free():
+	gate = PriorityGate(capacity=3, reserved=1)
+	assert await gate.acquire(Priority.BULK, timeout=0, max_waiting=0)
+	assert await gate.acquire(Priority.BULK, timeout=0, max_waiting=0)
+	assert not await gate.acquire(Priority.BULK, timeout=0, max_waiting=0)
+	assert await gate.acquire(Priority.INTERACTIVE, timeout=0, max_waiting=0)
+	assert gate.in_use == 3
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_immediately():
+	gate = PriorityGate(capacity=1)
+	assert await gate.acquire(Priority.INTERACTIVE, timeout=1, max_waiting=1)
+	waiter = asyncio.create_task(gate.acquire(Priority.INTERACTIVE, timeout=1, max_waiting=1))
+	await asyncio.sleep(0)
+	assert not await gate.acquire(Priority.INTERACTIVE, timeout=1, max_waiting=1)
+	gate.release()
+	assert await waiter
+
+
+@pytest.mark.asyncio
+async def test_timeout_gives_up_the_place_in_the_queue():
+	gate = PriorityGate(capacity=1)
+	await gate.acquire(Priority.INTERACTIVE, timeout=0, max_waiting=0)
+	assert not await gate.acquire(Priority.INTERACTIVE, timeout=0.01, max_waiting=5)
+	assert gate.waiting == 0
+	gate.release()
+	assert gate.in_use == 0
+
+
+@pytest.mark.asyncio
+async def test_interactive_waiter_is_served_before_bulk():
+	gate = PriorityGate(capacity=1)
+	await gate.acquire(Priority.INTERACTIVE, timeout=0, max_waiting=0)
+	order = []
+
+	async def wait(priority, name):
+		await gate.acquire(priority, timeout=1, max_waiting=10)
+		order.append(name)
+
+	bulk = asyncio.create_task(wait(Priority.BULK, "bulk"))
+	await asyncio.sleep(0)
+	interactive = asyncio.create_task(wait(Priority.INTERACTIVE, "interactive"))
+	await asyncio.sleep(0)
+
+	gate.release()
+	await interactive
+	assert order == ["interactive"]
+	gate.release()
+	await bulk
+	assert order == ["interactive", "bulk"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_does_not_overtake_a_queued_interactive_caller():
+	gate = PriorityGate(capacity=2, reserved=0)
+	await gate.acquire(Priority.INTERACTIVE, timeout=0, max_waiting=0)
+	await gate.acquire(Priority.INTERACTIVE, timeout=0, max_waiting=0)
+	interactive = asyncio.create_task(gate.acquire(Priority.INTERACTIVE, timeout=1, max_waiting=10))
+	await asyncio.sleep(0)
+	gate.in_use -= 1  # créneau libéré sans réveiller la file
+	assert not await gate.acquire(Priority.BULK, timeout=0, max_waiting=0)
+	gate.in_use += 1
+	gate.release()
+	assert await interactive
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_keep_a_slot():
+	gate = PriorityGate(capacity=1)
+	await gate.acquire(Priority.INTERACTIVE, timeout=0, max_waiting=0)
+	waiter = asyncio.create_task(gate.acquire(Priority.INTERACTIVE, timeout=1, max_waiting=10))
+	await asyncio.sleep(0)
+	waiter.cancel()
+	with pytest.raises(asyncio.CancelledError):
+		await waiter
+	gate.release()
+	assert gate.in_use == 0 and gate.waiting == 0
+	assert await gate.acquire(Priority.BULK, timeout=0, max_waiting=0)
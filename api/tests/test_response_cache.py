@@ -0,0 +1,133 @@
+import asyncio
+import time
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from redis import exceptions as redis_exceptions
+
+from app.db import redis as redis_module
+from app.db.redis import ResponseCache
+
+
+@pytest.fixture
+def cache():
+	cache = ResponseCache(None, ttl=30)
+	# Redis en mémoire, propre à chaque test
+	cache._client = FakeRedis(server=FakeServer())
+	return cache
+
+
+class Counter:
+	def __init__(self, delay: float = 0.0):
+		self.calls = 0
+		self.delay = delay
+
+	async def __call__(self) -> bytes:
+		self.calls += 1
+		await asyncio.sleep(self.delay)
+		return f"body-{self.calls}".encode()
+
+
+@pytest.mark.asyncio
+async def test_hit_after_first_compute(cache):
+	compute = Counter()
+	assert await cache.get_or_compute("tasks", {"page": 1}, compute) == b"body-1"
+	assert await cache.get_or_compute("tasks", {"page": 1}, compute) == b"body-1"
+	assert compute.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_bumps_namespace_version(cache):
+	tasks, users = Counter(), Counter()
+	await cache.get_or_compute("tasks", {}, tasks)
+	await cache.get_or_compute("users", {}, users)
+
+	await cache.invalidate("tasks")
+
+	assert await cache.get_or_compute("tasks", {}, tasks) == b"body-2"
+	assert await cache.get_or_compute("users", {}, users) == b"body-1"
+	assert await cache._client.get("tec-bloc:cache:tasks:version") == b"1"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_collapse_behind_lock(cache):
+	compute = Counter(delay=0.2)
+	bodies = await asyncio.gather(*(cache.get_or_compute("tasks", {}, compute) for _ in range(10)))
+	assert compute.calls == 1
+	assert set(bodies) == {b"body-1"}
+	assert await cache._client.exists(cache._key("tasks", 0, {}) + ":lock") == 0
+
+
+@pytest.mark.asyncio
+async def test_locked_recompute_serves_stale_body(cache, monkeypatch):
+	compute = Counter()
+	await cache.get_or_compute("tasks", {}, compute)
+	# Un autre worker tient le verrou et tout accès est une expiration anticipée
+	await cache._client.set(cache._key("tasks", 0, {}) + ":lock", b"1")
+	monkeypatch.setattr(redis_module, "EARLY_RECOMPUTE_BETA", 1e9)
+	compute.delay = 0.0
+
+	assert await cache.get_or_compute("tasks", {}, compute) == b"body-1"
+	assert compute.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_xfetch_recomputes_before_expiry(cache, monkeypatch):
+	compute = Counter(delay=0.01)
+	await cache.get_or_compute("tasks", {}, compute, ttl=2)
+
+	# -log(1) = 0 : jamais en avance
+	monkeypatch.setattr(redis_module.random, "random", lambda: 1.0)
+	assert await cache.get_or_compute("tasks", {}, compute, ttl=2) == b"body-1"
+
+	# Tirage minuscule : delta * -log(u) ≈ 0.01 * 690 s dépasse les 2 s restantes
+	monkeypatch.setattr(redis_module.random, "random", lambda: 1e-300)
+	assert await cache.get_or_compute("tasks", {}, compute, ttl=2) == b"body-2"
+	assert compute.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_per_call_ttl(cache):
+	await cache.get_or_compute("routes", {}, Counter(), ttl=3600)
+	assert 3590 < await cache._client.ttl(cache._key("routes", 0, {})) <= 3600
+
+
+@pytest.mark.asyncio
+async def test_without_redis_always_computes():
+	cache = ResponseCache(None, ttl=30)
+	compute = Counter()
+	await cache.get_or_compute("tasks", {}, compute)
+	await cache.get_or_compute("tasks", {}, compute)
+	assert compute.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_fall_back_to_compute(cache, monkeypatch):
+	async def unavailable(*args, **kwargs):
+		raise redis_exceptions.TimeoutError("Timeout reading from socket")
+
+	monkeypatch.setattr(cache._client, "get", unavailable)
+	monkeypatch.setattr(cache._client, "set", unavailable)
+	compute = Counter()
+	assert await cache.get_or_compute("tasks", {}, compute) == b"body-1"
+	await cache.invalidate("tasks")
+
+
+@pytest.mark.asyncio
+async def test_unresponsive_redis_times_out():
+	# Serveur qui accepte la connexion sans jamais répondre (Redis « trou noir »)
+	async def silent(reader, writer):
+		await reader.read()
+
+	server = await asyncio.start_server(silent, "127.0.0.1", 0)
+	port = server.sockets[0].getsockname()[1]
+	cache = ResponseCache(f"redis://127.0.0.1:{port}/0", ttl=30, timeout=0.2)
+	compute = Counter()
+	try:
+		started = time.monotonic()
+		assert await cache.get_or_compute("tasks", {}, compute) == b"body-1"
+		assert time.monotonic() - started < 2
+	finally:
+		await cache.close()
+		server.close()
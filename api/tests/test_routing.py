@@ -0,0 +1,72 @@
+import random
+import time
+
+import numpy as np
+import pytest
+
+from app.utils import routing
+from app.utils.routing import haversine_matrix, nearest_neighbour, order_stops, two_opt
+
+
+def path_length(path, distances):
+	return sum(distances[a, b] for a, b in zip(path, path[1:]))
+
+
+def random_points(count, seed=0):
+	rng = random.Random(seed)
+	return [rng.uniform(55.5, 56.0) for _ in range(count)], [rng.uniform(37.3, 37.9) for _ in range(count)]
+
+
+def test_haversine_matrix_is_symmetric_with_zero_diagonal():
+	distances = haversine_matrix(*random_points(20))
+	assert np.allclose(distances, distances.T)
+	assert np.all(np.diag(distances) == 0)
+
+
+def test_nearest_neighbour_visits_every_node_once():
+	path = nearest_neighbour(haversine_matrix(*random_points(30)))
+	assert path[0] == 0
+	assert sorted(path) == list(range(30))
+
+
+def test_two_opt_uncrosses_a_path():
+	# Départ à l'origine, quatre points sur une droite visités dans le désordre
+	latitudes = [0.0, 0.01, 0.03, 0.02, 0.04]
+	longitudes = [0.0] * 5
+	distances = haversine_matrix(latitudes, longitudes)
+	assert two_opt([0, 2, 1, 3, 4], distances) == [0, 1, 3, 2, 4]
+
+
+@pytest.mark.parametrize("count", [4, 25, 200])
+def test_two_opt_returns_a_permutation_no_longer_than_its_input(count):
+	distances = haversine_matrix(*random_points(count, seed=count))
+	start = nearest_neighbour(distances)
+	improved = two_opt(start, distances)
+	assert improved[0] == 0
+	assert sorted(improved) == list(range(count))
+	assert path_length(improved, distances) <= path_length(start, distances) + 1e-6
+
+
+def test_two_opt_respects_its_time_budget(monkeypatch):
+	monkeypatch.setattr(routing, "TWO_OPT_TIME_BUDGET", 0.01)
+	distances = haversine_matrix(*random_points(400, seed=1))
+	# Ordre aléatoire : beaucoup de passes possibles
+	start = [0] + random.Random(1).sample(range(1, 400), 399)
+	started = time.perf_counter()
+	improved = two_opt(start, distances)
+	# Le budget est vérifié après chaque passe : au plus une passe de dépassement
+	assert time.perf_counter() - started < 0.5
+	assert sorted(improved) == list(range(400))
+
+
+def test_order_stops_legs_match_the_order():
+	latitudes, longitudes = random_points(12, seed=3)
+	order, legs = order_stops(55.75, 37.62, latitudes, longitudes)
+	assert sorted(order) == list(range(12))
+	assert len(legs) == 12
+	points = [(55.75, 37.62)] + [(latitudes[k], longitudes[k]) for k in order]
+	expected = [
+		haversine_matrix([a[0], b[0]], [a[1], b[1]])[0, 1]
+		for a, b in zip(points, points[1:])
+	]
+	assert legs == pytest.approx(expected)
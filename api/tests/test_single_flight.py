@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+class Compute:
+	def __init__(self, delay: float = 0.05, error: Exception | None = None):
+		self.calls = 0
+		self.delay = delay
+		self.error = error
+
+	async def __call__(self):
+		self.calls += 1
+		call = self.calls
+		await asyncio.sleep(self.delay)
+		if self.error is not None:
+			raise self.error
+		return call
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_computation():
+	flight, compute = SingleFlight("test"), Compute()
+	results = await asyncio.gather(*(flight.do("tasks", compute) for _ in range(10)))
+	assert results == [1] * 10
+	assert compute.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_distinct_keys_and_later_calls_compute_again():
+	flight, compute = SingleFlight("test"), Compute()
+	assert sorted(await asyncio.gather(flight.do("a", compute), flight.do("b", compute))) == [1, 2]
+	assert await flight.do("a", compute) == 3
+
+
+@pytest.mark.asyncio
+async def test_error_reaches_every_caller_and_is_not_kept():
+	flight, compute = SingleFlight("test"), Compute(error=RuntimeError("boom"))
+	results = await asyncio.gather(*(flight.do("tasks", compute) for _ in range(3)), return_exceptions=True)
+	assert all(isinstance(result, RuntimeError) for result in results)
+	assert compute.calls == 1
+
+	compute.error = None
+	assert await flight.do("tasks", compute) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_shared_computation():
+	flight, compute = SingleFlight("test"), Compute(delay=0.1)
+	first = asyncio.create_task(flight.do("tasks", compute))
+	second = asyncio.create_task(flight.do("tasks", compute))
+	await asyncio.sleep(0.01)
+	first.cancel()
+	assert await second == 1
+	assert first.cancelled()
+	assert compute.calls == 1
@@ -17,6 +17,7 @@ import {
 import { Button } from './Button';
 import { useAuth } from '../context/authContext';
 import api from '../api';
+import { subscribeTaskEvents } from '../taskStream';
 
 dayjs.extend(customParseFormat);
 dayjs.locale('ru');
@@ -49,6 +50,24 @@ function Home() {
     }
   }, [user]);
 
+  // Mises à jour en direct des tâches terminées
+  useEffect(() => {
+    if (!user) return undefined;
+    return subscribeTaskEvents((kind, data) => {
+      if (kind === 'cleared') {
+        setCompletedTasks([]);
+        return;
+      }
+      setCompletedTasks((tasks) => {
+        const others = tasks.filter((task) => task.id !== data.task_id);
+        if (kind !== 'deleted' && data.task?.is_completed) {
+          return [data.task, ...others];
+        }
+        return others;
+      });
+    });
+  }, [user]);
+
   // Filtrer les tâches en fonction du terme de recherche
   useEffect(() => {
     if (searchTerm === '') {
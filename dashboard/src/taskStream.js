@@ -0,0 +1,53 @@
+import api from './api';
+
+const KINDS = ['created', 'completed', 'updated', 'deleted', 'cleared'];
+const RETRY_MS = 3000;
+
+// EventSource ne peut pas envoyer d'en-tête Authorization : le flux s'ouvre avec un
+// jeton court demandé à l'API, et chaque reconnexion en redemande un
+export function subscribeTaskEvents(onEvent) {
+  let source = null;
+  let cursor = null;
+  let closed = false;
+  let retry = null;
+
+  const schedule = () => {
+    if (!closed) {
+      retry = setTimeout(open, RETRY_MS);
+    }
+  };
+
+  const open = async () => {
+    try {
+      const { data } = await api.post('/task/stream-token');
+      if (closed) return;
+      const params = new URLSearchParams({ token: data.token });
+      if (cursor) {
+        params.set('cursor', cursor);
+      }
+      source = new EventSource(`${api.defaults.baseURL}/task/stream?${params}`);
+      KINDS.forEach((kind) =>
+        source.addEventListener(kind, (message) => {
+          cursor = message.lastEventId;
+          onEvent(kind, JSON.parse(message.data));
+        }),
+      );
+      source.onerror = () => {
+        // Jeton expiré ou coupure : nouveau jeton, reprise au dernier curseur
+        source.close();
+        schedule();
+      };
+    } catch (error) {
+      schedule();
+    }
+  };
+
+  open();
+  return () => {
+    closed = true;
+    clearTimeout(retry);
+    if (source) {
+      source.close();
+    }
+  };
+}